@@ -0,0 +1,99 @@
+"""
+Бенчмарк пакетных расчетов calculate_batch.
+Проверяет совпадение с поштучным расчетом по всем сочетаниям
+материал × инструмент × операция и измеряет время на миллион строк.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_batch
+"""
+import time
+
+from calculations.milling_calc import MillingCalculator
+from calculations.turning_calc import TurningCalculator
+from database.materials_lib import MATERIALS
+from database.tools_lib import TURNING_TOOLS, MILLING_TOOLS, OPERATIONS
+
+DIAMETERS = [0.5 * i for i in range(0, 401)]
+
+
+def check_turning():
+    for material in MATERIALS.values():
+        for tool in TURNING_TOOLS.values():
+            for operation in OPERATIONS["turning"]:
+                table = TurningCalculator.calculate_batch(material, tool, operation, DIAMETERS)
+                for i, diameter in enumerate(DIAMETERS):
+                    row = TurningCalculator.calculate(material, tool, operation, diameter)
+                    assert (table["speed"][i], table["feed"][i], table["rpm"][i]) == \
+                        (row["speed"], row["feed"], row["rpm"]), (material.name, tool.name, operation, diameter)
+
+
+def check_milling():
+    teeth = [2 + i % 5 for i in range(len(DIAMETERS))]
+    depths = [0.25 * i for i in range(len(DIAMETERS))]
+    for material in MATERIALS.values():
+        for tool in MILLING_TOOLS.values():
+            for operation in OPERATIONS["milling"]:
+                table = MillingCalculator.calculate_batch(material, tool, operation, DIAMETERS, teeth, depths)
+                for i, diameter in enumerate(DIAMETERS):
+                    row = MillingCalculator.calculate(material, tool, operation, diameter, teeth[i], depths[i])
+                    assert (table["speed"][i], table["feed_per_tooth"][i], table["rpm"][i],
+                            table["feed_rate"][i], table["step_over"][i], table["plunge_rate"][i]) == \
+                        (row["speed"], row["feed_per_tooth"], row["rpm"],
+                         row["feed_rate"], row["step_over"], row["plunge_rate"]), \
+                        (material.name, tool.name, operation, diameter)
+
+
+def check_milling_conventions():
+    """calculate фрезерования следует соглашениям токарного расчета"""
+    for material in MATERIALS.values():
+        for tool in MILLING_TOOLS.values():
+            for operation in OPERATIONS["milling"]:
+                row = MillingCalculator.calculate(material, tool, operation, tool.diameter, 4, tool.diameter)
+                assert row["speed"] == round(MillingCalculator.calculate_cutting_speed(material, tool, operation), 1)
+                assert row["feed_per_tooth"] == round(row["feed_per_tooth"], 3)
+                assert isinstance(row["rpm"], int)
+                assert row["rpm"] == TurningCalculator.calculate_rpm(row["speed"], tool.diameter)
+                helical = MillingCalculator.calculate_helical_milling(
+                    tool.diameter, MillingCalculator.mill_type(tool), material.group, tool.diameter, operation)
+                assert row["helix_angle"] == helical["recommended_helix_angle"]
+    assert MillingCalculator.calculate(MATERIALS["Сталь 45"], tool, operation, 0, 4)["rpm"] == 0
+
+
+def timed(label, func, rows):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<30} {rows:>9} строк: {elapsed * 1000:8.1f} мс ({rows / elapsed / 1e6:.1f} млн строк/с)")
+
+
+def main(rows: int = 1_000_000):
+    check_turning()
+    check_milling()
+    check_milling_conventions()
+    print("Пакетный расчет совпадает с поштучным")
+
+    material = MATERIALS["Сталь 45"]
+    turning_tool = TURNING_TOOLS["Резец проходной Т5К10"]
+    milling_tool = MILLING_TOOLS["Фреза концевая 10мм Т15К6"]
+    diameters = [1 + (i % 5000) * 0.1 for i in range(rows)]
+    # Сетка диаметров повторяется (как в таблицах режимов); distinct - все диаметры разные
+    distinct = [1 + i * 1e-4 for i in range(rows)]
+    teeth_column = [2 + i % 5 for i in range(rows)]
+    depths = [(i % 400) * 0.5 for i in range(rows)]
+
+    timed("Токарная обработка", lambda: TurningCalculator.calculate_batch(
+        material, turning_tool, "Наружное точение", diameters), rows)
+    timed("Фрезерование (с зубьями)", lambda: MillingCalculator.calculate_batch(
+        material, milling_tool, "Торцевое фрезерование", diameters, teeth=4), rows)
+    timed("Фрезерование (зубья, глубины)", lambda: MillingCalculator.calculate_batch(
+        material, milling_tool, "Спиральное фрезерование", diameters, teeth_column, depths), rows)
+    timed("Фрезерование (без повторов)", lambda: MillingCalculator.calculate_batch(
+        material, milling_tool, "Спиральное фрезерование", distinct, teeth_column, depths), rows)
+    timed("Поштучный calculate (токарн.)", lambda: [TurningCalculator.calculate(
+        material, turning_tool, "Наружное точение", d) for d in diameters], rows)
+    timed("Поштучный calculate (фрез.)", lambda: [MillingCalculator.calculate(
+        material, milling_tool, "Спиральное фрезерование", d, 4, 5.0) for d in diameters], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Бенчмарк матрицы совместимости (database/compatibility.py).
+Строит синтетический каталог: группы материалов, материалы инструмента
+с наборами подходящих групп (TOOL_MATERIALS), инструменты и материалы,
+и измеряет:
+- проверку пары материал/инструмент: битовая маска (по паре и по списку
+  инструментов для материала) против поиска группы в списке TOOL_MATERIALS;
+- таблицу режимов по всему каталогу (calculations/regime_chart.py):
+  с пропуском несовместимых пар против расчета всех пар и отбрасывания;
+- добавление инструмента с переносом в матрицу против полного построения.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_compatibility --materials 2000 --tools 200
+"""
+import argparse
+import random
+import time
+
+from calculations.regime_chart import DiameterRange, chart_rows
+from calculations.turning_calc import TurningCalculator
+from database.compatibility import COMPATIBILITY
+from database.db_operations import DatabaseOperations
+from database.materials_lib import MATERIALS, Material
+from database.tools_lib import OPERATIONS, TOOL_MATERIALS, TURNING_TOOLS, CuttingTool
+
+
+def synthetic_catalog(groups: int, tool_materials: int, materials: int, tools: int, rng: random.Random):
+    """Каталог, где каждому материалу инструмента подходит примерно треть групп"""
+    names = [f"Группа {i}" for i in range(groups)]
+    classification = {f"Инструментальный материал {i}": rng.sample(names, max(1, groups // 3))
+                      for i in range(tool_materials)}
+    material_rows = [Material(f"Материал {i}", rng.choice(names), 150, 500, (80, 120), (0.1, 0.3))
+                     for i in range(materials)]
+    tool_rows = [CuttingTool(f"Резец {i}", "turning", rng.choice(list(classification)), cutting_edge_angle=45)
+                 for i in range(tools)]
+    return material_rows, tool_rows, classification
+
+
+def timed(label, func, count):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<44} {elapsed / count * 1e6:10.3f} мкс/оп, всего {elapsed * 1000:8.1f} мс")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=30)
+    parser.add_argument("--tool-materials", type=int, default=12)
+    parser.add_argument("--materials", type=int, default=2000)
+    parser.add_argument("--tools", type=int, default=200)
+    parser.add_argument("--diameters", type=int, default=4, help="диаметров в таблице режимов")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    materials, tools, classification = synthetic_catalog(args.groups, args.tool_materials, args.materials,
+                                                         args.tools, rng)
+    MATERIALS.clear()
+    TURNING_TOOLS.clear()
+    TOOL_MATERIALS.clear()
+    DatabaseOperations.apply(materials=materials, tools=tools, tool_materials=classification)
+    pairs = [(material, tool) for material in materials for tool in tools]
+    print(f"\nКаталог: {len(materials)} материалов x {len(tools)} инструментов = {len(pairs)} пар")
+
+    timed("пары: allows() на каждую пару", lambda: sum(COMPATIBILITY.allows(m, t) for m, t in pairs), len(pairs))
+    compatible = timed("пары: select() по списку инструментов",
+                       lambda: sum(len(COMPATIBILITY.select(m, tools)) for m in materials), len(pairs))
+    listed = timed("пары: поиск в списке TOOL_MATERIALS",
+                   lambda: sum(m.group in TOOL_MATERIALS[t.material] for m, t in pairs), len(pairs))
+    assert compatible == listed
+    print(f"  совместимых пар: {compatible} ({compatible / len(pairs):.0%})")
+
+    # Таблица режимов: одна операция, несколько диаметров на пару
+    operations = OPERATIONS["turning"][:1]
+    diameters = DiameterRange(10, 10 + args.diameters - 1, 1)
+
+    def all_pairs():
+        rows = 0
+        for material, tool in pairs:
+            table = TurningCalculator.calculate_batch(material, tool, operations[0], diameters)
+            if material.group in TOOL_MATERIALS[tool.material]:
+                rows += len(table["rpm"])
+        return rows
+
+    pruned = timed("таблица: пропуск несовместимых пар",
+                   lambda: sum(1 for _ in chart_rows("turning", materials, tools, operations, diameters)), len(pairs))
+    computed = timed("таблица: расчет всех пар и отбрасывание", all_pairs, len(pairs))
+    assert pruned == computed, (pruned, computed)
+
+    new_tools = [CuttingTool(f"Новый резец {i}", "turning", rng.choice(list(classification)), cutting_edge_angle=45)
+                 for i in range(100)]
+    timed("add_tool с переносом в матрицу", lambda: [
+        DatabaseOperations.add_tool(tool.name, "turning", tool.material, cutting_edge_angle=45)
+        for tool in new_tools], len(new_tools))
+
+    def rebuild():
+        COMPATIBILITY._version = None
+        COMPATIBILITY.tools("turning", materials[0].group)
+
+    timed("полное построение матрицы", rebuild, 1)
+
+
+if __name__ == "__main__":
+    main()
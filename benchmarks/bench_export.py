@@ -0,0 +1,122 @@
+"""
+Бенчмарк выгрузки таблиц режимов (/export).
+Для CSV и XLSX измеряет время записи, скорость (строк/с), размер файла
+и пик памяти (tracemalloc) при потоковой записи из генератора строк;
+для сравнения - пик памяти, если строки сначала собрать в список.
+Отдельно проверяет, что фоновая выгрузка не задерживает обработчики диалога:
+задержка прогона диалога без выгрузки и во время выгрузки.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_export --rows 100000 1000000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks.fake_bot_api import install_test_config
+from benchmarks.suite import TURNING_DIALOG
+
+
+def catalog():
+    from database.materials_lib import MATERIALS
+    from database.tools_lib import OPERATIONS, TURNING_TOOLS
+    return list(MATERIALS.values()), list(TURNING_TOOLS.values()), OPERATIONS["turning"]
+
+
+def diameters_for(rows: int):
+    """Диапазон диаметров, дающий не меньше rows строк по всему каталогу"""
+    from calculations.regime_chart import DiameterRange
+    from database.compatibility import COMPATIBILITY
+    materials, tools, operations = catalog()
+    # Несовместимые пары материал/инструмент в таблицу не попадают
+    per_diameter = sum(len(COMPATIBILITY.tools("turning", material.group)) for material in materials) * len(operations)
+    count = -(-rows // per_diameter)
+    return DiameterRange(1, round(1 + (count - 1) * 0.1, 6), 0.1)
+
+
+def export(output: str, rows: int, materialize: bool = False):
+    """(строк, секунд, байт)"""
+    from calculations.regime_chart import COLUMNS, chart_rows
+    from utils.documents import WRITERS
+    materials, tools, operations = catalog()
+    with tempfile.TemporaryFile() as file:
+        start = time.perf_counter()
+        chart = chart_rows("turning", materials, tools, operations, diameters_for(rows))
+        if materialize:
+            chart = list(chart)
+        count = WRITERS[output](file, COLUMNS["turning"], chart)
+        return count, time.perf_counter() - start, file.tell()
+
+
+def peak_memory(output: str, rows: int, materialize: bool = False) -> float:
+    """Пик памяти выгрузки, МБ"""
+    tracemalloc.start()
+    try:
+        export(output, rows, materialize)
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def dialog_latency(bot_main, users: int = 50) -> float:
+    """p99 времени handle_update по диалогу токарного расчета, мс"""
+    timings = []
+    for user_id in range(1, users + 1):
+        for text in TURNING_DIALOG:
+            message = SimpleNamespace(text=text, chat=SimpleNamespace(id=user_id),
+                                      from_user=SimpleNamespace(id=user_id))
+            start = time.perf_counter()
+            bot_main.handle_update(message)
+            timings.append(time.perf_counter() - start)
+    return statistics.quantiles(timings, n=100)[98] * 1000
+
+
+def background(rows: int) -> None:
+    install_test_config()
+    import main as bot_main
+    bot_main.bot.send_message = lambda chat_id, text, **kwargs: None
+    bot_main.bot.send_document = lambda chat_id, document, **kwargs: None
+
+    dialog_latency(bot_main)  # прогрев: сессии, кэши
+    idle = dialog_latency(bot_main)
+    export_user = SimpleNamespace(chat=SimpleNamespace(id=10_000), from_user=SimpleNamespace(id=10_000))
+    for text in ("/start", "Токарная обработка", f"/export xlsx 1 {diameters_for(rows).stop} 0.1"):
+        bot_main.handle_update(SimpleNamespace(text=text, **vars(export_user)))
+    start = time.perf_counter()
+    while not bot_main.exports.active():
+        time.sleep(0.001)
+    busy = dialog_latency(bot_main)
+    bot_main.exports.drain()
+    print(f"\nДиалог (p99 handle_update): без выгрузки {idle:.2f} мс, во время выгрузки {busy:.2f} мс; "
+          f"выгрузка {rows} строк XLSX в фоне заняла {time.perf_counter() - start:.1f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000], help="строк в выгрузке")
+    parser.add_argument("--background-rows", type=int, default=200_000, help="строк в фоновой выгрузке")
+    args = parser.parse_args()
+
+    install_test_config()
+    from calculations.turning_calc import TURNING_COEFFICIENTS
+    TURNING_COEFFICIENTS.build()
+
+    print(f"{'формат':<6} {'строк':>9} {'время, с':>9} {'строк/с':>9} {'файл, МБ':>9} "
+          f"{'пик памяти, МБ':>15} {'списком, МБ':>12}")
+    for rows in args.rows:
+        for output in ("csv", "xlsx"):
+            count, elapsed, size = export(output, rows)
+            streamed = peak_memory(output, rows)
+            # Сбор строк в список - только для небольших выгрузок (для сравнения)
+            materialized = f"{peak_memory(output, rows, True):12.1f}" if rows <= 200_000 else f"{'-':>12}"
+            print(f"{output:<6} {count:9d} {elapsed:9.2f} {count / elapsed:9.0f} {size / 1024 / 1024:9.1f} "
+                  f"{streamed:15.2f} {materialized}")
+
+    background(args.background_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Бенчмарк форматирования результатов.
+Сравнивает прежние f-строки с объединением словарей {**result, ...}
+и скомпилированные шаблоны utils/formatter.py во всех форматах вывода.
+Проверяет, что Markdown-вывод шаблонов совпадает с прежним.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_formatter --messages 200000
+"""
+import argparse
+import timeit
+
+from calculations.milling_calc import MillingCalculator
+from calculations.turning_calc import TurningCalculator
+from database.materials_lib import MATERIALS
+from database.tools_lib import MILLING_TOOLS, TURNING_TOOLS
+from utils.formatter import FORMATS, ResultFormatter
+
+
+def legacy_turning(result):
+    """format_turning_result в том виде, в котором он был в main.py"""
+    return (
+        f"⚙️ *Результаты токарной обработки:*\n\n"
+        f"🔧 Операция: {result['operation']}\n"
+        f"📏 Материал: {result['material']}\n"
+        f"🛠 Инструмент: {result['tool']}\n"
+        f"📐 Диаметр: {result['diameter']} мм\n\n"
+        f"⚡ *Параметры:*\n"
+        f"- Скорость резания: {result['speed']} м/мин\n"
+        f"- Подача: {result['feed']} мм/об\n"
+        f"- Обороты: {result['rpm']} об/мин\n\n"
+        f"💡 *Рекомендации:*\n"
+        f"• Используйте СОЖ для охлаждения\n"
+        f"• Для чистовой обработки уменьшите подачу на 20%"
+    )
+
+
+def legacy_milling(result):
+    """format_milling_result в том виде, в котором он был в main.py"""
+    response = (
+        f"⚙️ *Результаты фрезерования:*\n\n"
+        f"🔧 Операция: {result['operation']}\n"
+        f"📏 Материал: {result['material']}\n"
+        f"🛠 Инструмент: {result['tool']}\n"
+        f"📐 Диаметр фрезы: {result['diameter']} мм\n"
+        f"🦷 Зубьев: {result['teeth']}\n\n"
+        f"⚡ *Параметры:*\n"
+        f"- Скорость: {result['speed']} м/мин\n"
+        f"- Подача на зуб: {result['feed_per_tooth']} мм/зуб\n"
+        f"- Обороты: {result['rpm']} об/мин\n"
+        f"- Минутная подача: {result['feed_rate']} мм/мин\n"
+    )
+    if result['operation'] == "Спиральное фрезерование":
+        response += (
+            f"\n🌀 *Параметры спирали:*\n"
+            f"- Шаг между проходами: {result['step_over']} мм\n"
+            f"- Вертикальная подача: {result['plunge_rate']} мм/мин\n"
+            f"- Глубина резания: {result['cutting_depth']} мм\n"
+            f"\n💡 *Рекомендации:*\n"
+            f"• Используйте компрессионные фрезы\n"
+            f"• Начинайте с 70% от расчетной подачи"
+        )
+    return response
+
+
+def compare(cases, messages, rounds=7):
+    """
+    Замеры по кругу (все варианты в каждом раунде), лучший раунд каждого варианта:
+    на общей машине скорость меняется со временем, и последовательные замеры несравнимы
+    """
+    best = {label: float("inf") for label, _ in cases}
+    for _ in range(rounds):
+        for label, func in cases:
+            best[label] = min(best[label], timeit.timeit(func, number=messages // rounds))
+    for label, _ in cases:
+        per_message = best[label] / (messages // rounds)
+        print(f"{label:<36} {per_message * 1e9:7.0f} нс/сообщение ({1 / per_message / 1e6:.2f} млн/с)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200_000)
+    args = parser.parse_args()
+
+    material = MATERIALS["Сталь 45"]
+    turning_tool = TURNING_TOOLS["Резец проходной Т5К10"]
+    milling_tool = MILLING_TOOLS["Фреза концевая 10мм Т15К6"]
+    turning = TurningCalculator.calculate(material, turning_tool, "Наружное точение", 50.0)
+    milling = MillingCalculator.calculate(material, milling_tool, "Спиральное фрезерование", 10.0, 4, 5.0)
+
+    # Прежний путь: handle_input дополнял результат полями, которые в нем уже есть
+    def legacy_turning_message():
+        return legacy_turning({**turning, "material": material.name, "tool": turning_tool.name, "diameter": 50.0})
+
+    def legacy_milling_message():
+        return legacy_milling({**milling, "material": material.name, "tool": milling_tool.name,
+                               "diameter": 10.0, "teeth": 4, "cutting_depth": 5.0})
+
+    assert ResultFormatter.render("turning", turning) == legacy_turning_message()
+    assert ResultFormatter.render("milling", milling) == legacy_milling_message()
+
+    compare([("Точение: f-строка + {**result}", legacy_turning_message)] +
+            [(f"Точение: шаблон ({output})",
+              lambda output=output: ResultFormatter.render("turning", turning, output=output))
+             for output in FORMATS], args.messages)
+    compare([("Спираль: f-строка + {**result}", legacy_milling_message)] +
+            [(f"Спираль: шаблон ({output})",
+              lambda output=output: ResultFormatter.render("milling", milling, output=output))
+             for output in FORMATS], args.messages)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Бенчмарк проверки управляющих программ (calculations/gcode_check.py).
+Генерирует синтетические программы токарной и фрезерной обработки
+(перемещения G1/G2/G3 с модальными F, смены инструмента и режимов,
+часть S/F вне допуска), записывает во временный файл и проверяет
+через mmap: только режимы и с временем цикла. Число найденных
+замечаний сверяется с заложенным при генерации.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_gcode --blocks 2000000
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from calculations.gcode_check import RegimeBounds, check_file
+from database.materials_lib import MATERIALS
+from database.tools_lib import MILLING_TOOLS, TURNING_TOOLS
+
+# Каждый SEGMENT кадров - смена режима; каждая BAD-я смена - вне допуска
+SEGMENT = 2000
+BAD = 5
+
+
+def turning_program(file, blocks: int, bounds: RegimeBounds, rng: random.Random) -> int:
+    """Токарная программа (G96/G95); возвращает число заложенных кадров вне допуска"""
+    file.write(b"%\nO1000 (SYNTHETIC TURNING)\nG21 G18 G40 G95\nG50 S3000\n")
+    bad = 0
+    for i in range(blocks):
+        if i % SEGMENT == 0:
+            segment = i // SEGMENT
+            factor = 2.0 if segment % BAD == BAD - 1 else 1.0
+            bad += 2 if factor != 1.0 else 0
+            file.write(b"T%02d%02d\nG96 S%d M3\nG0 X80. Z2.\nG1 F%.3f\n" % (
+                segment % 8 + 1, segment % 8 + 1, bounds.speed * factor, bounds.feed * factor))
+        file.write(b"N%d G1 X%.3f Z%.3f\n" % (i * 10 % 100000, rng.uniform(20, 80), -rng.uniform(0, 150)))
+    file.write(b"M30\n%\n")
+    return bad
+
+
+def milling_program(file, blocks: int, bounds: RegimeBounds, rng: random.Random) -> int:
+    """Фрезерная программа (G94/G97, дуги); возвращает число заложенных кадров вне допуска"""
+    file.write(b"%\nO2000 (SYNTHETIC MILLING)\nG21 G17 G90 G94\n")
+    rpm = 1000 * bounds.speed / (3.141592653589793 * bounds.tool_diameter)
+    bad = 0
+    for i in range(blocks):
+        if i % SEGMENT == 0:
+            segment = i // SEGMENT
+            factor = 0.5 if segment % BAD == BAD - 1 else 1.0
+            bad += 2 if factor != 1.0 else 0
+            file.write(b"T%d M6\nS%d M3\nG0 X0. Y0. Z5.\nG1 Z-2. F%.0f\n" % (
+                segment % 8 + 1, rpm * factor, bounds.feed * bounds.teeth * rpm))
+        x, y = rng.uniform(0, 200), rng.uniform(0, 100)
+        if i % 10 == 9:
+            file.write(b"G2 X%.3f Y%.3f R50.\n" % (x, y))
+        else:
+            file.write(b"G1 X%.3f Y%.3f\n" % (x, y))
+    file.write(b"M30\n%\n")
+    return bad
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=2_000_000, help="кадров перемещения в программе")
+    args = parser.parse_args()
+
+    material = MATERIALS["Сталь 45"]
+    cases = [
+        ("turning", turning_program,
+         RegimeBounds.for_regime("turning", material, TURNING_TOOLS["Резец проходной Т5К10"], "Наружное точение")),
+        ("milling", milling_program,
+         RegimeBounds.for_regime("milling", material, MILLING_TOOLS["Фреза концевая 10мм Т15К6"],
+                                 "Черновое фрезерование")),
+    ]
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        for name, generate, bounds in cases:
+            path = os.path.join(directory, f"{name}.nc")
+            with open(path, "wb") as file:
+                expected = generate(file, args.blocks, bounds, rng)
+            size = os.path.getsize(path) / 1e6
+            print(f"\n{name}: {size:.1f} МБ, заложено замечаний: {expected}")
+            for cycle_time in (False, True):
+                report = check_file(path, bounds, cycle_time)
+                assert report.out_of_range == expected, (report.out_of_range, expected)
+                label = "режимы и время цикла" if cycle_time else "только режимы"
+                extra = f", время цикла {report.cycle_minutes:.0f} мин" if cycle_time else ""
+                print(f"  {label:<22} {report.seconds * 1000:8.0f} мс, {report.throughput / 1e6:6.2f} млн кадров/с, "
+                      f"{size / report.seconds:6.0f} МБ/с{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Бенчмарк пакетного импорта каталога (database/catalog_import.py).
+Генерирует файл поставщика из N материалов (CSV и JSON Lines, с долей
+ошибочных записей и дубликатов) и измеряет разбор с проверкой, применение
+одним изменением каталога и откат. Для сравнения - добавление тех же
+записей по одной через DatabaseOperations.add_material (каждое изменение
+пересчитывает кэши подписчиков) на первых записях файла.
+Подписчики - как в боте: импортируется main.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_import --records 20000 --legacy 200
+    CNC_CATALOG_DB=/tmp/catalog.db python -m benchmarks.bench_import
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.fake_bot_api import install_test_config
+
+GROUPS = ["Конструкционная сталь", "Легированная сталь", "Титановые сплавы", "Жаропрочные сплавы"]
+
+
+def vendor_records(count: int):
+    """Записи файла поставщика: каждая 50-я с ошибкой, каждая 100-я - дубликат"""
+    for i in range(count):
+        record = {"name": f"Материал поставщика {i}", "group": GROUPS[i % len(GROUPS)],
+                  "hardness": 120 + i % 300, "tensile_strength": 400 + i % 900,
+                  "speed_min": 40 + i % 60, "speed_max": 100 + i % 60, "feed_min": 0.08, "feed_max": 0.3}
+        if i % 50 == 49:
+            record["hardness"] = 5000
+        if i % 100 == 98:
+            record["name"] = f"Материал поставщика {i - 1}"
+        yield record
+
+
+def write_files(directory: str, count: int):
+    csv_path, jsonl_path = os.path.join(directory, "vendor.csv"), os.path.join(directory, "vendor.jsonl")
+    with open(csv_path, "w", encoding="utf-8", newline="") as csv_file, \
+            open(jsonl_path, "w", encoding="utf-8") as jsonl_file:
+        writer = None
+        for record in vendor_records(count):
+            if writer is None:
+                writer = csv.DictWriter(csv_file, fieldnames=list(record))
+                writer.writeheader()
+            writer.writerow(record)
+            jsonl_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return csv_path, jsonl_path
+
+
+def legacy(count: int) -> float:
+    """Добавление по одной записи (после импорта и отката); возвращает секунд на запись"""
+    from database.db_operations import DatabaseOperations
+    from database.validation import CatalogError
+    start = time.perf_counter()
+    for record in vendor_records(count):
+        try:
+            DatabaseOperations.add_material(
+                record["name"], record["group"], record["hardness"], record["tensile_strength"],
+                (record["speed_min"], record["speed_max"]), (record["feed_min"], record["feed_max"]))
+        except CatalogError:
+            pass
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20_000, help="записей в файле поставщика")
+    parser.add_argument("--legacy", type=int, default=200, help="записей для добавления по одной")
+    args = parser.parse_args()
+
+    install_test_config()
+    import main as bot_main  # noqa: F401 - подписчики изменений каталога
+    from database.catalog_import import import_file
+    from database.db_operations import DatabaseOperations
+    from database.materials_lib import MATERIALS
+
+    catalog = "SQLite" if os.environ.get("CNC_CATALOG_DB") else "встроенный"
+    print(f"Каталог: {catalog}, материалов до импорта: {len(MATERIALS)}")
+    with tempfile.TemporaryDirectory() as directory:
+        for path in write_files(directory, args.records):
+            report, _ = import_file("materials", path)
+            print(f"\n{os.path.basename(path)}: прочитано {report.read}, добавлено {report.added}, "
+                  f"дубликатов {report.duplicates}, с ошибками {report.invalid}")
+            print(f"  разбор и проверка {report.parse_seconds * 1000:7.0f} мс "
+                  f"({report.read / report.parse_seconds:8.0f} записей/с)")
+            print(f"  применение        {report.apply_seconds * 1000:7.0f} мс (версия каталога {report.version})")
+            start = time.perf_counter()
+            DatabaseOperations.rollback()
+            print(f"  откат             {(time.perf_counter() - start) * 1000:7.0f} мс, "
+                  f"материалов после отката: {len(MATERIALS)}")
+            print(f"  итого             {report.throughput:8.0f} записей/с")
+
+    per_record = legacy(args.legacy)
+    print(f"\nПо одной (add_material), первые {args.legacy} записей: {per_record * 1000:.1f} мс на запись, "
+          f"{1 / per_record:.0f} записей/с; {args.records} записей - не менее "
+          f"{per_record * args.records:.0f} с (растет с размером каталога)")
+
+
+if __name__ == "__main__":
+    main()
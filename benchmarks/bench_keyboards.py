@@ -0,0 +1,82 @@
+"""
+Бенчмарк клавиатур: построение ReplyKeyboardMarkup и сериализация
+reply_markup на каждое сообщение против кэша готовых клавиатур.
+Выводит время и объем временных выделений памяти на сообщение.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_keyboards
+"""
+import time
+import tracemalloc
+
+from telebot.types import ReplyKeyboardMarkup, KeyboardButton
+
+from database.materials_lib import MATERIAL_GROUPS
+from database.tools_lib import OPERATIONS, TURNING_TOOLS
+from utils.keyboards import Keyboards
+
+
+def legacy_markup(buttons, row_width=2):
+    """Клавиатура в том виде, в котором она строилась до кэша"""
+    markup = ReplyKeyboardMarkup(resize_keyboard=True, row_width=row_width)
+    markup.add(*[KeyboardButton(btn) for btn in buttons])
+    return markup
+
+
+def legacy_dialog():
+    """Клавиатуры одного диалога, сериализованные как при отправке"""
+    group = next(iter(MATERIAL_GROUPS))
+    markups = [
+        legacy_markup(["Токарная обработка", "Фрезерная обработка"]),
+        legacy_markup(OPERATIONS["turning"] + ["Назад"], row_width=1),
+        legacy_markup(list(MATERIAL_GROUPS.keys()) + ["Назад"]),
+        legacy_markup(MATERIAL_GROUPS[group] + ["Назад"]),
+        legacy_markup(list(TURNING_TOOLS.keys()) + ["Назад"], row_width=1),
+    ]
+    return [markup.to_json() for markup in markups]
+
+
+def cached_dialog():
+    group = next(iter(MATERIAL_GROUPS))
+    markups = [
+        Keyboards.main_menu(),
+        Keyboards.operations_menu("turning"),
+        Keyboards.material_groups(),
+        Keyboards.materials_from_group(group),
+        Keyboards.tools_menu("turning"),
+    ]
+    return [markup.to_json() for markup in markups]
+
+
+def transient_memory(func, rounds):
+    """Пиковый прирост памяти за вызов (временные объекты клавиатур и JSON)"""
+    func()
+    tracemalloc.start()
+    peaks = []
+    for _ in range(rounds):
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - base)
+    tracemalloc.stop()
+    return sum(peaks) / rounds
+
+
+def main(rounds: int = 20_000):
+    assert legacy_dialog() == cached_dialog(), "JSON клавиатур должен совпадать"
+    messages = 5
+
+    for label, func in (("Построение на каждое сообщение", legacy_dialog),
+                        ("Кэш готовых клавиатур", cached_dialog)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        elapsed = time.perf_counter() - start
+        size = transient_memory(func, 1000)
+        print(f"{label:<32} {elapsed / rounds / messages * 1e6:7.2f} мкс/сообщение, "
+              f"{size / messages:7.0f} Б выделений/сообщение")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Бенчмарк накладных расходов метрик.
+Измеряет время одного наблюдения гистограммы и диспетчеризации сообщения
+роутером с замером времени обработчика и без него.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_metrics --events 200000
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+from utils.metrics import Histogram
+from utils.router import MessageRouter
+
+
+def timed(label, func, events, baseline=0.0):
+    start = time.perf_counter()
+    for _ in range(events):
+        func()
+    per_event = (time.perf_counter() - start) / events * 1e9
+    extra = f", накладные {per_event - baseline:6.0f} нс" if baseline else ""
+    print(f"{label:<34} {per_event:8.0f} нс/событие{extra}")
+    return per_event
+
+
+def make_router(histogram):
+    router = MessageRouter(histogram)
+
+    @router.command(['start'])
+    def handle_start(message):
+        return message
+
+    return router
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=200_000)
+    args = parser.parse_args()
+
+    histogram = Histogram("bench_seconds", "", "handler")
+    series = histogram.labels("handle_start")
+
+    def timer():
+        with series.time():
+            pass
+
+    def labelled_timer():
+        with histogram.labels("handle_start").time():
+            pass
+
+    timed("Series.observe", lambda: series.observe(0.001), args.events)
+    timed("with series.time()", timer, args.events)
+    timed("with histogram.labels().time()", labelled_timer, args.events)
+
+    message = SimpleNamespace(text="/start")
+    plain, measured = make_router(None), make_router(Histogram("bench_router_seconds", "", "handler"))
+    baseline = timed("MessageRouter.dispatch", lambda: plain.dispatch(message), args.events)
+    timed("MessageRouter.dispatch + метрика", lambda: measured.dispatch(message), args.events, baseline)
+
+
+if __name__ == "__main__":
+    main()
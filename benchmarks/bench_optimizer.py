@@ -0,0 +1,54 @@
+"""
+Бенчмарк перебора режимов.
+Строит Парето-фронты для синтетического каталога материалов в одном процессе
+и в пуле процессов.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_optimizer --materials 1000 --workers 4
+"""
+import argparse
+import os
+import random
+import time
+
+from calculations.optimizer import MachineEnvelope, SweepGrid, sweep_catalog
+from database.materials_lib import MATERIALS, Material
+
+
+def synthetic_materials(count, seed=1):
+    """Материалы каталога со случайно смещенными диапазонами скорости и подачи"""
+    rng = random.Random(seed)
+    base = list(MATERIALS.values())
+    materials = []
+    for i in range(count):
+        sample = rng.choice(base)
+        scale = rng.uniform(0.7, 1.3)
+        materials.append(Material(
+            f"{sample.name}-{i}", sample.group, sample.hardness * scale, sample.tensile_strength * scale,
+            tuple(v / scale for v in sample.recommended_speed), sample.recommended_feed))
+    return materials
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--materials", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=20, help="шагов сетки по скорости и подаче")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    materials = synthetic_materials(args.materials)
+    machine = MachineEnvelope(max_rpm=4000, max_feed_rate=2000)
+    grid = SweepGrid(speed_steps=args.steps, feed_steps=args.steps)
+
+    for process_type in ("turning", "milling"):
+        for workers in (1, args.workers):
+            start = time.perf_counter()
+            fronts = sweep_catalog(process_type, machine, grid, materials, workers=workers)
+            elapsed = time.perf_counter() - start
+            points = sum(len(front) for operations in fronts.values() for front in operations.values())
+            print(f"{process_type:<8} процессов {workers:>2}: {len(fronts)} материалов, "
+                  f"{points} точек фронтов, {elapsed:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
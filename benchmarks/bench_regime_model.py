@@ -0,0 +1,127 @@
+"""
+Бенчмарк режимов по твердости (calculations/regime_model.py).
+Строит синтетический каталог материалов, у которых скорость и подача
+плавно зависят от группы, твердости HB и предела прочности σв (с шумом),
+и измеряет:
+- точность: средняя ошибка интерполированных скорости и подачи для
+  материалов вне каталога (в сравнении со средним по группе);
+- время запроса соседей и расчетного материала;
+- время добавления материала (add_material) с переносом в индекс
+  в сравнении с полным построением индекса.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_regime_model --materials 100000
+"""
+import argparse
+import random
+import time
+
+from calculations.regime_model import RegimeModel
+from database.db_operations import DatabaseOperations
+from database.materials_lib import MATERIALS, Material
+
+# Группа: (скорость при 200 HB, м/мин; подача, мм/об; диапазон HB; σв/HB)
+GROUPS = {
+    "Конструкционная сталь": (110, 0.28, (110, 260), 3.4),
+    "Легированная сталь": (85, 0.22, (180, 400), 3.5),
+    "Нержавеющая сталь": (60, 0.18, (140, 280), 3.1),
+    "Чугун": (90, 0.3, (150, 300), 1.2),
+    "Титановый сплав": (45, 0.12, (250, 380), 3.3),
+    "Алюминий": (300, 0.35, (40, 140), 2.6),
+}
+NOISE = 0.03
+
+
+def regime(group: str, hardness: float, strength: float):
+    """Истинные средние скорость и подача синтетического материала"""
+    speed, feed, _, ratio = GROUPS[group]
+    # Тверже - медленнее; при той же твердости прочнее - медленнее
+    speed *= (200 / hardness) ** 0.8 * (ratio * hardness / strength) ** 0.4
+    feed *= (200 / hardness) ** 0.3
+    return speed, feed
+
+
+def sample(rng: random.Random):
+    group = rng.choice(list(GROUPS))
+    low, high = GROUPS[group][2]
+    hardness = round(rng.uniform(low, high))
+    strength = round(hardness * GROUPS[group][3] * rng.uniform(0.85, 1.15))
+    return group, hardness, strength
+
+
+def synthetic_materials(count: int, rng: random.Random, prefix: str = "М"):
+    materials = []
+    for i in range(count):
+        group, hardness, strength = sample(rng)
+        speed, feed = (value * rng.uniform(1 - NOISE, 1 + NOISE) for value in regime(group, hardness, strength))
+        materials.append(Material(f"{prefix}-{i}", group, hardness, strength,
+                                  (round(speed * 0.8, 1), round(speed * 1.2, 1)),
+                                  (round(feed * 0.8, 3), round(feed * 1.2, 3))))
+    return materials
+
+
+def accuracy(model: RegimeModel, materials, queries):
+    """Средняя относительная ошибка (скорость, подача): модель и среднее по группе"""
+    sums = {}
+    for material in materials:
+        total = sums.setdefault(material.group, [0.0, 0.0, 0])
+        total[0] += sum(material.recommended_speed) / 2
+        total[1] += sum(material.recommended_feed) / 2
+        total[2] += 1
+    errors = [0.0] * 4
+    for group, hardness, strength in queries:
+        speed, feed = regime(group, hardness, strength)
+        inferred = model.infer(group, hardness, strength)
+        mean_speed, mean_feed, count = sums[group]
+        errors[0] += abs(sum(inferred.recommended_speed) / 2 / speed - 1)
+        errors[1] += abs(sum(inferred.recommended_feed) / 2 / feed - 1)
+        errors[2] += abs(mean_speed / count / speed - 1)
+        errors[3] += abs(mean_feed / count / feed - 1)
+    return [error / len(queries) for error in errors]
+
+
+def timed(label, func, count):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed / count * 1e6:8.2f} мкс/оп")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--materials", type=int, default=100_000, help="материалов в синтетическом каталоге")
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--adds", type=int, default=200, help="добавлений через add_material")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    model = RegimeModel()
+    DatabaseOperations.subscribe(model.update)
+    for size in sorted({1000, args.materials}):
+        MATERIALS.clear()
+        materials = synthetic_materials(size, rng)
+        DatabaseOperations.apply(materials=materials)
+        start = time.perf_counter()
+        model.build()
+        print(f"\nКаталог {size} материалов: построение индекса {(time.perf_counter() - start) * 1000:.0f} мс")
+
+        queries = [sample(rng) for _ in range(args.queries)]
+        speed, feed, mean_speed, mean_feed = accuracy(model, materials, queries[:2000])
+        print(f"  ошибка скорости {speed:.2%}, подачи {feed:.2%} "
+              f"(среднее по группе: {mean_speed:.2%}, {mean_feed:.2%})")
+        timed("ближайшие соседи", lambda: [model.nearest(*query) for query in queries], len(queries))
+        timed("расчетный материал (infer)", lambda: [model.infer(*query) for query in queries], len(queries))
+
+    # Добавление материалов: перенос в индекс при уведомлении против полного построения
+    added = synthetic_materials(args.adds, rng, prefix="Доп")
+    timed("add_material (с переносом в индекс)", lambda: [
+        DatabaseOperations.add_material(material.name, material.group, material.hardness,
+                                        material.tensile_strength, material.recommended_speed,
+                                        material.recommended_feed)
+        for material in added], len(added))
+    assert len(model) == len(MATERIALS)
+    timed("полное построение индекса", lambda: model.build(), 1)
+
+
+if __name__ == "__main__":
+    main()
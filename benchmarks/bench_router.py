@@ -0,0 +1,93 @@
+"""
+Микробенчмарк маршрутизации сообщений.
+Сравнивает прежнюю цепочку lambda-фильтров из main.py с таблицей MessageRouter.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_router
+"""
+import timeit
+from types import SimpleNamespace
+
+from database.materials_lib import MATERIALS, MATERIAL_GROUPS
+from database.tools_lib import TURNING_TOOLS, MILLING_TOOLS, OPERATIONS
+from utils.router import MessageRouter
+
+
+def _handler(name):
+    def handler(message):
+        return name
+    return handler
+
+
+# Цепочка фильтров в том виде, в котором она была в main.py
+LEGACY_FILTERS = [
+    (lambda msg: msg.text in ["Токарная обработка", "Фрезерная обработка"], _handler("process_type")),
+    (lambda msg: msg.text in OPERATIONS['turning'] + OPERATIONS['milling'], _handler("operation")),
+    (lambda msg: msg.text in MATERIAL_GROUPS.keys(), _handler("material_group")),
+    (lambda msg: msg.text in MATERIALS.keys(), _handler("material")),
+    (lambda msg: msg.text in TURNING_TOOLS.keys(), _handler("turning_tool")),
+    (lambda msg: msg.text in MILLING_TOOLS.keys(), _handler("milling_tool")),
+    (lambda msg: True, _handler("input")),
+]
+
+
+def legacy_dispatch(message):
+    for func, handler in LEGACY_FILTERS:
+        if func(message):
+            return handler(message)
+
+
+def build_router() -> MessageRouter:
+    router = MessageRouter()
+    router.handler(["Токарная обработка", "Фрезерная обработка"])(_handler("process_type"))
+    router.handler(lambda: OPERATIONS['turning'] + OPERATIONS['milling'])(_handler("operation"))
+    router.lookup(MATERIAL_GROUPS)(_handler("material_group"))
+    router.lookup(MATERIALS)(_handler("material"))
+    router.lookup(TURNING_TOOLS)(_handler("turning_tool"))
+    router.lookup(MILLING_TOOLS)(_handler("milling_tool"))
+    router.fallback(_handler("input"))
+    return router
+
+
+def sample_messages():
+    """Типичный диалог: по одному сообщению на каждый шаг"""
+    texts = [
+        "Токарная обработка",
+        OPERATIONS['turning'][0],
+        next(iter(MATERIAL_GROUPS)),
+        next(iter(MATERIALS)),
+        next(iter(TURNING_TOOLS)),
+        next(iter(MILLING_TOOLS)),
+        "50.5",
+    ]
+    return [SimpleNamespace(text=text) for text in texts]
+
+
+def main(number: int = 200_000):
+    router = build_router()
+    messages = sample_messages()
+
+    # Маршрутизация должна совпадать с цепочкой фильтров
+    for message in messages:
+        assert router.dispatch(message) == legacy_dispatch(message), message.text
+
+    def run_legacy():
+        for message in messages:
+            legacy_dispatch(message)
+
+    def run_router():
+        for message in messages:
+            router.dispatch(message)
+
+    rounds = number // len(messages)
+    legacy = min(timeit.repeat(run_legacy, number=rounds, repeat=3))
+    table = min(timeit.repeat(run_router, number=rounds, repeat=3))
+    total = rounds * len(messages)
+
+    print(f"Цепочка фильтров: {legacy / total * 1e9:8.1f} нс/сообщение")
+    print(f"Таблица маршрутов: {table / total * 1e9:8.1f} нс/сообщение")
+    print(f"Ускорение: x{legacy / table:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Бенчмарк поиска по каталогу.
+Строит индекс по синтетическому каталогу марок сталей и сплавов и измеряет
+время запросов: префиксных, с латиницей вместо кириллицы и с опечатками.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_search --entries 100000
+"""
+import argparse
+import random
+import time
+
+from database.search_index import SearchIndex
+
+PREFIXES = ["Сталь", "Сплав", "Чугун", "Бронза", "Латунь", "Алюминий", "Титан"]
+ELEMENTS = "ХНМТВГСКЮФ"
+
+
+def synthetic_names(count, seed=1):
+    """Названия вида 'Сталь 12Х18Н10Т-123', уникальные"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        grade = f"{rng.randint(5, 95)}" + "".join(
+            f"{rng.choice(ELEMENTS)}{rng.choice(['', rng.randint(1, 25)])}" for _ in range(rng.randint(1, 4)))
+        names.add(f"{rng.choice(PREFIXES)} {grade}-{rng.randint(1, 999)}")
+    return sorted(names)
+
+
+def typo(name, rng):
+    """Название с одной заменой символа"""
+    position = rng.randrange(len(name))
+    return name[:position] + rng.choice("абвгдеж0123") + name[position + 1:]
+
+
+def timed(label, index, queries, limit):
+    found = 0
+    start = time.perf_counter()
+    for query in queries:
+        found += bool(index.search_ids(query, 0, limit))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / len(queries) * 1e6:8.0f} мкс/запрос, "
+          f"найдено {found}/{len(queries)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=8)
+    args = parser.parse_args()
+
+    names = synthetic_names(args.entries)
+    start = time.perf_counter()
+    index = SearchIndex(names)
+    print(f"Индекс: {len(index)} записей, построение {time.perf_counter() - start:.2f} с")
+
+    rng = random.Random(2)
+    sample = [rng.choice(names) for _ in range(args.queries)]
+    grades = [name.split()[1] for name in sample]
+    timed("Префикс марки", index, [grade[:5] for grade in grades], args.limit)
+    timed("Полное название", index, sample, args.limit)
+    timed("Латиница (X/H/T)", index,
+          [grade.replace("Х", "X").replace("Н", "H").replace("Т", "T") for grade in grades], args.limit)
+    timed("Опечатка", index, [typo(name, rng) for name in sample], args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Бенчмарк хранилищ сессий.
+Сравнивает память на N сессий для прежнего UserState (атрибуты в __dict__),
+записи на __slots__ и MemorySessionStore, измеряет скорость SQLite-хранилища.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_sessions --sessions 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from utils.sessions import MemorySessionStore, SqliteSessionStore, UserState
+
+
+class LegacyUserState:
+    """UserState в том виде, в котором он был в main.py"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.process_type = None
+        self.operation = None
+        self.material = None
+        self.tool = None
+        self.calculator = None
+        self.awaiting_input = None
+
+
+def measure(label, build, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    holder = build(count)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<34} {current / 2**20:8.1f} МБ ({current / count:6.0f} Б/сессия), {elapsed:.2f} с")
+    return holder
+
+
+def build_legacy(count):
+    user_states = {}
+    for user_id in range(count):
+        state = LegacyUserState()
+        state.process_type = "turning"
+        user_states[user_id] = state
+    return user_states
+
+
+def build_slots(count):
+    user_states = {}
+    for user_id in range(count):
+        state = UserState()
+        state.process_type = "turning"
+        user_states[user_id] = state
+    return user_states
+
+
+def build_memory_store(count):
+    store = MemorySessionStore(max_size=count)
+    for user_id in range(count):
+        store.get(user_id).process_type = "turning"
+    return store
+
+
+def bench_sqlite(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.db")
+        store = SqliteSessionStore(path)
+        start = time.perf_counter()
+        for user_id in range(count):
+            store.get(user_id).process_type = "turning"
+            store.commit(user_id)
+        write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for user_id in range(count):
+            store.get(user_id)
+            store.commit(user_id)
+        read = time.perf_counter() - start
+        size = os.path.getsize(path) + os.path.getsize(path + "-wal")
+        store.close()
+    print(f"SQLite: {count} сессий, запись {count / write:,.0f}/с, "
+          f"чтение+сохранение {count / read:,.0f}/с, файл {size / 2**20:.1f} МБ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--sqlite-sessions", type=int, default=100_000)
+    args = parser.parse_args()
+
+    measure("dict + UserState (__dict__)", build_legacy, args.sessions)
+    measure("dict + UserState (__slots__)", build_slots, args.sessions)
+    # LRU-порядок и срок жизни стоят ~50 Б/сессия сверх записи
+    measure("MemorySessionStore (LRU + TTL)", build_memory_store, args.sessions)
+
+    # Вытеснение по LRU: хранилище не растет сверх max_size
+    store = MemorySessionStore(max_size=10_000)
+    for user_id in range(args.sessions):
+        store.get(user_id)
+    print(f"LRU max_size=10000 после {args.sessions} пользователей: {len(store)} сессий")
+
+    bench_sqlite(args.sqlite_sessions)
+
+
+if __name__ == "__main__":
+    main()
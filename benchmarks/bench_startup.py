@@ -0,0 +1,139 @@
+"""
+Бенчмарк времени запуска бота.
+Запускает `import main` в отдельных процессах на копии проекта:
+холодный запуск - без __pycache__ проекта (первый старт после выкладки),
+теплые - с готовым байт-кодом. Сравнивает встроенный каталог и снимок
+каталога (CNC_CATALOG_SNAPSHOT), проверяет, что стартовое сообщение
+администратору не задерживает запуск опроса и что модули отдельных
+функций (inline-режим, материалы по твердости, выгрузка, проверка
+программ, оптимизатор) не загружаются при старте.
+Отдельно измеряет предрасчет коэффициентов и загрузку снимка
+для синтетического каталога из N материалов.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_startup --runs 5 --materials 5000
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_bot_api import TEST_TOKEN
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Выполняется в дочернем процессе: время импорта main и возврата из notify_admin
+# при Bot API, отвечающем за 0.5 с
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.bot.send_message = lambda *args, **kwargs: time.sleep(0.5)
+main.notify_admin()
+notified = time.perf_counter()
+print(json.dumps({"import": imported - start, "notify": notified - imported,
+                  "heavy": sorted(set(sys.modules) & {"asyncio", "concurrent.futures", "http.server",
+                                                       "sqlite3", "argparse", "calculations.optimizer",
+                                                       "calculations.regime_model", "calculations.gcode_check",
+                                                       "utils.inline_query", "utils.documents"})}))
+"""
+
+
+def copy_project(target: str) -> None:
+    shutil.copytree(PROJECT, target, ignore=shutil.ignore_patterns(".git", "__pycache__", "*.snapshot"))
+    with open(os.path.join(target, "config.py"), "w", encoding="utf-8") as f:
+        f.write(f'BOT_TOKEN = "{TEST_TOKEN}"\nADMIN_CHAT_ID = 0\n')
+
+
+def probe(root: str, env: dict) -> dict:
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=root, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - start
+    return result
+
+
+def startup(label: str, root: str, runs: int, snapshot: str = None) -> None:
+    env = {key: value for key, value in os.environ.items() if not key.startswith("CNC_CATALOG")}
+    env["PYTHONPATH"] = root
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # теплым запускам нужен байт-код на диске
+    if snapshot:
+        env["CNC_CATALOG_SNAPSHOT"] = snapshot
+
+    for cache in [os.path.join(directory, name) for directory, names, _ in os.walk(root)
+                  for name in names if name == "__pycache__"]:
+        shutil.rmtree(cache, ignore_errors=True)
+    cold = probe(root, env)
+    warm = [probe(root, env) for _ in range(runs)]
+
+    def median(key):
+        return statistics.median(run[key] for run in warm) * 1000
+
+    print(f"{label:<34} холодный: import {cold['import'] * 1000:6.0f} мс, процесс {cold['process'] * 1000:6.0f} мс | "
+          f"теплый: import {median('import'):6.0f} мс, процесс {median('process'):6.0f} мс | "
+          f"notify_admin {median('notify'):.1f} мс")
+    if warm[0]["heavy"]:
+        print(f"  загружены при старте: {', '.join(warm[0]['heavy'])}")
+
+
+def synthetic_catalog(root: str, count: int, path: str) -> None:
+    """Снимок каталога из count материалов; выводит время предрасчета и загрузки"""
+    script = f"""
+import sys, time
+sys.path.insert(0, {root!r})
+from database.materials_lib import MATERIALS, MATERIAL_GROUPS, Material
+from database import catalog_snapshot
+from calculations.turning_calc import TURNING_COEFFICIENTS
+from calculations.milling_calc import MILLING_COEFFICIENTS
+for i in range({count}):
+    group = list(MATERIAL_GROUPS)[i % len(MATERIAL_GROUPS)]
+    name = f"Синтетический материал {{i}}"
+    MATERIALS[name] = Material(name, group, 100 + i % 200, 400 + i % 500, (60 + i % 40, 110 + i % 40), (0.1, 0.3))
+    MATERIAL_GROUPS[group].append(name)
+start = time.perf_counter()
+TURNING_COEFFICIENTS.build()
+MILLING_COEFFICIENTS.build()
+built = time.perf_counter() - start
+catalog_snapshot.build_snapshot({path!r})
+start = time.perf_counter()
+snapshot = catalog_snapshot._read({path!r})
+materials = {{row[0]: Material(*row) for row in snapshot["materials"]}}
+for name in ("turning", "milling"):
+    catalog_snapshot.coefficients(snapshot, name)
+loaded = time.perf_counter() - start
+print(f"Каталог {{len(materials)}} материалов: предрасчет коэффициентов {{built * 1000:.0f}} мс, "
+      f"загрузка снимка {{loaded * 1000:.0f}} мс")
+"""
+    subprocess.run([sys.executable, "-c", script], cwd=root, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="теплых запусков на вариант")
+    parser.add_argument("--materials", type=int, default=5000, help="материалов в синтетическом каталоге")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "bot")
+        copy_project(root)
+        snapshot = os.path.join(tmp, "catalog.snapshot")
+        subprocess.run([sys.executable, "-m", "database.catalog_snapshot", "build", snapshot],
+                       cwd=root, check=True, capture_output=True)
+
+        startup("Встроенный каталог", root, args.runs)
+        startup("Снимок каталога", root, args.runs, snapshot)
+
+        large = os.path.join(tmp, "large.snapshot")
+        synthetic_catalog(root, args.materials, large)
+        startup(f"Снимок каталога ({args.materials} мат.)", root, args.runs, large)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Локальный фейковый Telegram Bot API для нагрузочных тестов.
+Выдает синтетические обновления через getUpdates, записывает
+время прихода каждого sendMessage и при заданных лимитах частоты
+отвечает 429, как настоящий API.
+"""
+import json
+import math
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import ModuleType
+from typing import Deque, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+TEST_TOKEN = "123456:TEST"
+
+
+def install_test_config(admin_chat_id: int = 0) -> None:
+    """Подмена config.py (его нет в репозитории) для импорта main в бенчмарках"""
+    if "config" not in sys.modules:
+        config = ModuleType("config")
+        config.BOT_TOKEN = TEST_TOKEN
+        config.ADMIN_CHAT_ID = admin_chat_id
+        sys.modules["config"] = config
+
+
+def make_update(update_id: int, user_id: int, text: str) -> dict:
+    """Синтетическое обновление с текстовым сообщением пользователя"""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+            "text": text,
+        },
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль по отсортированной выборке (q от 0 до 100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class _Server(ThreadingHTTPServer):
+    # Тысячи одновременных подключений: очередь accept по умолчанию (5) мала
+    request_queue_size = 4096
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Клиент оборвал соединение (например, отмененный long poll) - это не ошибка теста
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeBotAPI:
+    """Фейковый Bot API на ThreadingHTTPServer"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, chat_interval: float = 0.0,
+                 global_rate: int = 0):
+        """
+        :param chat_interval: минимальный интервал между сообщениями в чат (сек), чаще - ответ 429
+        :param global_rate: максимум сообщений в секунду на бота, больше - ответ 429
+        """
+        self.chat_interval = chat_interval
+        self.global_rate = global_rate
+        self.throttled = 0
+        self._last_sent: Dict[int, float] = {}
+        self._recent: Deque[float] = deque()
+        self._lock = threading.Condition()
+        self._updates: List[dict] = []
+        self._next_update_id = 1
+        self.pushed_at: Dict[int, float] = {}  # chat_id -> время постановки обновления
+        self.replied_at: Dict[int, float] = {}  # chat_id -> время первого ответа
+        self.sent: List[dict] = []
+        self._server = _Server((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Шаблон адреса в формате telebot: http://host:port/bot{0}/{1}"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot{{0}}/{{1}}"
+
+    def start(self) -> "FakeBotAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def push_update(self, user_id: int, text: str) -> dict:
+        """Поставить обновление в очередь getUpdates"""
+        with self._lock:
+            update = make_update(self._next_update_id, user_id, text)
+            self._next_update_id += 1
+            self._updates.append(update)
+            self.pushed_at.setdefault(user_id, time.perf_counter())
+            self._lock.notify_all()
+        return update
+
+    def wait_replies(self, count: int, timeout: float = 60.0) -> bool:
+        """Ожидание ответов как минимум в count чатов"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while len(self.replied_at) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+        return True
+
+    def latencies(self) -> List[float]:
+        """Задержка от постановки обновления до первого ответа в чат (сек)"""
+        return [self.replied_at[chat] - self.pushed_at[chat]
+                for chat in self.replied_at if chat in self.pushed_at]
+
+    # Обработка методов Bot API
+
+    def _get_updates(self, params: dict) -> list:
+        offset = int(params.get("offset", 0) or 0)
+        limit = int(params.get("limit", 100) or 100)
+        wait = min(float(params.get("timeout", 0) or 0), 1.0)
+        deadline = time.monotonic() + wait
+        with self._lock:
+            # Подтвержденные обновления удаляются, как в настоящем API
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+            while not self._updates and time.monotonic() < deadline:
+                self._lock.wait(deadline - time.monotonic())
+            return self._updates[:limit]
+
+    def _check_limits(self, chat_id: int) -> None:
+        """Ограничения частоты как у Telegram: при превышении - 429 с retry_after"""
+        now = time.monotonic()
+        retry_after = 0.0
+        if self.chat_interval:
+            last = self._last_sent.get(chat_id)
+            if last is not None and now - last < self.chat_interval:
+                retry_after = self.chat_interval - (now - last)
+        if self.global_rate:
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.global_rate:
+                retry_after = max(retry_after, 1.0 - (now - self._recent[0]))
+        if retry_after:
+            self.throttled += 1
+            seconds = math.ceil(retry_after)
+            raise FakeAPIError(429, f"Too Many Requests: retry after {seconds}", retry_after=seconds)
+        self._last_sent[chat_id] = now
+        if self.global_rate:
+            self._recent.append(now)
+
+    def _send_message(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        with self._lock:
+            self._check_limits(chat_id)
+            self.replied_at.setdefault(chat_id, time.perf_counter())
+            self.sent.append(params)
+            message_id = len(self.sent)
+            self._lock.notify_all()
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": params.get("text", ""),
+        }
+
+    def handle(self, method: str, params: dict):
+        """Результат вызова метода (или исключение для ошибки HTTP)"""
+        if method == "getUpdates":
+            return self._get_updates(params)
+        if method == "sendMessage":
+            return self._send_message(params)
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+        return True
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело уходят отдельными пакетами: без TCP_NODELAY ответ ждет ACK ~40 мс
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _params(self) -> dict:
+                parts = urlsplit(self.path)
+                params = dict(parse_qsl(parts.query))
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if body:
+                    content_type = self.headers.get("Content-Type", "")
+                    if "json" in content_type:
+                        params.update(json.loads(body))
+                    elif "x-www-form-urlencoded" in content_type:
+                        params.update(parse_qsl(body.decode()))
+                return params
+
+            def _reply(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _dispatch(self):
+                method = urlsplit(self.path).path.rsplit("/", 1)[-1]
+                try:
+                    result = api.handle(method, self._params())
+                except FakeAPIError as e:
+                    self._reply(e.status, e.payload)
+                    return
+                self._reply(200, {"ok": True, "result": result})
+
+            do_GET = _dispatch
+            do_POST = _dispatch
+
+        return Handler
+
+
+class FakeAPIError(Exception):
+    """Ответ фейкового API с ошибкой (например, 429)"""
+
+    def __init__(self, status: int, description: str, **parameters):
+        super().__init__(description)
+        self.status = status
+        self.payload = {"ok": False, "error_code": status, "description": description}
+        if parameters:
+            self.payload["parameters"] = parameters
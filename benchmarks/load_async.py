@@ -0,0 +1,53 @@
+"""
+Нагрузочный тест асинхронного режима (main.py --mode async).
+Поднимает локальный фейковый Bot API, отправляет по одному сообщению
+от каждого из N пользователей одновременно и выводит p50/p99 задержки ответа.
+
+Запуск из корня проекта (нужны pyTelegramBotAPI и aiohttp):
+    python -m benchmarks.load_async --users 1000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fake_bot_api import FakeBotAPI, TEST_TOKEN, install_test_config, percentile
+
+
+def run(users: int, max_in_flight: int) -> None:
+    install_test_config()
+    import main as bot_main
+    from runtime.async_runtime import AsyncRuntime
+
+    api = FakeBotAPI().start()
+    runtime = AsyncRuntime(TEST_TOKEN, bot_main.handle_update,
+                           max_in_flight=max_in_flight, api_url=api.url)
+
+    async def scenario():
+        serving = asyncio.create_task(runtime.serve())
+        start = time.perf_counter()
+        for user_id in range(1, users + 1):
+            api.push_update(user_id, "Токарная обработка")
+        done = await asyncio.get_running_loop().run_in_executor(None, api.wait_replies, users, 120)
+        elapsed = time.perf_counter() - start
+        runtime.stop()
+        await serving
+        return done, elapsed
+
+    try:
+        done, elapsed = asyncio.run(scenario())
+    finally:
+        api.stop()
+
+    latencies = api.latencies()
+    print(f"Пользователей: {users}, ответов: {len(latencies)}{'' if done else ' (таймаут)'}")
+    print(f"Время: {elapsed:.2f} с, {len(latencies) / elapsed:.0f} ответов/с")
+    print(f"p50: {percentile(latencies, 50) * 1000:.1f} мс")
+    print(f"p99: {percentile(latencies, 99) * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    args = parser.parse_args()
+    run(args.users, args.max_in_flight)
@@ -0,0 +1,104 @@
+"""
+Нагрузочный тест очереди исходящих сообщений (runtime/outbound.py).
+Фейковый Bot API отвечает 429 при превышении лимитов на чат и на бота.
+Один и тот же поток сообщений (меню и результаты расчетов для многих чатов)
+отправляется напрямую из потоков обработчиков и через OutboundQueue;
+выводятся доставка, число ответов 429, склейки и задержки по приоритетам.
+
+Запуск из корня проекта:
+    python -m benchmarks.load_outbound --chats 300 --rounds 5
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_bot_api import FakeBotAPI, TEST_TOKEN, percentile
+from runtime.outbound import PRIORITY_MENU, PRIORITY_RESULT, OutboundQueue, pooled_session
+
+
+def make_rounds(chats, rounds):
+    """Раунды сообщений (чат, текст, приоритет): каждому чату меню, каждому третьему - результат"""
+    result = []
+    for round_number in range(rounds):
+        messages = []
+        for chat_id in range(1, chats + 1):
+            if chat_id % 3 == 0:
+                messages.append((chat_id, f"Результат {round_number}", PRIORITY_RESULT))
+            else:
+                messages.append((chat_id, f"Меню {round_number}", PRIORITY_MENU))
+        result.append(messages)
+    return result
+
+
+def run_direct(bot, rounds, interval, threads):
+    """Отправка из потоков обработчиков, как без очереди: 429 - потерянное сообщение"""
+    failed = 0
+    lock = threading.Lock()
+
+    def send(message):
+        nonlocal failed
+        chat_id, text, _ = message
+        try:
+            bot.send_message(chat_id, text)
+        except Exception:
+            with lock:
+                failed += 1
+
+    with ThreadPoolExecutor(threads) as pool:
+        for messages in rounds:
+            pool.map(send, messages)
+            time.sleep(interval)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chats", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=0.2, help="пауза между раундами (сек)")
+    parser.add_argument("--chat-rate", type=float, default=2.0, help="лимит API: сообщений в секунду в чат")
+    parser.add_argument("--global-rate", type=int, default=100, help="лимит API: сообщений в секунду на бота")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    from telebot import TeleBot, apihelper
+
+    rounds = make_rounds(args.chats, args.rounds)
+    total = sum(len(messages) for messages in rounds)
+    bot = TeleBot(TEST_TOKEN, threaded=False)
+    pooled_session(args.workers)
+
+    for label in ("Напрямую", "OutboundQueue"):
+        api = FakeBotAPI(chat_interval=1 / args.chat_rate, global_rate=args.global_rate).start()
+        apihelper.API_URL = api.url
+        start = time.perf_counter()
+        if label == "Напрямую":
+            failed = run_direct(bot, rounds, args.interval, args.workers)
+            stats = None
+        else:
+            # Лимиты очереди чуть ниже лимитов API: 429 остаются исключением
+            queue = OutboundQueue(bot, workers=args.workers, global_rate=args.global_rate * 0.9,
+                                  chat_rate=args.chat_rate * 0.9, chat_burst=1)
+            for messages in rounds:
+                for chat_id, text, priority in messages:
+                    queue.send_message(chat_id, text, priority)
+                time.sleep(args.interval)
+            queue.drain()
+            stats = queue.stats()
+            failed = stats["failed"]
+        elapsed = time.perf_counter() - start
+        api.stop()
+
+        print(f"{label}: {total} сообщений за {elapsed:.2f} с, "
+              f"доставлено запросов {len(api.sent)}, потеряно {failed}, ответов 429: {api.throttled}")
+        if stats is not None:
+            print(f"  склеено: {stats['coalesced']}, задержка p50 {stats['latency_p50']:.2f} с, "
+                  f"p99 {stats['latency_p99']:.2f} с")
+            for priority, name in ((PRIORITY_RESULT, "результаты"), (PRIORITY_MENU, "меню")):
+                latencies = list(queue.latencies_by_priority.get(priority, []))
+                print(f"  {name:<10} p50 {percentile(latencies, 50):.2f} с, p99 {percentile(latencies, 99):.2f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Нагрузочный тест режима webhook (main.py --mode webhook).
+Поднимает WebhookServer и фейковый Bot API для ответов, отправляет POST-запросами
+синтетические обновления: каждый пользователь проходит диалог до результата расчета.
+Выводит пропускную способность (обновлений/с), число отказов 503 и проверяет,
+что у каждого пользователя сообщения обработаны по порядку.
+
+Запуск из корня проекта:
+    python -m benchmarks.load_webhook --users 500 --workers 8
+    python -m benchmarks.load_webhook --users 500 --shards 4 --processes
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+
+from benchmarks.fake_bot_api import FakeBotAPI, install_test_config, make_update
+
+DIALOG = ["/start", "Токарная обработка", "Наружное точение", "Конструкционная сталь",
+          "Сталь 45", "Резец проходной Т5К10", "50"]
+
+
+def post_updates(address, path, updates, stats, lock):
+    """Отправка обновлений по одному соединению; при 503 - повтор"""
+    connection = http.client.HTTPConnection(*address)
+    rejected = 0
+    for update in updates:
+        body = json.dumps(update).encode()
+        while True:
+            connection.request("POST", path, body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 503:
+                break
+            rejected += 1
+            time.sleep(0.01)
+    connection.close()
+    with lock:
+        stats["rejected"] += rejected
+
+
+def run(users, workers, clients, max_queue, shards=0, processes=False):
+    install_test_config()
+    from telebot import apihelper
+    import main as bot_main
+    from runtime.webhook import WebhookServer
+
+    api = FakeBotAPI().start()
+    apihelper.API_URL = api.url
+    server = WebhookServer(bot_main.handle_update, bot_main.handle_callback, listen=("127.0.0.1", 0),
+                           workers=workers, max_queue=max_queue, shards=shards, processes=processes)
+    serving = threading.Thread(target=server.serve)
+    serving.start()
+
+    # Обновления каждого клиента: шаги диалога по очереди для всех его пользователей
+    update_id = 0
+    batches = [[] for _ in range(clients)]
+    for step in DIALOG:
+        for user_id in range(1, users + 1):
+            update_id += 1
+            batches[user_id % clients].append(make_update(update_id, user_id, step))
+    total = update_id
+
+    stats, lock = {"rejected": 0}, threading.Lock()
+    threads = [threading.Thread(target=post_updates, args=(server.address, server.path, batch, stats, lock))
+               for batch in batches]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    accepted = time.perf_counter() - start
+
+    server.stop()
+    serving.join()
+    elapsed = time.perf_counter() - start
+    api.stop()
+
+    # Последний ответ каждого пользователя - результат расчета, если порядок соблюден
+    last = {}
+    for params in api.sent:
+        last[int(params["chat_id"])] = params.get("text", "")
+    ordered = sum(1 for text in last.values() if "Результаты токарной обработки" in text)
+
+    print(f"Пользователей: {users}, обновлений: {total}, потоков: {workers}")
+    print(f"Прием: {accepted:.2f} с ({total / accepted:.0f} обновлений/с), отказов 503: {stats['rejected']}")
+    print(f"Обработка с ответами: {elapsed:.2f} с ({server.pool.processed / elapsed:.0f} обновлений/с)")
+    print(f"Ответов: {len(api.sent)}, диалогов по порядку: {ordered}/{users}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=16, help="параллельных HTTP-соединений")
+    parser.add_argument("--max-queue", type=int, default=1000)
+    parser.add_argument("--shards", type=int, default=0, help="диспетчер по шардам вместо общего пула")
+    parser.add_argument("--processes", action="store_true", help="шарды - процессы")
+    args = parser.parse_args()
+    run(args.users, args.workers, args.clients, args.max_queue, args.shards, args.processes)
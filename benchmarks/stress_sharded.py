@@ -0,0 +1,119 @@
+"""
+Стресс-тест диспетчера по шардам (runtime/sharded.py).
+Каждый пользователь многократно проходит диалог до результата расчета;
+обновления всех пользователей перемешаны. Проверяется, что ответы каждого
+пользователя совпадают с последовательным прогоном (состояние не испорчено),
+и измеряется пропускная способность при разном числе рабочих.
+Для сравнения запускается пул потоков без закрепления пользователей
+(как telebot с threaded=True).
+
+Запуск из корня проекта:
+    python -m benchmarks.stress_sharded --users 200 --rounds 5 --shards 1 2 4 --processes
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_bot_api import install_test_config, make_update
+
+DIALOG = ["/start", "Токарная обработка", "Наружное точение", "Конструкционная сталь",
+          "Сталь 45", "Резец проходной Т5К10", "50"]
+
+
+def busy(seconds):
+    """Имитация затрат CPU на обработку и сериализацию ответа"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def install_recorder(bot_main, replies, work):
+    """Ответы бота уходят в очередь (chat_id, текст) вместо Bot API"""
+    def send_message(chat_id, text, **kwargs):
+        busy(work)
+        replies.put((chat_id, text))
+    bot_main.bot.send_message = send_message
+
+
+def make_messages(users, rounds):
+    from telebot.types import Update
+
+    messages, update_id = [], 0
+    for _ in range(rounds):
+        for step in DIALOG:
+            for user_id in range(1, users + 1):
+                update_id += 1
+                messages.append(Update.de_json(make_update(update_id, user_id, step)).message)
+    return messages
+
+
+def collect(replies, total):
+    """Ответы по чатам (читаются в отдельном потоке, пока идет обработка)"""
+    chats = {}
+    for _ in range(total):
+        chat_id, text = replies.get()
+        chats.setdefault(chat_id, []).append(text)
+    return chats
+
+
+def run(label, submit, finish, messages, replies, expected):
+    total = len(expected) * len({m.from_user.id for m in messages})
+    result = {}
+    reader = threading.Thread(target=lambda: result.update(collect(replies, total)))
+    reader.start()
+    start = time.perf_counter()
+    for message in messages:
+        submit(message)
+    finish()
+    reader.join()
+    elapsed = time.perf_counter() - start
+    broken = sum(1 for texts in result.values() if texts != expected)
+    print(f"{label:<28} {len(messages) / elapsed:8.0f} обновлений/с, испорчено диалогов: {broken}/{len(result)}")
+    return len(messages) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--processes", action="store_true", help="рабочие - процессы")
+    parser.add_argument("--work-ms", type=float, default=0.2, help="затраты CPU на ответ, мс")
+    args = parser.parse_args()
+
+    install_test_config()
+    import main as bot_main
+    from runtime.sharded import ShardedDispatcher
+
+    context = multiprocessing.get_context("fork")
+    replies = context.Queue()
+    install_recorder(bot_main, replies, args.work_ms / 1000)
+    messages = make_messages(args.users, args.rounds)
+
+    # Эталон: ответы одного пользователя при последовательной обработке
+    for message in messages:
+        if message.from_user.id == 1:
+            bot_main.handle_update(message)
+    expected = [replies.get()[1] for _ in range(len(DIALOG) * args.rounds)]
+    print(f"Ядер: {os.cpu_count()}, пользователей: {args.users}, обновлений: {len(messages)}")
+
+    with ThreadPoolExecutor(max(args.shards)) as pool:
+        run(f"Пул потоков ({max(args.shards)}) без шардов",
+            lambda m: pool.submit(bot_main.handle_update, m), lambda: None, messages, replies, expected)
+
+    kind = "процессов" if args.processes else "потоков"
+    per_worker = None
+    for shards in args.shards:
+        bot_main.sessions = type(bot_main.sessions)()  # чистые сессии для каждого прогона
+        dispatcher = ShardedDispatcher(bot_main.run_handler, shards, processes=args.processes)
+        rate = run(f"Шарды: {shards} {kind}",
+                   lambda m: dispatcher.submit(m.from_user.id, (bot_main.handle_update, m), None),
+                   dispatcher.drain, messages, replies, expected)
+        per_worker = per_worker or rate / shards
+        print(f"{'':<28} ускорение {rate / per_worker:.2f}x (линейное: {shards}x)")
+
+if __name__ == "__main__":
+    main()
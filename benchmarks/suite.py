@@ -0,0 +1,359 @@
+"""
+Набор бенчмарков для сравнения коммитов.
+Покрывает поштучный и пакетный расчет режимов и оценки партий, форматирование результатов,
+прогон диалогов и inline-запросов через обработчики с заглушкой бота, построение клавиатур
+и оборот сессий. Результаты пишутся в JSON (нс на операцию), сравнение
+с результатами другого коммита проверяет пороги регрессии.
+
+Запуск из корня проекта:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline base.json      # код выхода 1 при регрессии
+    python -m benchmarks.suite --only calc. --repeat 9
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.fake_bot_api import install_test_config
+
+# Допустимое замедление относительно базовых результатов, разы.
+# Сравнивается медиана времени относительно эталонной нагрузки (см. _reference)
+DEFAULT_THRESHOLD = 1.25
+# Шумные случаи (ввод-вывод)
+THRESHOLDS = {
+    "sessions.sqlite": 1.5,
+}
+
+TURNING_DIALOG = ["/start", "Токарная обработка", "Наружное точение", "Конструкционная сталь",
+                  "Сталь 45", "Резец проходной Т5К10", "50"]
+MILLING_DIALOG = ["/start", "Фрезерная обработка", "Спиральное фрезерование", "Конструкционная сталь",
+                  "Сталь 45", "Фреза концевая 10мм Т15К6", "10 4 5"]
+
+# Случай: имя -> построитель, возвращающий (функция прогона, число операций за прогон)
+Case = Callable[[], Tuple[Callable[[], object], int]]
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str):
+    def register(build: Case) -> Case:
+        CASES[name] = build
+        return build
+    return register
+
+
+def _turning_args():
+    from database.materials_lib import MATERIALS
+    from database.tools_lib import TURNING_TOOLS
+    return MATERIALS["Сталь 45"], TURNING_TOOLS["Резец проходной Т5К10"], "Наружное точение"
+
+
+def _milling_args():
+    from database.materials_lib import MATERIALS
+    from database.tools_lib import MILLING_TOOLS
+    return MATERIALS["Сталь 45"], MILLING_TOOLS["Фреза концевая 10мм Т15К6"], "Спиральное фрезерование"
+
+
+@case("calc.turning.scalar")
+def _():
+    from calculations.turning_calc import TurningCalculator
+    material, tool, operation = _turning_args()
+    diameters = [10 + i * 0.5 for i in range(1000)]
+    return lambda: [TurningCalculator.calculate(material, tool, operation, d) for d in diameters], len(diameters)
+
+
+@case("calc.turning.batch")
+def _():
+    from calculations.turning_calc import TurningCalculator
+    material, tool, operation = _turning_args()
+    diameters = [10 + (i % 1000) * 0.5 for i in range(100_000)]
+    return lambda: TurningCalculator.calculate_batch(material, tool, operation, diameters), len(diameters)
+
+
+@case("calc.milling.scalar")
+def _():
+    from calculations.milling_calc import MillingCalculator
+    material, tool, operation = _milling_args()
+    diameters = [2 + i * 0.05 for i in range(1000)]
+    return (lambda: [MillingCalculator.calculate(material, tool, operation, d, 4, 5.0) for d in diameters],
+            len(diameters))
+
+
+@case("calc.milling.batch")
+def _():
+    from calculations.milling_calc import MillingCalculator
+    material, tool, operation = _milling_args()
+    diameters = [2 + (i % 1000) * 0.05 for i in range(100_000)]
+    depths = [5.0] * len(diameters)
+    return (lambda: MillingCalculator.calculate_batch(material, tool, operation, diameters, 4, depths),
+            len(diameters))
+
+
+
+def _turning_jobs(count: int):
+    from calculations.estimator import TurningJob
+    from database.tools_lib import OPERATIONS, TURNING_TOOLS
+    from database.materials_lib import MATERIALS
+    materials, tools = list(MATERIALS.values()), list(TURNING_TOOLS.values())
+    return [TurningJob(materials[i % len(materials)], tools[i % len(tools)],
+                       OPERATIONS["turning"][i % len(OPERATIONS["turning"])],
+                       20 + i % 180, 50 + i % 250, 0.5 + i % 10 * 0.5, 1 + i % 500) for i in range(count)]
+
+
+@case("estimate.scalar")
+def _():
+    from calculations.estimator import MachiningEstimator
+    jobs = _turning_jobs(1000)
+    return lambda: [MachiningEstimator.estimate_turning(*job) for job in jobs], len(jobs)
+
+
+@case("estimate.batch")
+def _():
+    from calculations.estimator import MachiningEstimator
+    jobs = _turning_jobs(100_000)
+    return lambda: MachiningEstimator.turning_batch(jobs), len(jobs)
+
+def _bot_main():
+    install_test_config()
+    import main as bot_main
+    return bot_main
+
+
+@case("format.turning")
+def _():
+    from calculations.turning_calc import TurningCalculator
+    bot_main = _bot_main()
+    material, tool, operation = _turning_args()
+    result = {**TurningCalculator.calculate(material, tool, operation, 50),
+              "material": material.name, "tool": tool.name, "diameter": 50}
+    return lambda: [bot_main.format_turning_result(result) for _ in range(1000)], 1000
+
+
+@case("format.milling")
+def _():
+    from calculations.milling_calc import MillingCalculator
+    bot_main = _bot_main()
+    material, tool, operation = _milling_args()
+    result = {**MillingCalculator.calculate(material, tool, operation, 10, 4, 5.0), "operation": operation}
+    return lambda: [bot_main.format_milling_result(result) for _ in range(1000)], 1000
+
+
+def _dialog(texts: List[str], users: int = 100):
+    """Прогон диалога пользователями по очереди; ответы бота отбрасываются"""
+    bot_main = _bot_main()
+    bot_main.bot.send_message = lambda chat_id, text, **kwargs: None
+    messages = [SimpleNamespace(text=text, chat=SimpleNamespace(id=user_id),
+                                from_user=SimpleNamespace(id=user_id))
+                for user_id in range(1, users + 1) for text in texts]
+
+    def run():
+        for message in messages:
+            bot_main.handle_update(message)
+
+    return run, len(messages)
+
+
+@case("dialog.turning")
+def _():
+    return _dialog(TURNING_DIALOG)
+
+
+@case("dialog.milling")
+def _():
+    return _dialog(MILLING_DIALOG)
+
+
+INLINE_QUERIES = ["токарн 45 Т5К10 50", "токарн раст алюм расточной 40", "фрез черн 40х концевая 10 10 4",
+                  "фрез спир 12х18 концевая 6 6 3 2"]
+
+
+def _inline(cached: bool):
+    """Inline-запросы; без кэша - каждый запрос разбирается и считается заново"""
+    bot_main = _bot_main()
+    bot_main.deliver = lambda bot, method, *args, **kwargs: None
+    queries = [SimpleNamespace(id=str(i), query=text, from_user=SimpleNamespace(id=i))
+               for i in range(250) for text in INLINE_QUERIES]
+
+    def run():
+        for query in queries:
+            if not cached:
+                bot_main.get_inline_queries().clear()
+            bot_main.handle_inline_query(query)
+
+    return run, len(queries)
+
+
+@case("inline.uncached")
+def _():
+    return _inline(cached=False)
+
+
+@case("inline.cached")
+def _():
+    return _inline(cached=True)
+
+
+@case("keyboards.menus")
+def _():
+    from database.materials_lib import MATERIAL_GROUPS
+    from utils.keyboards import Keyboards
+    group = next(iter(MATERIAL_GROUPS))
+
+    def run():
+        for _ in range(200):
+            Keyboards.main_menu().to_json()
+            Keyboards.operations_menu("turning").to_json()
+            Keyboards.material_groups().to_json()
+            Keyboards.materials_from_group(group).to_json()
+            Keyboards.tools_menu("milling").to_json()
+
+    return run, 1000
+
+
+@case("keyboards.search_results")
+def _():
+    from utils.keyboards import Keyboards
+    results = [(i, f"Сталь 12Х18Н10Т-{i}") for i in range(8)]
+    return (lambda: [Keyboards.search_results("material", 1, results, "Сталь 12Х18", 8, True, 8).to_json()
+                     for _ in range(1000)], 1000)
+
+
+@case("sessions.memory")
+def _():
+    from utils.sessions import MemorySessionStore
+    # Пользователей больше, чем мест: каждое второе обращение вытесняет сессию
+    store = MemorySessionStore(max_size=10_000)
+    users = range(20_000)
+
+    def run():
+        for user_id in users:
+            store.get(user_id).process_type = "turning"
+            store.commit(user_id)
+
+    return run, len(users)
+
+
+@case("sessions.sqlite")
+def _():
+    from utils.sessions import SqliteSessionStore
+    store = SqliteSessionStore(os.path.join(tempfile.mkdtemp(), "sessions.db"))
+    users = range(2000)
+
+    def run():
+        for user_id in users:
+            store.get(user_id).process_type = "turning"
+            store.commit(user_id)
+
+    return run, len(users)
+
+
+def _reference(rounds: int = 2000) -> float:
+    """
+    Эталонная нагрузка (словари, строки, арифметика), нс на раунд.
+    Выполняется рядом с каждым замером: отношение к ней меньше зависит
+    от частоты процессора и соседней нагрузки, чем абсолютное время.
+    """
+    start = time.perf_counter()
+    for i in range(rounds):
+        row = {"speed": i * 1.5, "feed": i / 7, "name": f"Сталь {i}"}
+        round(row["speed"] * 1000 / (3.14159 * (i % 50 + 1)))
+        row["name"].split()
+    return (time.perf_counter() - start) / rounds * 1e9
+
+
+def measure(build: Case, repeat: int) -> Dict[str, float]:
+    run, ops = build()
+    run()  # прогрев: кэши, ленивые импорты
+    timings, relative = [], []
+    for _ in range(repeat):
+        reference = _reference()
+        start = time.perf_counter()
+        run()
+        elapsed = (time.perf_counter() - start) / ops * 1e9
+        timings.append(elapsed)
+        relative.append(elapsed / reference)
+    return {
+        "ns_per_op": statistics.median(timings),
+        "min_ns_per_op": min(timings),
+        "relative": statistics.median(relative),
+        "ops": ops,
+        "repeat": repeat,
+    }
+
+
+def environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Печать сравнения с базовыми результатами; возвращает имена регрессий"""
+    regressions = []
+    print(f"\n{'случай':<26} {'база, нс':>12} {'сейчас, нс':>12} {'отношение':>10}  порог")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<26} {'-':>12} {result['ns_per_op']:12.1f} {'-':>10}")
+            continue
+        ratio = result["relative"] / base["relative"]
+        limit = THRESHOLDS.get(name, threshold)
+        mark = "РЕГРЕССИЯ" if ratio > limit else ""
+        if mark:
+            regressions.append(name)
+        print(f"{name:<26} {base['ns_per_op']:12.1f} {result['ns_per_op']:12.1f} {ratio:10.2f}  x{limit:.2f} {mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--baseline", help="результаты другого коммита (JSON) для сравнения")
+    parser.add_argument("--only", nargs="*", default=[], metavar="PREFIX", help="только случаи с этими префиксами")
+    parser.add_argument("--repeat", type=int, default=7, help="число замеров каждого случая")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимое замедление для случаев без своего порога")
+    args = parser.parse_args()
+
+    results = {}
+    for name, build in CASES.items():
+        if args.only and not name.startswith(tuple(args.only)):
+            continue
+        results[name] = measure(build, args.repeat)
+        print(f"{name:<26} {results[name]['ns_per_op']:12.1f} нс/оп (мин. {results[name]['min_ns_per_op']:.1f}, "
+              f"отн. {results[name]['relative']:.3f})")
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\nРегрессии: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
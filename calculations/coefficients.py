@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from database.catalog_store import is_lazy_catalog
+from database.materials_lib import MATERIALS
+
+# Ключ таблицы: (материал, инструмент, операция)
+CoefficientKey = Tuple[str, str, str]
+
+
+class CoefficientTable:
+    """
+    Предрасчитанные скорость резания и подача по ключу (материал, инструмент, операция)
+    и ограниченный LRU-кэш оборотов по (скорость, диаметр).
+    Результат зависит только от ключа, поэтому считается один раз на запись каталога.
+    Для каталога в SQLite таблица заполняется по мере обращений, а не целиком при старте,
+    и ограничена memo_size записями (LRU, как кэш записей каталога).
+    """
+
+    def __init__(
+        self,
+        speed_func: Callable,
+        feed_func: Callable,
+        rpm_func: Callable[[float, float], float],
+        tools: Mapping,
+        operations: Iterable[str],
+        rpm_cache_size: int = 4096,
+        memo_size: int = 65536
+    ):
+        """
+        :param speed_func: расчет скорости резания (материал, инструмент, операция)
+        :param feed_func: расчет подачи (материал, инструмент, операция)
+        :param rpm_func: расчет оборотов (скорость, диаметр)
+        :param tools: каталог инструментов для предрасчета
+        :param operations: список операций для предрасчета
+        :param rpm_cache_size: размер LRU-кэша оборотов
+        :param memo_size: размер таблицы, заполняемой по мере обращений (каталог в SQLite)
+        """
+        self._speed_func = speed_func
+        self._feed_func = feed_func
+        self._tools = tools
+        self._operations = operations
+        self._table: Dict[CoefficientKey, Tuple[float, float]] = {}
+        self._lazy = False
+        self._memo_size = memo_size
+        self.rpm = lru_cache(maxsize=rpm_cache_size)(rpm_func)
+        self.hits = 0
+        self.misses = 0
+
+    def build(self) -> None:
+        """Предрасчет коэффициентов для всего каталога (при старте и после изменений)"""
+        table = {}
+        self._lazy = is_lazy_catalog(MATERIALS)
+        if self._lazy:
+            table = OrderedDict()
+        for material in ([] if self._lazy else MATERIALS.values()):
+            for tool in self._tools.values():
+                for operation in self._operations:
+                    table[(material.name, tool.name, operation)] = (
+                        self._speed_func(material, tool, operation),
+                        self._feed_func(material, tool, operation),
+                    )
+        self._table = table
+        self.rpm.cache_clear()
+
+    def export(self) -> Dict[CoefficientKey, Tuple[float, float]]:
+        """Предрасчитанная таблица (для снимка каталога)"""
+        return dict(self._table)
+
+    def restore(self, table: Dict[CoefficientKey, Tuple[float, float]]) -> None:
+        """Таблица из снимка каталога вместо предрасчета при старте"""
+        self._lazy = is_lazy_catalog(MATERIALS)
+        self._table = OrderedDict(table) if self._lazy else table
+        self.rpm.cache_clear()
+
+    def lookup(self, material, tool, operation: str) -> Tuple[float, float]:
+        """Скорость резания и подача для сочетания материал/инструмент/операция"""
+        key = (material.name, tool.name, operation)
+        coefficients = self._table.get(key)
+        if coefficients is None:
+            self.misses += 1
+            coefficients = (self._speed_func(material, tool, operation),
+                            self._feed_func(material, tool, operation))
+            # Каталог в SQLite: запоминаем по мере обращений, вытесняя давние.
+            # Во встроенном каталоге промах - сочетание вне каталога, его не запоминаем;
+            # расчетные материалы (у каждого свои HB и σв) не запоминаются никогда
+            if self._lazy and not material.inferred:
+                self._table[key] = coefficients
+                if len(self._table) > self._memo_size:
+                    self._table.popitem(last=False)
+            return coefficients
+        self.hits += 1
+        if self._lazy:
+            try:
+                self._table.move_to_end(key)
+            except KeyError:
+                pass  # вытеснена другим потоком
+        return coefficients
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        """Счетчики попаданий таблицы и кэша оборотов"""
+        rpm_info = self.rpm.cache_info()
+        return {
+            "size": len(self._table),
+            "hits": self.hits,
+            "misses": self.misses,
+            "rpm_hits": rpm_info.hits,
+            "rpm_misses": rpm_info.misses,
+            "rpm_size": rpm_info.currsize,
+            "rpm_maxsize": rpm_info.maxsize,
+        }
@@ -0,0 +1,57 @@
+"""
+Столбцовые операции пакетных расчетов (calculate_batch).
+
+Столбец считается отображениями map по всему столбцу, без вызова функции
+Python на строку. В таблицах режимов значения повторяются (сетка диаметров
+на каждое сочетание материал/инструмент/операция), поэтому столбец
+диаметров кодируется словарем: значения считаются по различным диаметрам,
+а строки собираются по кодам чтением списка. Самая дорогая операция
+строки - round до знака - так выполняется по разу на различное значение.
+"""
+import math
+from itertools import repeat
+from operator import add, mul, truediv
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+
+def encode(column: Sequence) -> Tuple[Sequence, Optional[List[int]]]:
+    """
+    Словарное кодирование: (различные значения, номер значения для каждой строки).
+    Без заметных повторов (различных больше половины строк) - (column, None)
+    """
+    keys = list(dict.fromkeys(column))
+    if len(keys) * 2 > len(column):
+        return column, None
+    index = dict(zip(keys, range(len(keys))))
+    return keys, list(map(index.__getitem__, column))
+
+
+def expand(values: Sequence, codes: Optional[Sequence[int]]) -> List:
+    """Столбец строк по значениям для различных ключей (обратно encode)"""
+    return list(values) if codes is None else list(map(values.__getitem__, codes))
+
+
+def grid_codes(codes: Sequence[int], width: int, inner: Iterable[int]) -> List[int]:
+    """Коды строк в сетке (ключ, inner): ключ * width + inner"""
+    return list(map(add, map(mul, codes, repeat(width)), inner))
+
+
+def rounded(values: Iterable[float], ndigits: int) -> List[float]:
+    return list(map(round, values, repeat(ndigits)))
+
+
+def rpm_values(cutting_speed: float, diameters: Sequence[float]) -> List[int]:
+    """
+    Обороты для столбца диаметров: те же round(V * 1000 / (3.1416 * d)) и 0 при d <= 0,
+    что у calculate_rpm калькуляторов
+    """
+    if diameters and min(diameters) <= 0:
+        # Деление на бесконечность дает 0.0: строки с d <= 0 обнуляются без ветвления
+        diameters = [d if d > 0 else math.inf for d in diameters]
+    return list(map(round, map(truediv, repeat(cutting_speed * 1000), map(mul, repeat(3.1416), diameters))))
+
+
+def rpm_column(cutting_speed: float, diameters: Sequence[float]) -> List[int]:
+    """Обороты для столбца диаметров (по различным диаметрам)"""
+    keys, codes = encode(diameters)
+    return expand(rpm_values(cutting_speed, keys), codes)
@@ -0,0 +1,314 @@
+"""
+Оценка машинного времени и расхода инструмента на партию деталей.
+
+По размерам детали, припуску и размеру партии считаются число проходов,
+машинное время детали и партии, стойкость инструмента по формуле Тейлора
+V·T^n = C и расход режущих кромок (пластин, фрез).
+
+Постоянные Тейлора предрасчитываются по (вид обработки, группа материала,
+материал инструмента) для сочетаний из TOOL_MATERIALS: опорная скорость -
+средняя рекомендуемая скорость группы с поправкой калькулятора на материал
+инструмента, при ней инструмент работает опорную стойкость.
+
+Пакетная оценка по списку работ идет по столбцам: работы группируются
+по (материал, инструмент, операция), коэффициенты и постоянные Тейлора
+берутся один раз на группу, время по проходам считается в замкнутом виде.
+"""
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from database.catalog_store import is_lazy_catalog
+from database.compatibility import COMPATIBILITY
+from database.db_operations import DatabaseOperations
+from database.materials_lib import MATERIALS, MATERIAL_GROUPS, Material
+from database.tools_lib import TOOL_MATERIALS, CuttingTool
+from calculations.milling_calc import MILLING_COEFFICIENTS, MillingCalculator
+from calculations.turning_calc import TURNING_COEFFICIENTS, TurningCalculator
+
+# Материал инструмента: (показатель Тейлора n, стойкость при опорной скорости, мин)
+TOOL_LIFE = {
+    "Быстрорежущая сталь": (0.125, 60),
+    "Твердый сплав": (0.25, 15),
+    "Минералокерамика": (0.5, 10),
+    "Алмаз": (0.35, 120),
+    "CBN": (0.45, 30),
+}
+DEFAULT_TOOL_LIFE = (0.25, 15)
+# Поправка стойкости по группе обрабатываемого материала
+GROUP_LIFE_FACTORS = {
+    "Алюминий": 2.0,
+    "Цветные металлы": 2.0,
+    "Нержавеющая сталь": 0.7,
+    "Чугун": 0.9,
+    "Закаленные стали": 0.5,
+    "Титан": 0.5,
+}
+# Стойкость инструмента вне рекомендуемых групп (TOOL_MATERIALS)
+INCOMPATIBLE_LIFE_FACTOR = 0.3
+
+# Наибольшая глубина резания за проход при точении, мм
+TURNING_MAX_DEPTH = {
+    "Наружное точение": 2.0,
+    "Растачивание": 1.5,
+    "Подрезание": 2.0,
+    "Резьбонарезание": 0.15,
+    "Отрезание": None,  # один проход на всю глубину
+}
+DEFAULT_TURNING_DEPTH = 2.0
+# Операции с движением поперек оси (путь - радиус детали), остальные - вдоль оси (путь - длина)
+RADIAL_OPERATIONS = frozenset({"Подрезание", "Отрезание"})
+# Фрезерование: (глубина за проход, ширина за проход) в долях диаметра фрезы
+MILLING_ENGAGEMENT = {
+    "Торцевое фрезерование": (0.05, 0.75),
+    "Контурное фрезерование": (1.0, 0.1),
+    "Черновое фрезерование": (0.5, 0.5),
+    "Чистовое фрезерование": (0.1, 0.3),
+    "Спиральное фрезерование": (0.1, None),  # ширина - шаг спирали по группе материала
+}
+DEFAULT_ENGAGEMENT = (0.5, 0.5)
+
+# Режущих кромок на пластину (точение) и на инструмент (цельная фреза)
+EDGES_PER_TOOL = {"turning": 2, "milling": 1}
+# Время смены кромки или инструмента, мин
+TOOL_CHANGE_MINUTES = 1.0
+DEFAULT_TEETH = 4
+
+_CALCULATORS = {"turning": TurningCalculator, "milling": MillingCalculator}
+
+
+class TurningJob(NamedTuple):
+    """Токарная работа: деталь и партия"""
+    material: Material
+    tool: CuttingTool
+    operation: str
+    diameter: float  # готовый диаметр, мм (для растачивания - диаметр отверстия)
+    length: float  # длина обработки, мм
+    allowance: float  # припуск на сторону, мм
+    batch: int  # деталей в партии
+
+
+class MillingJob(NamedTuple):
+    """Фрезерная работа: обрабатываемая поверхность и партия"""
+    material: Material
+    tool: CuttingTool
+    operation: str
+    length: float  # длина поверхности, мм
+    width: float  # ширина поверхности, мм
+    allowance: float  # припуск по глубине, мм
+    batch: int  # деталей в партии
+    teeth: int = DEFAULT_TEETH
+
+
+def _midpoint(value) -> float:
+    return sum(value) / 2 if isinstance(value, tuple) else value
+
+
+class ToolLifeTable:
+    """
+    Постоянные Тейлора (C, n) по (вид обработки, группа материала, материал инструмента).
+    Сочетания из TOOL_MATERIALS считаются при первом обращении к версии каталога;
+    остальные (несовместимые сочетания, каталог в SQLite) - при первом обращении к ним.
+    """
+
+    def __init__(self):
+        self._table: Dict[Tuple[str, str, str], Tuple[float, float, bool]] = {}
+        self._group_speeds: Dict[str, float] = {}
+        self._version = None
+
+    def build(self) -> None:
+        """Предрасчет по каталогу; при обращении после изменения каталога выполняется заново"""
+        version = DatabaseOperations.version
+        sums: Dict[str, List[float]] = {}
+        for material in ([] if is_lazy_catalog(MATERIALS) else MATERIALS.values()):
+            total = sums.setdefault(material.group, [0.0, 0])
+            total[0] += _midpoint(material.recommended_speed)
+            total[1] += 1
+        group_speeds = {group: total / count for group, (total, count) in sums.items()}
+        table = {}
+        for process_type in _CALCULATORS:
+            for tool_material, groups in TOOL_MATERIALS.items():
+                for group in groups:
+                    if group in group_speeds:
+                        table[(process_type, group, tool_material)] = self._constants(
+                            process_type, group, tool_material, group_speeds[group])
+        self._table, self._group_speeds, self._version = table, group_speeds, version
+
+    def _group_speed(self, material: Material) -> float:
+        speed = self._group_speeds.get(material.group)
+        if speed is None:
+            names = MATERIAL_GROUPS.get(material.group) or []
+            speeds = [_midpoint(MATERIALS[name].recommended_speed) for name in names]
+            # Материал вне каталога: опорная скорость - его собственная
+            speed = sum(speeds) / len(speeds) if speeds else _midpoint(material.recommended_speed)
+            self._group_speeds[material.group] = speed
+        return speed
+
+    @staticmethod
+    def _constants(process_type: str, group: str, tool_material: str,
+                   group_speed: float) -> Tuple[float, float, bool]:
+        exponent, life = TOOL_LIFE.get(tool_material, DEFAULT_TOOL_LIFE)
+        compatible = COMPATIBILITY.compatible(group, tool_material)
+        life *= GROUP_LIFE_FACTORS.get(group, 1.0) * (1.0 if compatible else INCOMPATIBLE_LIFE_FACTOR)
+        reference_speed = group_speed * _CALCULATORS[process_type].SPEED_TOOL_FACTORS.get(tool_material, 1.0)
+        return reference_speed * life ** exponent, exponent, compatible
+
+    def lookup(self, process_type: str, material: Material, tool_material: str) -> Tuple[float, float, bool]:
+        """(C, n, совместим ли материал инструмента с группой материала)"""
+        if self._version != DatabaseOperations.version:
+            self.build()
+        key = (process_type, material.group, tool_material)
+        constants = self._table.get(key)
+        if constants is None:
+            constants = self._table[key] = self._constants(
+                process_type, material.group, tool_material, self._group_speed(material))
+        return constants
+
+    def tool_life(self, process_type: str, material: Material, tool_material: str, speed: float) -> float:
+        """Стойкость, мин, при скорости резания speed, м/мин"""
+        constant, exponent, _ = self.lookup(process_type, material, tool_material)
+        return (constant / speed) ** (1 / exponent) if speed > 0 else math.inf
+
+
+TOOL_LIFE_TABLE = ToolLifeTable()
+
+
+def _usage(batch: int, cut_time: float, tool_life: float, edges_per_tool: int) -> Tuple[float, int, float]:
+    """(кромок на партию, инструментов (пластин), машинное время партии со сменами кромок, мин)"""
+    edges = batch * cut_time / tool_life if tool_life > 0 else math.inf
+    changes = math.ceil(edges) - 1 if edges > 1 else 0
+    return edges, math.ceil(edges / edges_per_tool), batch * cut_time + changes * TOOL_CHANGE_MINUTES
+
+
+def _group(jobs: Sequence[NamedTuple]) -> Dict[Tuple[str, str, str], List[int]]:
+    """Номера работ по (материал, инструмент, операция) в порядке появления"""
+    groups: Dict[Tuple[str, str, str], List[int]] = {}
+    for index, job in enumerate(jobs):
+        groups.setdefault((job.material.name, job.tool.name, job.operation), []).append(index)
+    return groups
+
+
+_COLUMNS = ("passes", "depth", "speed", "feed", "rpm", "cut_time", "tool_life", "edges", "tools", "batch_time",
+            "compatible")
+
+
+def _columns(names: Sequence[str], rows: List[tuple]) -> Dict[str, List]:
+    """Строки работ -> столбцы"""
+    if not rows:
+        return {name: [] for name in names}
+    return dict(zip(names, map(list, zip(*rows))))
+
+
+class MachiningEstimator:
+    @staticmethod
+    def _passes(allowance: float, max_depth: Optional[float]) -> int:
+        if max_depth is None:
+            return 1
+        return math.ceil(allowance / max_depth - 1e-9) or 1
+
+    @staticmethod
+    def turning_batch(jobs: Sequence[TurningJob]) -> Dict[str, List]:
+        """
+        Оценка списка токарных работ
+        :return: таблица по столбцам (порядок строк - как у работ): проходы, глубина за проход,
+                 скорость, подача, обороты первого прохода, машинное время детали (мин),
+                 стойкость (мин), кромок на партию, пластин, время партии (мин), совместимость
+        """
+        rows: List[tuple] = [None] * len(jobs)
+        for indexes in _group(jobs).values():
+            first = jobs[indexes[0]]
+            speed, feed = TURNING_COEFFICIENTS.lookup(first.material, first.tool, first.operation)
+            constant, exponent, compatible = TOOL_LIFE_TABLE.lookup("turning", first.material, first.tool.material)
+            tool_life = (constant / speed) ** (1 / exponent) if speed > 0 else math.inf
+            # Время прохода: путь·π·d / (1000·V·f); сумма диаметров по проходам - в замкнутом виде
+            time_factor = math.pi / (1000 * speed * feed) if speed > 0 and feed > 0 else math.inf
+            operation = first.operation
+            radial = operation in RADIAL_OPERATIONS
+            max_depth = TURNING_MAX_DEPTH.get(operation, DEFAULT_TURNING_DEPTH)
+            for index in indexes:
+                job = jobs[index]
+                if job.diameter <= 0 or job.length <= 0 or job.allowance < 0 or job.batch <= 0:
+                    raise ValueError(f"Недопустимые размеры работы: {job}")
+                passes = MachiningEstimator._passes(job.allowance, max_depth)
+                depth = job.allowance / passes
+                if operation == "Растачивание":
+                    start = job.diameter - 2 * job.allowance + 2 * depth
+                    if start - 2 * depth <= 0:
+                        raise ValueError(f"Припуск больше радиуса отверстия: {job}")
+                    diameters = passes * start + depth * passes * (passes - 1)
+                elif operation == "Наружное точение":
+                    start = job.diameter + 2 * job.allowance
+                    diameters = passes * start - depth * passes * (passes - 1)
+                else:
+                    start = job.diameter
+                    diameters = passes * start
+                path = job.diameter / 2 if radial else job.length
+                cut_time = path * diameters * time_factor
+                edges, tools, batch_time = _usage(job.batch, cut_time, tool_life, EDGES_PER_TOOL["turning"])
+                rows[index] = (passes, depth, speed, feed, round(speed * 1000 / (math.pi * start)), cut_time,
+                               tool_life, edges, tools, batch_time, compatible)
+        return _columns(_COLUMNS, rows)
+
+    @staticmethod
+    def milling_batch(jobs: Sequence[MillingJob]) -> Dict[str, List]:
+        """
+        Оценка списка фрезерных работ (диаметр - из инструмента)
+        :return: таблица по столбцам как у turning_batch; feed - минутная подача, мм/мин,
+                 дополнительно width_passes - проходов по ширине на слой
+        """
+        rows: List[tuple] = [None] * len(jobs)
+        for indexes in _group(jobs).values():
+            first = jobs[indexes[0]]
+            tool_diameter = first.tool.diameter
+            if not tool_diameter or tool_diameter <= 0:
+                raise ValueError(f"У фрезы не задан диаметр: {first.tool.name}")
+            speed, feed_per_tooth = MILLING_COEFFICIENTS.lookup(first.material, first.tool, first.operation)
+            constant, exponent, compatible = TOOL_LIFE_TABLE.lookup("milling", first.material, first.tool.material)
+            tool_life = (constant / speed) ** (1 / exponent) if speed > 0 else math.inf
+            rpm = round(speed * 1000 / (math.pi * tool_diameter))
+            depth_share, width_share = MILLING_ENGAGEMENT.get(first.operation, DEFAULT_ENGAGEMENT)
+            if width_share is None:
+                width_share = MillingCalculator._helical_coefficients(first.material.group)["step_over"]
+            max_depth, max_width = depth_share * tool_diameter, width_share * tool_diameter
+            for index in indexes:
+                job = jobs[index]
+                if job.length <= 0 or job.width <= 0 or job.allowance <= 0 or job.batch <= 0 or job.teeth <= 0:
+                    raise ValueError(f"Недопустимые размеры работы: {job}")
+                feed_rate = feed_per_tooth * job.teeth * rpm
+                passes = MachiningEstimator._passes(job.allowance, max_depth)
+                width_passes = MachiningEstimator._passes(job.width, max_width)
+                # Путь слоя: проходы по ширине с врезанием и выходом на диаметр фрезы
+                path = passes * width_passes * (job.length + tool_diameter)
+                cut_time = path / feed_rate if feed_rate > 0 else math.inf
+                edges, tools, batch_time = _usage(job.batch, cut_time, tool_life, EDGES_PER_TOOL["milling"])
+                rows[index] = (passes, job.allowance / passes, speed, feed_rate, rpm, cut_time, tool_life, edges,
+                               tools, batch_time, compatible, width_passes)
+        return _columns(_COLUMNS + ("width_passes",), rows)
+
+    @staticmethod
+    def _row(columns: Dict[str, List], job: NamedTuple) -> Dict:
+        result = {name: values[0] for name, values in columns.items()}
+        result.update(material=job.material.name, tool=job.tool.name, operation=job.operation, batch=job.batch)
+        return result
+
+    @staticmethod
+    def estimate_turning(material: Material, tool: CuttingTool, operation: str, diameter: float,
+                         length: float, allowance: float, batch: int) -> Dict:
+        """Оценка одной токарной работы (значения совпадают с turning_batch)"""
+        job = TurningJob(material, tool, operation, diameter, length, allowance, batch)
+        return MachiningEstimator._row(MachiningEstimator.turning_batch([job]), job)
+
+    @staticmethod
+    def estimate_milling(material: Material, tool: CuttingTool, operation: str, length: float, width: float,
+                         allowance: float, batch: int, teeth: int = DEFAULT_TEETH) -> Dict:
+        """Оценка одной фрезерной работы (значения совпадают с milling_batch)"""
+        job = MillingJob(material, tool, operation, length, width, allowance, batch, teeth)
+        return MachiningEstimator._row(MachiningEstimator.milling_batch([job]), job)
+
+    @staticmethod
+    def totals(columns: Dict[str, List], jobs: Iterable[NamedTuple]) -> Dict:
+        """Итог по списку работ: машинное время (мин) и расход инструмента по его названию"""
+        tools: Dict[str, int] = {}
+        for job, count in zip(jobs, columns["tools"]):
+            tools[job.tool.name] = tools.get(job.tool.name, 0) + count
+        return {"batch_time": sum(columns["batch_time"]), "tools": tools}
+
@@ -0,0 +1,705 @@
+"""
+Проверка управляющих программ (G-код) по рассчитанным режимам.
+
+Запрограммированные S и F сравниваются с рекомендуемыми скоростью и подачей
+(таблицы коэффициентов TurningCalculator/MillingCalculator) для выбранных
+материала, инструмента и операции с учетом модального состояния:
+G94/G95 (подача в минуту / на оборот), G96/G97 (постоянная скорость резания /
+обороты), G50/G92 S (ограничение оборотов), G20/G21, смены инструмента (T).
+
+Программа читается потоком из mmap или байтов:
+- проверка режимов без времени цикла: поиск слов S, F, T и G9x средствами
+  bytes.find и разбор только кадров с ними (кадры перемещений пропускаются,
+  последний X перед кадром - bytes.rfind);
+- с временем цикла: разбор всех кадров частями программы. Кадры только
+  с перемещениями (N, G0-G3, X, Y, Z, I, J, K, R) разбираются столбцами:
+  адреса и числа - bytes.translate и split, координаты - срезы и map
+  по всем кадрам участка, без цикла Python по кадрам; остальные кадры
+  (режимы, M-коды, комментарии) - по одному. Дуги G2/G3 - по радиусу
+  и хорде, минутная подача - по модальному состоянию.
+Программы в абсолютных координатах (G90); для точения X - диаметр.
+
+Запуск из корня проекта:
+    python -m calculations.gcode_check program.nc turning "Сталь 45" "Резец проходной Т5К10" "Наружное точение"
+"""
+import io
+import math
+import mmap
+import re
+import time
+from itertools import accumulate, chain, compress, repeat
+from operator import gt, mul, not_, sub
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from database.materials_lib import Material
+from database.tools_lib import CuttingTool
+from calculations.milling_calc import MILLING_COEFFICIENTS
+from calculations.turning_calc import TURNING_COEFFICIENTS
+
+# Допустимое отклонение от рекомендуемых скорости и подачи, доля
+TOLERANCE = 0.25
+# Сколько замечаний сохраняется в отчете (остальные только считаются)
+MAX_ISSUES = 50
+# Ускоренное перемещение G0, мм/мин, и время смены инструмента, с
+RAPID_FEED = 10000
+TOOL_CHANGE_SECONDS = 6
+# Обороты шпинделя при G96 без ограничения G50 и у оси (X=0)
+DEFAULT_MAX_RPM = 4000
+DEFAULT_TEETH = 4
+INCH = 25.4
+# Часть программы, разбираемая за раз (при проверке с временем цикла), байт
+CHUNK = 1 << 20
+
+_WORD = re.compile(rb"([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+_COMMENT = re.compile(rb"\([^)]*\)|;.*")
+# Слова, меняющие проверяемое состояние: по ним ищутся кадры при проверке без времени цикла
+_EVENTS = tuple(word for upper in (b"S", b"F", b"T", b"G9", b"G20", b"G21", b"G50")
+                for word in (upper, upper.lower()))
+# Кадры перемещения считаются столбцами: адреса слов, числа, пробелы
+_MOTION_LETTERS = b"NGXYZIJKR"
+_MOTION_BYTES = _MOTION_LETTERS + _MOTION_LETTERS.lower() + b"0123456789.+- \t\r\n"
+_NUMERIC = b"0123456789.+- \t\r"
+_TO_UPPER = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_LETTERS_TO_SPACES = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ", b" " * 52)
+# Для адреса: маска его слов в строке адресов (1 - слово адреса) и остальные адреса
+_MASKS = {letter: bytes(int(char == letter) for char in range(256)) for letter in _MOTION_LETTERS}
+_OTHER_LETTERS = {letter: _MOTION_LETTERS.replace(bytes((letter,)), b"") for letter in _MOTION_LETTERS}
+_LETTERS = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+# Буквы адресов (слово кадра - (код буквы, значение))
+_F, _G, _I, _J, _K, _N, _R, _S, _T, _X, _Y, _Z = b"FGIJKNRSTXYZ"
+
+Word = Tuple[int, float]
+
+
+class RegimeBounds(NamedTuple):
+    """Рекомендуемый режим и допуск для проверки программы"""
+    process_type: str
+    speed: float  # м/мин
+    feed: float  # мм/об (точение) или мм/зуб (фрезерование)
+    tool_diameter: Optional[float] = None  # фреза, мм
+    teeth: int = DEFAULT_TEETH
+    tolerance: float = TOLERANCE
+
+    @staticmethod
+    def for_regime(process_type: str, material: Material, tool: CuttingTool, operation: str,
+                   teeth: int = DEFAULT_TEETH, tolerance: float = TOLERANCE) -> "RegimeBounds":
+        """Границы по предрасчитанным коэффициентам режимов"""
+        coefficients = TURNING_COEFFICIENTS if process_type == "turning" else MILLING_COEFFICIENTS
+        speed, feed = coefficients.lookup(material, tool, operation)
+        diameter = tool.diameter if process_type == "milling" else None
+        return RegimeBounds(process_type, speed, feed, diameter, teeth, tolerance)
+
+    def deviation(self, value: float, recommended: float) -> Optional[float]:
+        """Отклонение от рекомендуемого значения (доля) или None - в допуске"""
+        share = value / recommended - 1 if recommended else 0.0
+        return share if abs(share) > self.tolerance else None
+
+
+class Issue(NamedTuple):
+    line: int  # номер строки программы
+    tool: Optional[str]
+    text: str  # кадр
+    message: str
+
+
+class ProgramReport:
+    """Итог проверки: кадры, замечания, время цикла"""
+
+    def __init__(self, bounds: RegimeBounds, source: str):
+        self.bounds = bounds
+        self.source = source
+        self.blocks = 0
+        self.speed_checked = 0
+        self.feed_checked = 0
+        self.unchecked = 0  # S/F, которые не пересчитать в режим (неизвестен диаметр или обороты)
+        self.out_of_range = 0  # кадров с замечаниями
+        self.issues: List[Issue] = []
+        self.tools: List[str] = []
+        self.cutting_minutes: Optional[float] = None  # None - время цикла не считалось
+        self.rapid_minutes = 0.0
+        self.seconds = 0.0
+
+    def issue(self, line: int, tool: Optional[str], text: bytes, message: str) -> None:
+        if len(self.issues) < MAX_ISSUES:
+            self.issues.append(Issue(line, tool, text.decode("ascii", "replace").strip()[:60], message))
+
+    @property
+    def cycle_minutes(self) -> Optional[float]:
+        if self.cutting_minutes is None:
+            return None
+        return self.cutting_minutes + self.rapid_minutes + len(self.tools) * TOOL_CHANGE_SECONDS / 60
+
+    @property
+    def throughput(self) -> float:
+        """Кадров в секунду"""
+        return self.blocks / self.seconds if self.seconds else 0.0
+
+    def format(self, limit: int = 15) -> str:
+        bounds = self.bounds
+        feed_unit = "мм/об" if bounds.process_type == "turning" else "мм/зуб"
+        lines = [
+            f"📋 Проверка программы {self.source}",
+            f"Рекомендуется: V={bounds.speed:.0f} м/мин, f={bounds.feed:.3f} {feed_unit} (±{bounds.tolerance:.0%})",
+            f"Кадров: {self.blocks}, проверено S: {self.speed_checked}, F: {self.feed_checked}"
+            + (f", не проверено: {self.unchecked}" if self.unchecked else ""),
+        ]
+        if self.tools:
+            lines.append(f"Инструменты: {', '.join(dict.fromkeys(self.tools))} (смен: {len(self.tools)})")
+        if self.out_of_range:
+            lines.append(f"\n⚠️ Вне допуска: {self.out_of_range} кадров")
+            for issue in self.issues[:limit]:
+                tool = f" {issue.tool}" if issue.tool else ""
+                lines.append(f"• стр. {issue.line}{tool}: {issue.text} → {issue.message}")
+            if self.out_of_range > limit:
+                lines.append(f"... и еще {self.out_of_range - min(limit, len(self.issues))}")
+        else:
+            lines.append("\n✅ Все S и F в допуске")
+        if self.cycle_minutes is not None:
+            total = self.cycle_minutes
+            lines.append(f"\n⏱ Время цикла ≈ {int(total // 60)} ч {total % 60:.1f} мин "
+                         f"(резание {self.cutting_minutes:.1f}, холостые {self.rapid_minutes:.1f} мин)")
+        return "\n".join(lines)
+
+
+class _Checker:
+    """Модальное состояние программы и проверка кадров с S/F"""
+
+    def __init__(self, bounds: RegimeBounds, report: ProgramReport):
+        self.bounds = bounds
+        self.report = report
+        self.turning = bounds.process_type == "turning"
+        self.feed_mode = 95 if self.turning else 94
+        self.spindle_mode = 97
+        self.speed: Optional[float] = None  # S: м/мин при G96, об/мин при G97
+        self.feed: Optional[float] = None  # F в мм (после пересчета дюймов)
+        self.rpm_limit: float = DEFAULT_MAX_RPM
+        self.tool: Optional[str] = None
+        self.x: Optional[float] = None
+        self.scale = 1.0
+
+    def rpm(self) -> Optional[float]:
+        """Текущие обороты (при G96 - на текущем диаметре с ограничением G50)"""
+        if self.speed is None:
+            return None
+        if self.spindle_mode == 97:
+            return self.speed
+        if not self.x:
+            return self.rpm_limit
+        return min(1000 * self.speed / (math.pi * abs(self.x)), self.rpm_limit)
+
+    def cutting_speed(self) -> Optional[float]:
+        if self.spindle_mode == 96:
+            return self.speed
+        diameter = self.bounds.tool_diameter if not self.turning else (abs(self.x) if self.x else None)
+        return math.pi * diameter * self.speed / 1000 if diameter else None
+
+    def feed_per_unit(self) -> Optional[float]:
+        """Подача на оборот (точение) или на зуб (фрезерование)"""
+        per_rev = self.feed
+        if self.feed_mode == 94:
+            rpm = self.rpm()
+            per_rev = self.feed / rpm if rpm else None
+        if per_rev is None or self.turning:
+            return per_rev
+        return per_rev / self.bounds.teeth
+
+    def block(self, line: int, words: List[Word], text: bytes) -> None:
+        """Кадр со словами S/F/T/G: обновление модального состояния и проверка"""
+        speed = feed = None
+        limit = False
+        for letter, value in words:
+            if letter == _G:
+                if value in (94, 95):
+                    self.feed_mode = int(value)
+                elif value in (96, 97):
+                    self.spindle_mode = int(value)
+                elif value == 50 or value == 92:
+                    limit = True
+                elif value == 20:
+                    self.scale = INCH
+                elif value == 21:
+                    self.scale = 1.0
+            elif letter == _S:
+                speed = value
+            elif letter == _F:
+                feed = value
+            elif letter == _T:
+                # T0101 (точение: инструмент и корректор) или T1
+                self.tool = f"T{int(value):04d}" if self.turning else f"T{int(value)}"
+                self.report.tools.append(self.tool)
+            elif letter == _X:
+                self.x = value * self.scale
+        if speed is not None and limit:
+            # G50 S / G92 S - ограничение оборотов, а не скорость
+            self.rpm_limit = speed
+            speed = None
+        if speed is not None:
+            self.speed = speed
+        if feed is not None:
+            self.feed = feed * self.scale
+
+        messages = []
+        bounds, report = self.bounds, self.report
+        if speed is not None:
+            value = self.cutting_speed()
+            if value is None:
+                report.unchecked += 1
+            else:
+                report.speed_checked += 1
+                share = bounds.deviation(value, bounds.speed)
+                if share is not None:
+                    messages.append(f"V={value:.0f} м/мин ({share:+.0%})")
+        if feed is not None:
+            value = self.feed_per_unit()
+            if value is None:
+                report.unchecked += 1
+            else:
+                report.feed_checked += 1
+                share = bounds.deviation(value, bounds.feed)
+                if share is not None:
+                    unit = "мм/об" if self.turning else "мм/зуб"
+                    messages.append(f"f={value:.3f} {unit} ({share:+.0%})")
+        if messages:
+            report.out_of_range += 1
+            report.issue(line, self.tool, text, ", ".join(messages))
+
+
+def _words(text: bytes) -> List[Word]:
+    """Слова кадра без комментариев"""
+    if b"(" in text or b";" in text:
+        text = _COMMENT.sub(b"", text)
+    text = text.upper()
+    try:
+        # Слова через пробел (вывод CAM-систем): без регулярного выражения
+        return [(word[0], float(word[1:])) for word in text.split()]
+    except ValueError:
+        # Слитная запись (G1X10.Z-5.), пробел после буквы, номер программы и т.п.
+        return [(letter[0], float(value)) for letter, value in _WORD.findall(text)]
+
+
+def _event_lines(buffer) -> Iterator[int]:
+    """Начала строк со словами из _EVENTS по возрастанию"""
+    starts = set()
+    for word in _EVENTS:
+        position = buffer.find(word)
+        while position >= 0:
+            end = position + len(word)
+            # Отдельное слово, а не часть текста (MSG, SFM в комментариях)
+            if (end == len(buffer) or buffer[end] not in _LETTERS) and \
+                    (position == 0 or buffer[position - 1] not in _LETTERS):
+                starts.add(buffer.rfind(b"\n", 0, position) + 1)
+            position = buffer.find(word, end)
+    return iter(sorted(starts))
+
+
+def _last_x(buffer, end: int) -> Optional[float]:
+    """Последний X до позиции end (для G96/G97 при точении)"""
+    while end > 0:
+        # Строчная x ищется только после последней заглавной: без просмотра всего файла
+        position = buffer.rfind(b"X", 0, end)
+        position = max(position, buffer.rfind(b"x", position + 1, end))
+        if position < 0:
+            return None
+        match = _WORD.match(buffer[position:position + 32].upper())
+        if match is not None:
+            return float(match.group(2))
+        end = position
+    return None
+
+
+def _check_regimes(buffer, checker: _Checker, report: ProgramReport) -> None:
+    """Проверка без времени цикла: разбираются только кадры со словами S, F, T, G9x"""
+    size = len(buffer)
+    line, counted = 1, 0
+    for start in _event_lines(buffer):
+        end = buffer.find(b"\n", start)
+        end = size if end < 0 else end
+        # У mmap нет count: строки считаются по срезам между кадрами (файл копируется по частям один раз)
+        line += buffer[counted:start].count(b"\n")
+        counted = start
+        text = buffer[start:end]
+        words = _words(text)
+        if not words:
+            continue
+        if checker.turning:
+            # Диаметр до кадра; X в самом кадре учитывает _Checker.block
+            checker.x = _last_x(buffer, start)
+            if checker.x is not None:
+                checker.x *= checker.scale
+        checker.block(line, words, text)
+    newlines = line - 1 + buffer[counted:].count(b"\n")
+    report.blocks = newlines + (1 if size and buffer[size - 1] != 0x0A else 0)
+
+
+def _feed_rate(checker: _Checker) -> Tuple[Optional[float], float]:
+    """
+    Минутная подача до следующего кадра с S/F/G: (постоянная мм/мин или None, множитель по диаметру).
+    При G95 и G96 (точение) минутная подача зависит от диаметра: F·1000·S / (π·X), не выше F·G50 S
+    """
+    if not checker.feed:
+        return 0.0, 0.0
+    if checker.feed_mode == 94:
+        return checker.feed, 0.0
+    if checker.spindle_mode == 97:
+        return checker.feed * (checker.speed or 0.0), 0.0
+    return None, checker.feed * 1000 * (checker.speed or 0.0) / math.pi
+
+
+def _other_lines(chunk: bytes) -> List[int]:
+    """Начала строк с символами вне кадров перемещения (слова режима, M-коды, комментарии)"""
+    starts = set()
+    for char in set(chunk.translate(None, _MOTION_BYTES)):
+        char = bytes((char,))
+        position = chunk.find(char)
+        while position >= 0:
+            starts.add(chunk.rfind(b"\n", 0, position) + 1)
+            # Следующее вхождение - со следующей строки (chunk заканчивается переводом строки)
+            position = chunk.find(char, chunk.find(b"\n", position))
+    return sorted(starts)
+
+
+class _Column(NamedTuple):
+    """Слова одного адреса в кадрах перемещения"""
+    values: list  # значения слов по порядку
+    counts: Optional[List[int]]  # слов в каждой строке; None - ровно одно в каждой
+
+
+def _column(skeleton: bytes, letters: bytes, tokens: List[bytes], letter: int, convert: Callable,
+            layout: Optional[bytes]) -> Optional[_Column]:
+    """
+    Значения адреса letter (None - адреса нет ни в одной строке)
+    :param layout: адреса строки, если все строки записаны одинаково (вывод CAM)
+    :raises ValueError: значение не число
+    """
+    if layout is not None and layout.count(letter) == 1:
+        # Одинаковые строки: слова адреса - каждое len(layout)-е значение
+        words = tokens[layout.find(letter)::len(layout)]
+        if words.count(words[0]) == len(words):
+            # Одно значение во всех строках (G1 в каждом кадре) преобразуется один раз
+            return _Column([convert(words[0])] * len(words), None)
+        return _Column(list(map(convert, words)), None)
+    total = letters.count(letter)
+    if not total:
+        return None
+    values = list(map(convert, compress(tokens, letters.translate(_MASKS[letter]))))
+    words = skeleton.translate(None, _OTHER_LETTERS[letter])
+    counts = None
+    if total != skeleton.count(b"\n") or bytes((letter, letter)) in words:
+        counts = list(map(len, words.split(b"\n")))
+        counts.pop()  # после последнего перевода строки
+    return _Column(values, counts)
+
+
+def _modal(column: Optional[_Column], current) -> Optional[list]:
+    """Значения по строкам с переносом модального значения; None - адрес не задан ни в одной строке"""
+    if column is None:
+        return None
+    if column.counts is None:
+        return column.values
+    # Номер последнего слова до строки включительно; до первого слова - текущее значение
+    return list(map([current, *column.values].__getitem__, accumulate(column.counts)))
+
+
+def _radius(words: List[Word], scale: float) -> Optional[float]:
+    radius = None
+    for letter, value in words:
+        if letter == _I or letter == _J or letter == _K:
+            radius = math.hypot(radius or 0.0, value * scale)
+        elif letter == _R:
+            radius = abs(value) * scale
+    return radius
+
+
+def _arc(chord: float, radius: float) -> float:
+    """Длина дуги по хорде и радиусу; нулевая хорда - полная окружность"""
+    chord = min(chord, 2 * radius)
+    return 2 * math.pi * radius if chord == 0 else 2 * radius * math.asin(chord / (2 * radius))
+
+
+class _Cycle:
+    """Положение, модальное перемещение (G0-G3) и накопленное время цикла"""
+
+    def __init__(self, checker: _Checker):
+        self.checker = checker
+        self.turning = checker.turning
+        self.motion = 0
+        self.x = self.y = self.z = 0.0
+        self.cutting = self.rapid = 0.0
+        self.modes()
+
+    def modes(self) -> None:
+        """Масштаб и минутная подача после кадра, изменившего модальное состояние"""
+        self.scale = self.checker.scale
+        self.feed_rate, self.css_rate = _feed_rate(self.checker)
+
+    def cut(self, distance: float, diameter: float) -> float:
+        """Время рабочего перемещения, мин"""
+        rate = self.feed_rate
+        if rate is None:
+            # Постоянная скорость резания: обороты на диаметре конца перемещения, не выше G50
+            limit = self.checker.feed * self.checker.rpm_limit
+            rate = self.css_rate / diameter if diameter and self.css_rate / diameter < limit else limit
+        return distance / rate if rate else 0.0
+
+    def block(self, line: int, text: bytes) -> None:
+        """Кадр в произвольной записи (слова режима, комментарии, нестандартная запись)"""
+        words = _words(text)
+        if not words:
+            return
+        scale = self.scale
+        nx, ny, nz = self.x, self.y, self.z
+        events = False
+        for letter, value in words:
+            if letter == _X:
+                nx = value * scale
+            elif letter == _Z:
+                nz = value * scale
+            elif letter == _Y:
+                ny = value * scale
+            elif letter == _G:
+                if value < 4 and value == int(value):
+                    self.motion = int(value)
+                else:
+                    events = True
+            elif letter == _S or letter == _F or letter == _T:
+                events = True
+        if events:
+            self.checker.x = self.x if self.turning else None
+            self.checker.block(line, words, text)
+            self.modes()
+        # Для точения X - диаметр: радиальное перемещение - половина
+        dx = (nx - self.x) / 2 if self.turning else nx - self.x
+        dy, dz = ny - self.y, nz - self.z
+        distance = math.sqrt(dx * dx + dy * dy + dz * dz)
+        if self.motion > 1:
+            radius = _radius(words, scale)
+            if radius:
+                distance = _arc(distance, radius)
+        if distance:
+            if self.motion == 0:
+                self.rapid += distance / RAPID_FEED
+            else:
+                self.cutting += self.cut(distance, abs(nx))
+        self.x, self.y, self.z = nx, ny, nz
+
+    def blocks(self, text: bytes, line: int) -> int:
+        """Кадры text (целые строки) по одному; возвращает число строк"""
+        lines = text.split(b"\n")
+        lines.pop()
+        for index, block in enumerate(lines, line + 1):
+            self.block(index, block)
+        return len(lines)
+
+    def moves(self, text: bytes, line: int) -> int:
+        """
+        Кадры text (целые строки) только со словами N, G, X, Y, Z, I, J, K, R:
+        путь и время считаются столбцами значений слов, без цикла Python по кадрам.
+        Кадры с другими G (G17, G90...) или повтором адреса - по одному.
+        :param line: номер строки перед первым кадром
+        :return: число строк
+        """
+        skeleton = text.translate(_TO_UPPER, _NUMERIC)  # адреса слов по строкам
+        letters = skeleton.replace(b"\n", b"")
+        tokens = text.translate(_LETTERS_TO_SPACES).split()
+        if len(tokens) != len(letters):
+            # Адрес без значения или число без адреса
+            return self.blocks(text, line)
+        lines = skeleton.count(b"\n")
+        layout = skeleton[:skeleton.find(b"\n")]
+        if not layout or skeleton != (layout + b"\n") * lines:
+            layout = None
+        try:
+            columns = {letter: _column(skeleton, letters, tokens, letter, int if letter == _G else float, layout)
+                       for letter in b"GXYZIJKR"}
+        except ValueError:
+            return self.blocks(text, line)
+
+        irregular = set()
+        for column in columns.values():
+            if column is not None and column.counts is not None and max(column.counts) > 1:
+                irregular.update(compress(range(lines), map(gt, column.counts, repeat(1))))
+        motions = columns[_G]
+        if motions is not None and (min(motions.values) < 0 or max(motions.values) > 3):
+            where = range(lines) if motions.counts is None else compress(range(lines), motions.counts)
+            irregular.update(index for index, value in zip(where, motions.values) if not 0 <= value <= 3)
+        if irregular:
+            # Разбивка на участки без таких кадров
+            blocks = text.split(b"\n")
+            start = 0
+            for index in sorted(irregular):
+                if index > start:
+                    self.moves(b"\n".join(blocks[start:index]) + b"\n", line + start)
+                self.block(line + index + 1, blocks[index])
+                start = index + 1
+            if start < lines:
+                self.moves(b"\n".join(blocks[start:lines]) + b"\n", line + start)
+            return lines
+
+        scale = self.scale
+        if scale != 1.0:
+            for letter in b"XYZ":
+                column = columns[letter]
+                if column is not None:
+                    columns[letter] = column._replace(values=list(map(mul, column.values, repeat(scale))))
+        x, y, z = (_modal(columns[letter], current) for letter, current in zip(b"XYZ", (self.x, self.y, self.z)))
+        motion = _modal(motions, self.motion)
+        if motion is not None and motion.count(motion[0]) == lines:
+            # Одно перемещение во всех кадрах (G1 в каждой строке)
+            self.motion, motion = motion[0], None
+
+        # Для точения X - диаметр: радиальная координата - половина
+        radial = x if x is None or not self.turning else list(map(mul, x, repeat(0.5)))
+        axes = [(values, first) for values, first in ((radial, self.x / 2 if self.turning else self.x),
+                                                       (y, self.y), (z, self.z)) if values is not None]
+        if not axes:
+            distances = [0.0] * lines
+        else:
+            distances = list(map(math.hypot, *(map(sub, values, chain((first,), values)) for values, first in axes)))
+        self._arcs(columns, skeleton, motion, distances)
+
+        diameters = repeat(abs(self.x)) if x is None else map(abs, x)
+        if motion is None:
+            if self.motion == 0:
+                self.rapid += sum(distances) / RAPID_FEED
+            else:
+                self.cutting += self._cut(distances, diameters)
+        else:
+            moving = list(map(bool, motion))
+            self.rapid += sum(compress(distances, map(not_, moving))) / RAPID_FEED
+            self.cutting += self._cut(list(compress(distances, moving)), compress(diameters, moving))
+            self.motion = motion[-1]
+        if x is not None:
+            self.x = x[-1]
+        if y is not None:
+            self.y = y[-1]
+        if z is not None:
+            self.z = z[-1]
+        return lines
+
+    def _arcs(self, columns, skeleton: bytes, motion: Optional[list], distances: List[float]) -> None:
+        """Дуги G2/G3: расстояние по хорде и радиусу (R или I, J, K)"""
+        arcs = {letter: columns[letter] for letter in b"IJKR" if columns[letter] is not None}
+        if not arcs or (motion is None and self.motion < 2):
+            return
+        scale = self.scale
+        lines = len(distances)
+        if len(arcs) == 1 and _R in arcs:
+            column = arcs[_R]
+            where = range(lines) if column.counts is None else compress(range(lines), column.counts)
+            for index, value in zip(where, column.values):
+                if (self.motion if motion is None else motion[index]) > 1 and value:
+                    distances[index] = _arc(distances[index], abs(value) * scale)
+            return
+        # I, J, K (и R): радиус по словам строки в порядке записи
+        values = {letter: iter(column.values) for letter, column in arcs.items()}
+        where = set()
+        for column in arcs.values():
+            where.update(range(lines) if column.counts is None else compress(range(lines), column.counts))
+        blocks = skeleton.split(b"\n")
+        for index in sorted(where):
+            words = [(letter, next(values[letter])) for letter in blocks[index] if letter in values]
+            if (self.motion if motion is None else motion[index]) > 1:
+                radius = _radius(words, scale)
+                if radius:
+                    distances[index] = _arc(distances[index], radius)
+
+    def _cut(self, distances: List[float], diameters: Iterable[float]) -> float:
+        """Время рабочих перемещений, мин"""
+        rate = self.feed_rate
+        if rate is not None:
+            return sum(distances) / rate if rate else 0.0
+        limit = self.checker.feed * self.checker.rpm_limit
+        if self.css_rate > 0 and limit > 0:
+            # Подача min(css / D, limit): время d / подача = d · max(D, css / limit) / css
+            least = self.css_rate / limit
+            return sum([distance * (diameter if diameter > least else least)
+                        for distance, diameter in zip(distances, diameters)]) / self.css_rate
+        return sum(map(self.cut, distances, diameters))
+
+
+def _check_with_time(buffer, checker: _Checker, report: ProgramReport) -> None:
+    """
+    Разбор всех кадров: проверка режимов и время цикла.
+    Программа разбирается частями по CHUNK байт: кадры перемещений между
+    кадрами с другими словами считаются столбцами (_Cycle.moves),
+    остальные кадры - по одному (_Cycle.block)
+    """
+    cycle = _Cycle(checker)
+    size = len(buffer)
+    start = line = 0
+    while start < size:
+        end = buffer.find(b"\n", min(start + CHUNK, size - 1))
+        end = size if end < 0 else end
+        chunk = buffer[start:end] + b"\n"
+        position = 0
+        for first in _other_lines(chunk):
+            if first > position:
+                line += cycle.moves(chunk[position:first], line)
+            position = chunk.find(b"\n", first)
+            line += 1
+            cycle.block(line, chunk[first:position])
+            position += 1
+        if position < len(chunk):
+            line += cycle.moves(chunk[position:], line)
+        start = end + 1
+    report.blocks = line
+    report.cutting_minutes = cycle.cutting
+    report.rapid_minutes = cycle.rapid
+
+
+def check_program(buffer, bounds: RegimeBounds, source: str = "программы",
+                  cycle_time: bool = True) -> ProgramReport:
+    """
+    Проверка программы (bytes или mmap)
+    :param cycle_time: считать время цикла (разбор всех кадров); без него - только кадры с S/F/T/G9x
+    """
+    report = ProgramReport(bounds, source)
+    checker = _Checker(bounds, report)
+    start = time.perf_counter()
+    if cycle_time:
+        _check_with_time(buffer, checker, report)
+    else:
+        _check_regimes(buffer, checker, report)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def check_opened(file, bounds: RegimeBounds, source: str = "программы", cycle_time: bool = True) -> ProgramReport:
+    """Проверка открытого файла программы через mmap (без чтения в память целиком)"""
+    if not file.seek(0, io.SEEK_END):
+        return check_program(b"", bounds, source, cycle_time)
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        return check_program(buffer, bounds, source, cycle_time)
+
+
+def check_file(path: str, bounds: RegimeBounds, cycle_time: bool = True) -> ProgramReport:
+    """Проверка файла программы через mmap"""
+    with open(path, "rb") as file:
+        return check_opened(file, bounds, path, cycle_time)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database.materials_lib import MATERIALS
+    from database.tools_lib import MILLING_TOOLS, TURNING_TOOLS
+
+    parser = argparse.ArgumentParser(description="Проверка S и F управляющей программы по рекомендуемым режимам")
+    parser.add_argument("path")
+    parser.add_argument("process_type", choices=("turning", "milling"))
+    parser.add_argument("material")
+    parser.add_argument("tool")
+    parser.add_argument("operation")
+    parser.add_argument("--teeth", type=int, default=DEFAULT_TEETH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--no-time", action="store_true", help="только проверка режимов, без времени цикла")
+    args = parser.parse_args()
+
+    tools = TURNING_TOOLS if args.process_type == "turning" else MILLING_TOOLS
+    if args.material not in MATERIALS or args.tool not in tools:
+        parser.exit(1, "Неизвестный материал или инструмент\n")
+    regime = RegimeBounds.for_regime(args.process_type, MATERIALS[args.material], tools[args.tool],
+                                     args.operation, args.teeth, args.tolerance)
+    result = check_file(args.path, regime, not args.no_time)
+    print(result.format(limit=MAX_ISSUES))
+    print(f"\n{result.blocks} кадров за {result.seconds * 1000:.0f} мс ({result.throughput:,.0f} кадров/с)")
@@ -1,51 +1,107 @@
+from itertools import repeat
+from operator import gt, mul
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from calculations.coefficients import CoefficientTable
+from calculations.columns import encode, expand, grid_codes, rounded, rpm_values
+from database.tools_lib import MILLING_TOOLS, OPERATIONS
+
+
 class MillingCalculator:
+    # Коэффициенты скорости резания для разных операций
+    SPEED_OPERATION_FACTORS = {
+        "Торцевое фрезерование": 1.0,
+        "Контурное фрезерование": 0.9,
+        "Черновое фрезерование": 1.1,
+        "Чистовое фрезерование": 0.8,
+        "Спиральное фрезерование": 0.7,
+    }
+    # Базовые подачи на зуб в мм/зуб
+    BASE_FEEDS = {
+        "Торцевое фрезерование": 0.1,
+        "Контурное фрезерование": 0.08,
+        "Черновое фрезерование": 0.15,
+        "Чистовое фрезерование": 0.05,
+        "Спиральное фрезерование": 0.07,
+    }
+    # Корректировка по материалу инструмента
+    SPEED_TOOL_FACTORS = {"Твердый сплав": 1.3, "Быстрорежущая сталь": 0.7}
+    FEED_TOOL_FACTORS = {"Твердый сплав": 1.2, "Быстрорежущая сталь": 0.8}
+
+    # Базовые коэффициенты спирального фрезерования для разных материалов
+    HELICAL_COEFFICIENTS = {
+        "Алюминий": {"step_over": 0.4, "plunge_factor": 0.3, "helix_angle": 30},
+        "Сталь": {"step_over": 0.25, "plunge_factor": 0.2, "helix_angle": 15},
+        "Нержавеющая сталь": {"step_over": 0.2, "plunge_factor": 0.15, "helix_angle": 10},
+        "Титан": {"step_over": 0.15, "plunge_factor": 0.1, "helix_angle": 7}
+    }
+    # Группы каталога (Material.group) с коэффициентами под другим названием;
+    # остальные группы ищутся по своему названию, неизвестные - как "Сталь"
+    HELICAL_GROUPS = {"Конструкционная сталь": "Сталь", "Легированная сталь": "Сталь"}
+    # Тип фрезы (tool_type в calculate_helical_milling) по слову названия инструмента:
+    # CuttingTool.tool_type каталога - вид обработки ("milling"), а не тип фрезы
+    MILL_TYPES = {"торцевая": "Торцевая фреза", "концевая": "Концевая фреза", "червячная": "Червячная фреза"}
+
     @staticmethod
-    def calculate_cutting_speed(material, tool, operation_type):
-        # Базовые скорости резания в м/мин
-        base_speeds = {
-            "Торцевое фрезерование": 1.0,
-            "Контурное фрезерование": 0.9,
-            "Черновое фрезерование": 1.1,
-            "Чистовое фрезерование": 0.8,
-            "Спиральное фрезерование": 0.7,
+    def calculate(material, tool, operation: str, diameter: float, teeth: int,
+                  cutting_depth: Optional[float] = None) -> Dict[str, Union[float, int, str]]:
+        """
+        Основной метод расчета параметров фрезерования
+        Скорость, подача на зуб, обороты, минутная подача и, если задана глубина резания,
+        параметры спирального фрезерования - за один проход.
+        Значения - как у calculate_* и calculate_helical_milling (тип фрезы - mill_type),
+        округленные как в TurningCalculator: скорость до 0.1, подача на зуб до 0.001,
+        обороты до целых, минутная подача до 0.1
+        """
+        # Скорость и подача на зуб берутся из предрасчитанной таблицы, обороты - из LRU-кэша
+        cutting_speed, feed_per_tooth = MILLING_COEFFICIENTS.lookup(material, tool, operation)
+        rpm = MILLING_COEFFICIENTS.rpm(cutting_speed, diameter)
+
+        result = {
+            "operation": operation,
+            "speed": cutting_speed,
+            "feed_per_tooth": feed_per_tooth,
+            "rpm": rpm,
+            "feed_rate": round(MillingCalculator.calculate_feed_rate(feed_per_tooth, teeth, rpm), 1),
+            "material": material.name,
+            "tool": tool.name,
+            "diameter": diameter,
+            "teeth": teeth,
         }
-        
+
+        if cutting_depth is not None:
+            coeff = MillingCalculator._helical_coefficients(material.group)
+            step_over, plunge_rate = MillingCalculator._helical_step(
+                diameter, cutting_depth, coeff, MillingCalculator._plunge_factor(MillingCalculator.mill_type(tool)))
+            result.update({
+                "cutting_depth": cutting_depth,
+                "step_over": step_over,
+                "plunge_rate": plunge_rate,
+                "helix_angle": coeff["helix_angle"],
+            })
+        return result
+
+    @staticmethod
+    def calculate_cutting_speed(material, tool, operation_type):
         material_speed = material.recommended_speed
         if isinstance(material_speed, tuple):
             material_speed = sum(material_speed) / 2
             
-        tool_factor = 1.0
-        if tool.material == "Твердый сплав":
-            tool_factor = 1.3
-        elif tool.material == "Быстрорежущая сталь":
-            tool_factor = 0.7
+        tool_factor = MillingCalculator.SPEED_TOOL_FACTORS.get(tool.material, 1.0)
             
-        operation_factor = base_speeds.get(operation_type, 1.0)
+        operation_factor = MillingCalculator.SPEED_OPERATION_FACTORS.get(operation_type, 1.0)
         
         return material_speed * tool_factor * operation_factor
 
     @staticmethod
     def calculate_feed_per_tooth(material, tool, operation_type):
-        # Базовые подачи на зуб в мм/зуб
-        base_feeds = {
-            "Торцевое фрезерование": 0.1,
-            "Контурное фрезерование": 0.08,
-            "Черновое фрезерование": 0.15,
-            "Чистовое фрезерование": 0.05,
-            "Спиральное фрезерование": 0.07,
-        }
-        
         material_feed = material.recommended_feed
         if isinstance(material_feed, tuple):
             material_feed = sum(material_feed) / 2
             
-        tool_factor = 1.0
-        if tool.material == "Твердый сплав":
-            tool_factor = 1.2
-        elif tool.material == "Быстрорежущая сталь":
-            tool_factor = 0.8
+        tool_factor = MillingCalculator.FEED_TOOL_FACTORS.get(tool.material, 1.0)
             
-        operation_factor = base_feeds.get(operation_type, 1.0)
+        operation_factor = MillingCalculator.BASE_FEEDS.get(operation_type, 1.0)
         
         return material_feed * tool_factor * operation_factor
 
@@ -61,6 +117,22 @@ class MillingCalculator:
         """Расчет минутной подачи в мм/мин"""
         return feed_per_tooth * num_teeth * rpm
 
+    # Округленные значения для таблицы коэффициентов (calculate, calculate_batch)
+
+    @staticmethod
+    def _rounded_speed(material, tool, operation_type) -> float:
+        return round(MillingCalculator.calculate_cutting_speed(material, tool, operation_type), 1)
+
+    @staticmethod
+    def _rounded_feed_per_tooth(material, tool, operation_type) -> float:
+        return round(MillingCalculator.calculate_feed_per_tooth(material, tool, operation_type), 3)
+
+    @staticmethod
+    def _rounded_rpm(cutting_speed, diameter) -> int:
+        if diameter <= 0:
+            return 0
+        return round(MillingCalculator.calculate_rpm(cutting_speed, diameter))
+
     @staticmethod
     def calculate_helical_milling(
         tool_diameter: float,
@@ -73,44 +145,24 @@ class MillingCalculator:
         Расчет параметров спирального фрезерования
         :param tool_diameter: диаметр фрезы (мм)
         :param tool_type: тип фрезы (торцевая, концевая и т.д.)
-        :param material: обрабатываемый материал
+        :param material: обрабатываемый материал (ключ HELICAL_COEFFICIENTS или группа материала)
         :param cutting_depth: глубина резания (мм)
         :param operation: тип операции
         :return: словарь с параметрами
         """
-         # Базовые коэффициенты для разных материалов
-        MATERIAL_COEFFICIENTS = {
-            "Алюминий": {"step_over": 0.4, "plunge_factor": 0.3, "helix_angle": 30},
-            "Сталь": {"step_over": 0.25, "plunge_factor": 0.2, "helix_angle": 15},
-            "Нержавеющая сталь": {"step_over": 0.2, "plunge_factor": 0.15, "helix_angle": 10},
-            "Титан": {"step_over": 0.15, "plunge_factor": 0.1, "helix_angle": 7}
-        }
-
         # Определение коэффициентов по материалу
-        coeff = MATERIAL_COEFFICIENTS.get(material, MATERIAL_COEFFICIENTS["Сталь"])
+        coeff = MillingCalculator._helical_coefficients(material)
 
-        # Расчет основных параметров
-        step_over = tool_diameter * coeff["step_over"]  # Шаг между проходами
-        max_plunge = tool_diameter * coeff["plunge_factor"]  # Макс. вертикальная подача
-    
         # Рекомендуемый угол спирали (градусы)
         helix_angle = coeff["helix_angle"]
-    
-        # Расчет скорости подачи при спиральном врезании
-        if tool_type == "Торцевая фреза":
-            plunge_rate = max_plunge * 0.7  # Более агрессивная подача
-        else:
-            plunge_rate = max_plunge * 0.5  # Консервативная подача для концевых фрез
 
-        # Коррекция для глубокого резания
-        if cutting_depth > 3 * tool_diameter:
-            plunge_rate *= 0.7
-            step_over *= 0.8
+        step_over, plunge_rate = MillingCalculator._helical_step(
+            tool_diameter, cutting_depth, coeff, MillingCalculator._plunge_factor(tool_type))
 
         return {
             "operation": operation,
-            "step_over": round(step_over, 2),
-            "max_plunge_rate": round(plunge_rate, 2),
+            "step_over": step_over,
+            "max_plunge_rate": plunge_rate,
             "recommended_helix_angle": helix_angle,
             "tool_diameter": tool_diameter,
             "material": material,
@@ -119,4 +171,126 @@ class MillingCalculator:
                 "Используйте охлаждение СОЖ",
                 "Рекомендуется чистовой проход"
             ]
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def _helical_coefficients(material: str) -> dict:
+        """Коэффициенты спирального фрезерования по материалу или группе материала"""
+        coefficients = MillingCalculator.HELICAL_COEFFICIENTS
+        key = MillingCalculator.HELICAL_GROUPS.get(material, material)
+        return coefficients.get(key, coefficients["Сталь"])
+
+    @staticmethod
+    def mill_type(tool) -> str:
+        """Тип фрезы инструмента каталога по словам названия (MILL_TYPES); иначе tool.tool_type"""
+        for word in tool.name.lower().split():
+            mill_type = MillingCalculator.MILL_TYPES.get(word)
+            if mill_type is not None:
+                return mill_type
+        return tool.tool_type
+
+    @staticmethod
+    def _plunge_factor(tool_type: str) -> float:
+        """Доля максимальной вертикальной подачи при спиральном врезании"""
+        if tool_type == "Торцевая фреза":
+            return 0.7  # Более агрессивная подача
+        return 0.5  # Консервативная подача для концевых фрез
+
+    @staticmethod
+    def _helical_step(tool_diameter: float, cutting_depth: float,
+                      coeff: dict, plunge_factor: float) -> Tuple[float, float]:
+        """Шаг между проходами и скорость врезания для одной пары диаметр/глубина"""
+        # Расчет основных параметров
+        step_over = tool_diameter * coeff["step_over"]  # Шаг между проходами
+        max_plunge = tool_diameter * coeff["plunge_factor"]  # Макс. вертикальная подача
+        plunge_rate = max_plunge * plunge_factor
+
+        # Коррекция для глубокого резания
+        if cutting_depth > 3 * tool_diameter:
+            plunge_rate *= 0.7
+            step_over *= 0.8
+
+        return round(step_over, 2), round(plunge_rate, 2)
+
+    @staticmethod
+    def calculate_batch(
+        material,
+        tool,
+        operation_type: str,
+        diameters: Iterable[float],
+        teeth: Optional[Union[int, Iterable[int]]] = None,
+        depths: Optional[Iterable[float]] = None
+    ) -> Dict[str, Union[str, List[float]]]:
+        """
+        Пакетный расчет для массива диаметров фрез
+        :param teeth: число зубьев (одно на все строки или массив) - добавляет минутную подачу
+        :param depths: массив глубин резания - добавляет параметры спирального фрезерования
+        :return: таблица по столбцам; значения совпадают с calculate для каждой строки
+        """
+        # Скорость и подача на зуб не зависят от диаметра: считаем один раз
+        cutting_speed, feed_per_tooth = MILLING_COEFFICIENTS.lookup(material, tool, operation_type)
+
+        # Столбцы - отображения по различным диаметрам (calculations/columns.py);
+        # порядок операций тот же, что в calculate, поэтому значения совпадают до бита
+        diameters = list(diameters)
+        count = len(diameters)
+        keys, codes = encode(diameters)
+        rpm_keys = rpm_values(cutting_speed, keys)
+        rpm = expand(rpm_keys, codes)
+        table = {
+            "operation": operation_type,
+            "material": material.name,
+            "tool": tool.name,
+            "diameter": diameters,
+            "speed": [cutting_speed] * count,
+            "feed_per_tooth": [feed_per_tooth] * count,
+            "rpm": rpm,
+        }
+
+        if teeth is not None:
+            if not hasattr(teeth, "__iter__"):
+                feed_rate = expand(rounded(map(mul, repeat(feed_per_tooth * teeth), rpm_keys), 1), codes)
+                teeth = [teeth] * count
+            else:
+                teeth = list(teeth)
+                tooth_keys, tooth_codes = encode(teeth)
+                if codes is None or tooth_codes is None:
+                    feed_rate = rounded(map(mul, map(mul, repeat(feed_per_tooth), teeth), rpm), 1)
+                else:
+                    # Сетка (диаметр, зубья): по значению на различную пару
+                    feed_rate = expand([round(feed_per_tooth * z * n, 1) for n in rpm_keys for z in tooth_keys],
+                                       grid_codes(codes, len(tooth_keys), tooth_codes))
+            table["teeth"] = teeth
+            table["feed_rate"] = feed_rate
+
+        if depths is not None:
+            depths = list(depths)
+            coeff = MillingCalculator._helical_coefficients(material.group)
+            plunge_factor = MillingCalculator._plunge_factor(MillingCalculator.mill_type(tool))
+            # Коррекция глубокого резания (глубина > 3 диаметров) - маской; множитель 1.0 не меняет значения
+            deep = list(map(gt, depths, map(mul, repeat(3), diameters)))
+            table["cutting_depth"] = depths
+            step_over = map(mul, keys, repeat(coeff["step_over"]))
+            plunge_rate = map(mul, map(mul, keys, repeat(coeff["plunge_factor"])), repeat(plunge_factor))
+            if codes is None:
+                table["step_over"] = rounded(map(mul, step_over, map((1.0, 0.8).__getitem__, deep)), 2)
+                table["plunge_rate"] = rounded(map(mul, plunge_rate, map((1.0, 0.7).__getitem__, deep)), 2)
+            else:
+                # Сетка (диаметр, глубокое ли резание)
+                deep_codes = grid_codes(codes, 2, deep)
+                table["step_over"] = expand([round(step * factor, 2) for step in step_over
+                                             for factor in (1.0, 0.8)], deep_codes)
+                table["plunge_rate"] = expand([round(plunge * factor, 2) for plunge in plunge_rate
+                                               for factor in (1.0, 0.7)], deep_codes)
+
+        return table
+
+
+# Таблица коэффициентов фрезерования по всему каталогу
+MILLING_COEFFICIENTS = CoefficientTable(
+    MillingCalculator._rounded_speed,
+    MillingCalculator._rounded_feed_per_tooth,
+    MillingCalculator._rounded_rpm,
+    tools=MILLING_TOOLS,
+    operations=OPERATIONS["milling"],
+)
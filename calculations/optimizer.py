@@ -0,0 +1,168 @@
+import math
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from calculations.milling_calc import MillingCalculator
+from calculations.turning_calc import TurningCalculator
+from database.compatibility import COMPATIBILITY
+from database.materials_lib import MATERIALS, Material
+from database.tools_lib import CuttingTool, OPERATIONS
+
+
+@dataclass(frozen=True)
+class MachineEnvelope:
+    """Возможности станка"""
+    max_rpm: float = 6000  # об/мин
+    max_feed_rate: float = 5000  # мм/мин
+    min_rpm: float = 50  # об/мин
+
+
+class Regime(NamedTuple):
+    """Точка перебора режимов"""
+    material: str
+    tool: str
+    operation: str
+    diameter: float  # мм (деталь для точения, фреза для фрезерования)
+    speed: float  # фактическая скорость резания после ограничения оборотов, м/мин
+    feed: float  # мм/об (точение) или мм/зуб (фрезерование)
+    rpm: float  # об/мин
+    feed_rate: float  # мм/мин
+    mrr: float  # съем материала, см³/мин
+    roughness: float  # расчетная шероховатость Rz, мкм
+
+
+@dataclass(frozen=True)
+class SweepGrid:
+    """Сетка перебора и условия резания"""
+    speed_steps: int = 20
+    feed_steps: int = 20
+    diameters: Tuple[float, ...] = (10, 20, 30, 50, 80, 120, 200)  # диаметры деталей для точения, мм
+    depth: float = 1.0  # глубина резания, мм
+    teeth: int = 4  # число зубьев фрезы
+    width_share: float = 0.5  # ширина фрезерования в долях диаметра фрезы
+    nose_radius: float = 0.8  # радиус при вершине / углового скругления, мм
+
+
+def _linspace(low: float, high: float, steps: int) -> List[float]:
+    if steps <= 1 or high <= low:
+        return [low]
+    step = (high - low) / (steps - 1)
+    return [low + step * i for i in range(steps)]
+
+
+def _as_range(value) -> Tuple[float, float]:
+    return tuple(value) if isinstance(value, tuple) else (value, value)
+
+
+def _factors(process_type: str, tool: CuttingTool, operation: str) -> Tuple[float, float]:
+    """Множители скорости и подачи по материалу инструмента и операции, как в калькуляторах"""
+    if process_type == "turning":
+        calc = TurningCalculator
+        feed_factor = calc.FEED_OPERATION_FACTORS.get(operation, 1.0)
+    else:
+        calc = MillingCalculator
+        feed_factor = calc.BASE_FEEDS.get(operation, 1.0)
+    return (calc.SPEED_TOOL_FACTORS.get(tool.material, 1.0) * calc.SPEED_OPERATION_FACTORS.get(operation, 1.0),
+            calc.FEED_TOOL_FACTORS.get(tool.material, 1.0) * feed_factor)
+
+
+def pareto_front(regimes: Iterable[Regime]) -> List[Regime]:
+    """
+    Режимы, которые нельзя улучшить по съему материала, не ухудшив шероховатость.
+    Сортировка по съему и один проход: O(n log n).
+    """
+    front = []
+    best_roughness = math.inf
+    for regime in sorted(regimes, key=lambda r: (-r.mrr, r.roughness)):
+        if regime.roughness < best_roughness:
+            front.append(regime)
+            best_roughness = regime.roughness
+    return front
+
+
+def sweep_material(material: Material, process_type: str, tools: Sequence[CuttingTool],
+                   machine: MachineEnvelope, grid: SweepGrid = SweepGrid(),
+                   operations: Optional[Sequence[str]] = None) -> Dict[str, List[Regime]]:
+    """
+    Перебор скорость x подача x инструмент x диаметр для одного материала.
+    Возвращает Парето-фронт (съем материала ↑, шероховатость ↓) по каждой операции.
+    """
+    milling = process_type == "milling"
+    speed_range = _as_range(material.recommended_speed)
+    feed_range = _as_range(material.recommended_feed)
+    # Шероховатость зависит только от подачи: Rz = f² / (8r), мкм
+    roughness_factor = 1000 / (8 * grid.nose_radius)
+    fronts = {}
+
+    for operation in (operations or OPERATIONS[process_type]):
+        candidates = []
+        for tool in tools:
+            speed_factor, feed_factor = _factors(process_type, tool, operation)
+            speeds = _linspace(speed_range[0] * speed_factor, speed_range[1] * speed_factor, grid.speed_steps)
+            feeds = _linspace(feed_range[0] * feed_factor, feed_range[1] * feed_factor, grid.feed_steps)
+            # Минутная подача на 1 об/мин для каждой подачи
+            feed_per_rev = [f * grid.teeth for f in feeds] if milling else feeds
+            # Лучший съем и режим для каждой подачи: остальные точки с той же подачей
+            # (и шероховатостью) заведомо не попадут во фронт
+            best_mrr = [0.0] * len(feeds)
+            best = [None] * len(feeds)
+
+            for diameter in ([tool.diameter] if milling else grid.diameters):
+                if not diameter or diameter <= 0:
+                    continue
+                circumference = math.pi * diameter / 1000
+                # Обороты ограничиваются шпинделем, фактическая скорость пересчитывается
+                rpms = sorted({min(max(v / circumference, machine.min_rpm), machine.max_rpm) for v in speeds})
+                # Съем: точение v·f·t, фрезерование B·t·Vf (см³/мин)
+                section = grid.width_share * diameter * grid.depth / 1000 if milling else grid.depth
+                # Съем растет с оборотами, поэтому для каждой подачи берем наибольшие
+                # обороты, при которых минутная подача не превышает возможности станка
+                for i, per_rev in enumerate(feed_per_rev):
+                    j = bisect_right(rpms, machine.max_feed_rate / per_rev) - 1 if per_rev > 0 else len(rpms) - 1
+                    if j < 0:
+                        break  # подачи по возрастанию: дальше только превышение
+                    rpm = rpms[j]
+                    mrr = section * per_rev * rpm if milling else rpm * circumference * per_rev * section
+                    if mrr > best_mrr[i]:
+                        best_mrr[i] = mrr
+                        best[i] = (diameter, rpm * circumference, rpm)
+
+            for i, point in enumerate(best):
+                if point is not None:
+                    diameter, speed, rpm = point
+                    candidates.append(Regime(material.name, tool.name, operation, diameter, speed, feeds[i],
+                                             rpm, feed_per_rev[i] * rpm, best_mrr[i],
+                                             feeds[i] * feeds[i] * roughness_factor))
+        fronts[operation] = pareto_front(candidates)
+    return fronts
+
+
+def _sweep_task(args) -> Tuple[str, Dict[str, List[Regime]]]:
+    material, process_type, tools, machine, grid = args
+    return material.name, sweep_material(material, process_type, tools, machine, grid)
+
+
+def sweep_catalog(process_type: str, machine: MachineEnvelope, grid: SweepGrid = SweepGrid(),
+                  materials: Optional[Iterable[Material]] = None,
+                  workers: Optional[int] = None) -> Dict[str, Dict[str, List[Regime]]]:
+    """
+    Парето-фронты режимов для всех материалов каталога: материал -> операция -> фронт.
+    Для каждого материала перебираются только подходящие его группе инструменты.
+    :param workers: число процессов (None или 1 - в текущем процессе)
+    """
+    tasks = [(material, process_type, COMPATIBILITY.tools(process_type, material.group), machine, grid)
+             for material in (MATERIALS.values() if materials is None else materials)]
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return dict(pool.map(_sweep_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    return dict(map(_sweep_task, tasks))
+
+
+def sample_front(front: List[Regime], count: int) -> List[Regime]:
+    """Равномерная выборка точек фронта для вывода"""
+    if len(front) <= count:
+        return front
+    step = (len(front) - 1) / (count - 1)
+    return [front[round(i * step)] for i in range(count)]
@@ -0,0 +1,84 @@
+"""
+Таблица режимов резания по каталогу: материалы x инструменты x операции x диаметры.
+Несовместимые пары материал/инструмент не считаются. Строки выдаются
+генератором: пакетный расчет идет порциями диаметров, поэтому память
+не растет с числом строк (выгрузка в миллион строк держит в памяти
+одну порцию столбцов).
+"""
+from itertools import islice, repeat
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from database.compatibility import COMPATIBILITY
+from database.materials_lib import Material
+from database.tools_lib import CuttingTool
+from .milling_calc import MillingCalculator
+from .turning_calc import TurningCalculator
+
+# Диаметров в одном пакетном расчете
+CHUNK = 1024
+# Число зубьев фрезы для минутной подачи в таблице
+DEFAULT_TEETH = 4
+
+# Столбцы таблицы: (заголовок, текстовый ли столбец)
+COLUMNS = {
+    "turning": [
+        ("Материал", True), ("Инструмент", True), ("Операция", True), ("Диаметр, мм", False),
+        ("Скорость, м/мин", False), ("Подача, мм/об", False), ("Обороты, об/мин", False),
+    ],
+    "milling": [
+        ("Материал", True), ("Инструмент", True), ("Операция", True), ("Диаметр фрезы, мм", False),
+        ("Зубьев", False), ("Скорость, м/мин", False), ("Подача на зуб, мм/зуб", False),
+        ("Обороты, об/мин", False), ("Минутная подача, мм/мин", False),
+    ],
+}
+
+
+class DiameterRange:
+    """Диаметры от start до stop включительно с шагом step; обходится повторно, не хранит значения"""
+    __slots__ = ("start", "stop", "step")
+
+    def __init__(self, start: float, stop: float, step: float):
+        self.start = start
+        self.stop = stop
+        self.step = step
+
+    def __len__(self) -> int:
+        if self.step <= 0 or self.stop < self.start:
+            return 0
+        return int((self.stop - self.start) / self.step + 1e-9) + 1
+
+    def __iter__(self) -> Iterator[float]:
+        # Значение от начала диапазона, а не накоплением шага: без ошибки округления
+        for index in range(len(self)):
+            yield round(self.start + index * self.step, 6)
+
+
+def _chunks(values: Iterable[float], size: int) -> Iterator[List[float]]:
+    values = iter(values)
+    while True:
+        chunk = list(islice(values, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def chart_rows(process_type: str, materials: Iterable[Material], tools: Sequence[CuttingTool],
+               operations: Sequence[str], diameters: DiameterRange,
+               teeth: int = DEFAULT_TEETH) -> Iterator[Tuple]:
+    """
+    Строки таблицы режимов в порядке столбцов COLUMNS[process_type].
+    Инструменты, не подходящие для группы материала (database/compatibility.py), пропускаются.
+    """
+    for material in materials:
+        for tool in COMPATIBILITY.select(material, tools):
+            for operation in operations:
+                for chunk in _chunks(diameters, CHUNK):
+                    if process_type == "turning":
+                        table = TurningCalculator.calculate_batch(material, tool, operation, chunk)
+                        yield from zip(repeat(material.name), repeat(tool.name), repeat(operation),
+                                       chunk, table["speed"], table["feed"], table["rpm"])
+                    else:
+                        table = MillingCalculator.calculate_batch(material, tool, operation, chunk, teeth)
+                        yield from zip(repeat(material.name), repeat(tool.name), repeat(operation),
+                                       chunk, table["teeth"], table["speed"], table["feed_per_tooth"],
+                                       table["rpm"], table["feed_rate"])
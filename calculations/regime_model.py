@@ -0,0 +1,276 @@
+"""
+Режимы для материалов вне каталога по твердости и пределу прочности.
+
+Записи каталога каждой группы разложены по равномерной сетке
+в нормированных координатах (HB, σв). Ближайшие соседи ищутся по
+кольцам ячеек вокруг ячейки запроса, пока следующее кольцо не дальше
+худшего из найденных соседей; размер ячейки подбирается по плотности
+записей, поэтому просматривается лишь несколько ячеек при любом
+размере каталога. Скорость и подача интерполируются по соседям
+с весами обратно четвертой степени расстояния: в редком каталоге
+значения определяет ближайшая запись, а не дальние соседи. Вне
+диапазона каталога значения равны значениям ближайших записей
+(экстраполяции нет).
+
+Индекс строится при первом обращении, каталог читается потоком; в памяти -
+одна строка Row и группа на материал (около 0.9 КБ вместе с сетками,
+tests/test_catalog_memory.py), записи Material не хранятся. Изменения каталога
+(DatabaseOperations.apply, add_material, откат) переносятся в индекс
+по записанным материалам, без перестройки (сетка группы строится
+заново, только когда число ее записей выросло в GROWTH раз).
+"""
+import heapq
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from database.db_operations import DatabaseOperations
+from database.materials_lib import MATERIALS, Material
+from database.validation import check_material
+
+# Масштаб осей: разница 50 HB равноценна разнице 170 МПа (σв ≈ 3.4 HB у сталей)
+HARDNESS_SCALE = 50.0
+STRENGTH_SCALE = 170.0
+NEIGHBOURS = 4
+# Сетка: в среднем записей на ячейку, рост числа записей до перестройки сетки,
+# до какого числа записей группы соседи ищутся перебором
+CELL_ROWS = 2
+GROWTH = 4
+LINEAR_ROWS = 32
+
+# Запись индекса: (HB, σв, скорость мин., макс., подача мин., макс., имя)
+Row = Tuple[float, float, float, float, float, float, str]
+Neighbour = Tuple[float, Row]  # (квадрат расстояния, запись)
+
+_NAME = re.compile(r"^(.+), HB (\d+(?:\.\d+)?), σв (\d+(?:\.\d+)?)$")
+
+
+def _interval(value) -> Tuple[float, float]:
+    return tuple(value) if isinstance(value, (tuple, list)) else (value, value)
+
+
+def _row(material: Material) -> Row:
+    return (material.hardness, material.tensile_strength,
+            *_interval(material.recommended_speed), *_interval(material.recommended_feed), material.name)
+
+
+def _decimal(value: float) -> str:
+    """Число без потери точности (repr) и без экспоненты в допустимых диапазонах (до 1e16)"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def inferred_name(group: str, hardness: float, tensile_strength: float) -> str:
+    """
+    Имя расчетного материала (по нему материал восстанавливается из сохраненной сессии).
+    Числа записываются точно: from_name(inferred_name(...)) дает те же HB и σв.
+    """
+    return f"{group}, HB {_decimal(hardness)}, σв {_decimal(tensile_strength)}"
+
+
+class _Grid:
+    """
+    Записи одной группы в равномерной сетке по нормированным (HB, σв).
+    Размер ячейки подбирается по плотности записей при построении;
+    при росте числа записей в GROWTH раз сетка строится заново.
+    """
+    __slots__ = ("rows", "cell", "cells", "bounds", "built")
+
+    def __init__(self, rows: List[Row]):
+        self.rows: Dict[str, Row] = {row[6]: row for row in rows}
+        self._layout()
+
+    def _layout(self) -> None:
+        rows = self.rows.values()
+        self.built = len(self.rows)
+        # Ячейка -> [(HB, σв в нормированных координатах, запись)]
+        self.cells: Dict[Tuple[int, int], List[Tuple[float, float, Row]]] = {}
+        self.bounds = None
+        if not self.rows:
+            self.cell = 1.0
+            return
+        xs = [row[0] / HARDNESS_SCALE for row in rows]
+        ys = [row[1] / STRENGTH_SCALE for row in rows]
+        area = max(max(xs) - min(xs), 0.1) * max(max(ys) - min(ys), 0.1)
+        self.cell = (area * CELL_ROWS / len(self.rows)) ** 0.5
+        for row in rows:
+            self._place(row)
+        # Записи занимают полосу (прочность растет с твердостью), а не весь прямоугольник:
+        # по фактической заполненности ячеек сетка мельчится один раз
+        occupancy = len(self.rows) / len(self.cells)
+        if occupancy > 2 * CELL_ROWS:
+            self.cell /= (occupancy / CELL_ROWS) ** 0.5
+            self.cells, self.bounds = {}, None
+            for row in rows:
+                self._place(row)
+
+    def _place(self, row: Row) -> None:
+        x, y = row[0] / HARDNESS_SCALE, row[1] / STRENGTH_SCALE
+        key = int(x // self.cell), int(y // self.cell)
+        self.cells.setdefault(key, []).append((x, y, row))
+        if self.bounds is None:
+            self.bounds = [key[0], key[1], key[0], key[1]]
+        else:
+            bounds = self.bounds
+            bounds[0], bounds[1] = min(bounds[0], key[0]), min(bounds[1], key[1])
+            bounds[2], bounds[3] = max(bounds[2], key[0]), max(bounds[3], key[1])
+
+    def insert(self, row: Row) -> None:
+        self.rows[row[6]] = row
+        if len(self.rows) > self.built * GROWTH:
+            self._layout()
+        else:
+            self._place(row)
+
+    def remove(self, name: str) -> None:
+        row = self.rows.pop(name, None)
+        if row is not None:
+            x, y = row[0] / HARDNESS_SCALE, row[1] / STRENGTH_SCALE
+            self.cells[int(x // self.cell), int(y // self.cell)].remove((x, y, row))
+
+    def nearest(self, hardness: float, strength: float, count: int) -> List[Neighbour]:
+        """count ближайших записей: (квадрат расстояния, запись) по возрастанию расстояния"""
+        if len(self.rows) <= LINEAR_ROWS:
+            return heapq.nsmallest(count, ((_distance(row, hardness, strength), row)
+                                           for row in self.rows.values()), key=lambda item: item[0])
+        query_x, query_y = hardness / HARDNESS_SCALE, strength / STRENGTH_SCALE
+        x, y = int(query_x // self.cell), int(query_y // self.cell)
+        left, bottom, right, top = self.bounds
+        # Кольца ячеек вокруг ячейки запроса; пустые кольца до границ сетки пропускаются
+        ring = max(left - x, x - right, bottom - y, y - top, 0)
+        last = max(x - left, right - x, y - bottom, top - y)
+        found: List[Neighbour] = []
+        cells = self.cells
+        while ring <= last:
+            # Записи кольца ring и дальше не ближе (ring - 1) ячеек: дальше искать незачем
+            if len(found) >= count and found[count - 1][0] <= ((ring - 1) * self.cell) ** 2:
+                break
+            for key in _ring(x, y, ring):
+                for row_x, row_y, row in cells.get(key, ()):
+                    dx, dy = row_x - query_x, row_y - query_y
+                    found.append((dx * dx + dy * dy, row))
+            found.sort()
+            del found[count:]
+            ring += 1
+        return found
+
+
+def _distance(row: Row, hardness: float, strength: float) -> float:
+    dh = (row[0] - hardness) / HARDNESS_SCALE
+    ds = (row[1] - strength) / STRENGTH_SCALE
+    return dh * dh + ds * ds
+
+
+def _ring(x: int, y: int, ring: int):
+    """Ячейки на расстоянии ring (по Чебышёву) от (x, y)"""
+    if ring == 0:
+        yield x, y
+        return
+    for i in range(x - ring, x + ring + 1):
+        yield i, y - ring
+        yield i, y + ring
+    for j in range(y - ring + 1, y + ring):
+        yield x - ring, j
+        yield x + ring, j
+
+
+class RegimeModel:
+    """Интерполяция рекомендуемых скорости и подачи по ближайшим материалам каталога"""
+
+    def __init__(self, neighbours: int = NEIGHBOURS):
+        self.neighbours = neighbours
+        self._groups: Dict[Optional[str], _Grid] = {}
+        # Группа каждого материала индекса (для переноса изменений); записи Material не хранятся
+        self._material_groups: Dict[str, str] = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def build(self) -> None:
+        """Полное построение индекса по каталогу"""
+        with self._lock:
+            self._build()
+
+    def _build(self) -> None:
+        # Каталог читается потоком (в SQLite - пачками): в памяти только строки Row и группы
+        material_groups: Dict[str, str] = {}
+        by_group: Dict[Optional[str], List[Row]] = {None: []}
+        for material in MATERIALS.values():
+            row = _row(material)
+            material_groups[material.name] = material.group
+            by_group.setdefault(material.group, []).append(row)
+            by_group[None].append(row)
+        self._groups = {group: _Grid(rows) for group, rows in by_group.items()}
+        self._material_groups, self._version = material_groups, DatabaseOperations.version
+
+    def update(self) -> None:
+        """Перенос изменения каталога в индекс (подписка на изменения каталога)"""
+        with self._lock:
+            if self._version is None or self._version != DatabaseOperations.version - 1:
+                # Индекс еще не строился или пропустил изменение - построится при обращении
+                self._version = None
+                return
+            for name, material in DatabaseOperations.written_materials.items():
+                old_group = self._material_groups.pop(name, None)
+                if old_group is not None:
+                    for group in (old_group, None):
+                        self._groups[group].remove(name)
+                if material is not None:
+                    row = _row(material)
+                    self._material_groups[name] = material.group
+                    self._groups.setdefault(material.group, _Grid([])).insert(row)
+                    self._groups[None].insert(row)
+            self._version = DatabaseOperations.version
+
+    def __len__(self) -> int:
+        return len(self._material_groups)
+
+    def nearest(self, group: Optional[str], hardness: float, tensile_strength: float) -> List[Neighbour]:
+        """
+        Ближайшие материалы каталога: (квадрат нормированного расстояния, запись).
+        Неизвестная или пустая группа - поиск по всему каталогу.
+        """
+        with self._lock:
+            if self._version != DatabaseOperations.version:
+                self._build()
+            points = self._groups.get(group)
+            if points is None or not points.rows:
+                points = self._groups[None]
+            return points.nearest(hardness, tensile_strength, self.neighbours)
+
+    def infer(self, group: str, hardness: float, tensile_strength: float) -> Material:
+        """
+        Расчетный материал с интерполированными диапазонами скорости и подачи
+        (подходит калькуляторам вместо записи каталога)
+        :raises ValueError: значения вне допустимых диапазонов (CatalogError) или пустой каталог
+        """
+        material = check_material(Material(inferred_name(group, hardness, tensile_strength), group,
+                                           hardness, tensile_strength, 1, 1))
+        material.inferred = True
+        neighbours = self.nearest(material.group, material.hardness, material.tensile_strength)
+        if not neighbours:
+            raise ValueError("Каталог материалов пуст")
+        exact = [row for distance, row in neighbours if distance == 0]
+        if exact:
+            weights = [(1.0, row) for row in exact]
+        else:
+            weights = [(1.0 / distance ** 2, row) for distance, row in neighbours]
+        total = sum(weight for weight, _ in weights)
+        values = [sum(weight * row[column] for weight, row in weights) / total for column in range(2, 6)]
+        material.recommended_speed = (round(values[0], 1), round(values[1], 1))
+        material.recommended_feed = (round(values[2], 3), round(values[3], 3))
+        return material
+
+    def from_name(self, name: str) -> Optional[Material]:
+        """Расчетный материал по имени из inferred_name (None - имя другого вида)"""
+        match = _NAME.match(name)
+        if match is None:
+            return None
+        try:
+            return self.infer(match.group(1), float(match.group(2)), float(match.group(3)))
+        except ValueError:
+            return None
+
+
+# Общий индекс бота; изменения каталога переносятся в него без перестройки
+REGIME_MODEL = RegimeModel()
+DatabaseOperations.subscribe(REGIME_MODEL.update)
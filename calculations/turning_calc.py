@@ -1,18 +1,39 @@
 from database.materials_lib import Material
-from database.tools_lib import CuttingTool
-from typing import Dict, Union
+from database.tools_lib import CuttingTool, TURNING_TOOLS, OPERATIONS
+from calculations.coefficients import CoefficientTable
+from calculations.columns import rpm_column
+from typing import Dict, Iterable, List, Union
 
 class TurningCalculator:
+    # Коэффициенты скорости резания для разных операций
+    SPEED_OPERATION_FACTORS = {
+        "Наружное точение": 1.0,
+        "Растачивание": 0.8,
+        "Подрезание": 0.9,
+        "Резьбонарезание": 0.5,
+        "Отрезание": 0.7,
+    }
+    # Коэффициенты подачи для разных операций
+    FEED_OPERATION_FACTORS = {
+        "Наружное точение": 1.0,
+        "Растачивание": 0.8,
+        "Подрезание": 0.7,
+        "Резьбонарезание": 0.3,
+        "Отрезание": 0.2,
+    }
+    # Корректировка по материалу инструмента
+    SPEED_TOOL_FACTORS = {"Твердый сплав": 1.2, "Быстрорежущая сталь": 0.8}
+    FEED_TOOL_FACTORS = {"Твердый сплав": 1.1, "Быстрорежущая сталь": 0.9}
+
     @staticmethod
     def calculate(material: Material, tool: CuttingTool, operation: str, diameter: float) -> Dict[str, Union[float, str]]:
         """
         Основной метод расчета параметров токарной обработки
         Возвращает словарь с полными результатами расчета
         """
-        # Рассчитываем все параметры
-        cutting_speed = TurningCalculator.calculate_cutting_speed(material, tool, operation)
-        feed_rate = TurningCalculator.calculate_feed_rate(material, tool, operation)
-        rpm = TurningCalculator.calculate_rpm(cutting_speed, diameter)
+        # Скорость и подача берутся из предрасчитанной таблицы, обороты - из LRU-кэша
+        cutting_speed, feed_rate = TURNING_COEFFICIENTS.lookup(material, tool, operation)
+        rpm = TURNING_COEFFICIENTS.rpm(cutting_speed, diameter)
         
         return {
             "operation": operation,
@@ -24,61 +45,57 @@ class TurningCalculator:
             "diameter": diameter
         }
 
+    @staticmethod
+    def calculate_batch(material: Material, tool: CuttingTool, operation: str,
+                        diameters: Iterable[float]) -> Dict[str, Union[str, List[float]]]:
+        """
+        Пакетный расчет для массива диаметров
+        Возвращает таблицу по столбцам; значения совпадают с calculate для каждого диаметра
+        """
+        # Скорость и подача не зависят от диаметра: считаем один раз
+        cutting_speed, feed_rate = TURNING_COEFFICIENTS.lookup(material, tool, operation)
+
+        diameters = list(diameters)
+        count = len(diameters)
+        return {
+            "operation": operation,
+            "material": material.name,
+            "tool": tool.name,
+            "diameter": diameters,
+            "speed": [cutting_speed] * count,
+            "feed": [feed_rate] * count,
+            "rpm": rpm_column(cutting_speed, diameters),
+        }
+
     @staticmethod
     def calculate_cutting_speed(material: Material, tool: CuttingTool, operation_type: str) -> float:
         """Расчет скорости резания в м/мин с учетом всех факторов"""
-        # Базовые коэффициенты для разных операций
-        operation_factors = {
-            "Наружное точение": 1.0,
-            "Растачивание": 0.8,
-            "Подрезание": 0.9,
-            "Резьбонарезание": 0.5,
-            "Отрезание": 0.7,
-        }
-        
         # Получаем базовую скорость для материала
         material_speed = material.recommended_speed
         if isinstance(material_speed, tuple):
             material_speed = sum(material_speed) / 2
             
         # Корректировка по материалу инструмента
-        tool_factor = 1.0
-        if tool.material == "Твердый сплав":
-            tool_factor = 1.2
-        elif tool.material == "Быстрорежущая сталь":
-            tool_factor = 0.8
+        tool_factor = TurningCalculator.SPEED_TOOL_FACTORS.get(tool.material, 1.0)
             
         # Корректировка по типу операции
-        operation_factor = operation_factors.get(operation_type, 1.0)
+        operation_factor = TurningCalculator.SPEED_OPERATION_FACTORS.get(operation_type, 1.0)
         
         return round(material_speed * tool_factor * operation_factor, 1)
 
     @staticmethod
     def calculate_feed_rate(material: Material, tool: CuttingTool, operation_type: str) -> float:
         """Расчет подачи в мм/об с учетом всех факторов"""
-        # Базовые коэффициенты для разных операций
-        operation_factors = {
-            "Наружное точение": 1.0,
-            "Растачивание": 0.8,
-            "Подрезание": 0.7,
-            "Резьбонарезание": 0.3,
-            "Отрезание": 0.2,
-        }
-        
         # Получаем базовую подачу для материала
         material_feed = material.recommended_feed
         if isinstance(material_feed, tuple):
             material_feed = sum(material_feed) / 2
             
         # Корректировка по материалу инструмента
-        tool_factor = 1.0
-        if tool.material == "Твердый сплав":
-            tool_factor = 1.1
-        elif tool.material == "Быстрорежущая сталь":
-            tool_factor = 0.9
+        tool_factor = TurningCalculator.FEED_TOOL_FACTORS.get(tool.material, 1.0)
             
         # Корректировка по типу операции
-        operation_factor = operation_factors.get(operation_type, 1.0)
+        operation_factor = TurningCalculator.FEED_OPERATION_FACTORS.get(operation_type, 1.0)
         
         return round(material_feed * tool_factor * operation_factor, 3)
 
@@ -91,4 +108,14 @@ class TurningCalculator:
         """
         if diameter <= 0:
             return 0
-        return round((cutting_speed * 1000) / (3.1416 * diameter))
\ No newline at end of file
+        return round((cutting_speed * 1000) / (3.1416 * diameter))
+
+
+# Таблица коэффициентов токарной обработки по всему каталогу
+TURNING_COEFFICIENTS = CoefficientTable(
+    TurningCalculator.calculate_cutting_speed,
+    TurningCalculator.calculate_feed_rate,
+    TurningCalculator.calculate_rpm,
+    tools=TURNING_TOOLS,
+    operations=OPERATIONS["turning"],
+)
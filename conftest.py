@@ -0,0 +1 @@
+"""Корень проекта в sys.path для тестов из tests/ (пакеты проекта без __init__.py)"""
@@ -0,0 +1,234 @@
+"""
+Пакетный импорт каталога материалов и инструментов из файлов поставщиков.
+
+Файл читается потоком: CSV - по строкам, JSON - по объектам (массив объектов
+или JSON Lines) без загрузки документа целиком. Каждая запись проверяется
+(database/validation.py), дубликаты по имени отбрасываются, индекс групп
+и совместимость материалов инструмента строятся в том же проходе. Результат
+применяется одним изменением каталога (DatabaseOperations.apply): подписчики
+пересчитывают кэши один раз, изменение можно откатить (DatabaseOperations.rollback).
+
+Поля материалов: name, group, hardness, tensile_strength,
+recommended_speed / speed_min, speed_max, recommended_feed / feed_min, feed_max.
+Поля инструментов: name, tool_type (turning/milling), material, diameter,
+cutting_edge_angle, groups (группы материалов для материала инструмента, в CSV - через «;»).
+
+Запуск из корня проекта (с CNC_CATALOG_DB изменения сохраняются в базе,
+со встроенным каталогом - только проверка файла и отчет):
+    python -m database.catalog_import materials vendor.csv
+    python -m database.catalog_import tools vendor.json --replace --snapshot catalog.snapshot
+"""
+import csv
+import json
+import time
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, TextIO, Tuple
+
+from .db_operations import CatalogChange, DatabaseOperations
+from .materials_lib import MATERIALS
+from .tools_lib import MILLING_TOOLS, TOOL_MATERIALS, TURNING_TOOLS
+from .validation import CatalogError, material_from_record, tool_from_record
+
+KINDS = ("materials", "tools")
+# Сколько ошибок сохраняется в отчете (остальные только считаются)
+MAX_ISSUES = 100
+# Размер порции чтения JSON и предельный размер одного объекта, символов
+JSON_CHUNK = 1 << 16
+JSON_RECORD_LIMIT = 1 << 20
+
+# Запись файла: (номер строки CSV или объекта JSON, запись)
+Record = Tuple[int, Mapping]
+
+
+def read_csv(file: TextIO) -> Iterator[Record]:
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_json(file: TextIO) -> Iterator[Record]:
+    """Объекты верхнего уровня массива JSON или строк JSON Lines по одному"""
+    decoder = json.JSONDecoder()
+    buffer, position, number, eof = "", 0, 0, False
+    while True:
+        # Разделители между объектами: пробелы, запятые, скобки массива
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = file.read(JSON_CHUNK), 0
+            eof = not buffer
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof or len(buffer) - position > JSON_RECORD_LIMIT:
+                raise
+            # Объект не поместился в буфер: дочитываем
+            chunk = file.read(JSON_CHUNK)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        number += 1
+        yield number, record
+        position = end
+
+
+READERS: Dict[str, Callable[[TextIO], Iterator[Record]]] = {
+    "csv": read_csv,
+    "json": read_json,
+    "jsonl": read_json,
+}
+
+
+class ImportReport:
+    """Итог импорта: счетчики записей, ошибки, версия каталога и скорость"""
+
+    def __init__(self, kind: str, source: str):
+        self.kind = kind
+        self.source = source
+        self.read = 0
+        self.added = 0
+        self.replaced = 0
+        self.duplicates = 0  # повтор имени в файле или существующая запись без --replace
+        self.invalid = 0
+        self.issues: List[str] = []
+        self.version: Optional[int] = None  # версия каталога после применения
+        self.parse_seconds = 0.0
+        self.apply_seconds = 0.0
+
+    def issue(self, number: int, message: str) -> None:
+        if len(self.issues) < MAX_ISSUES:
+            self.issues.append(f"запись {number}: {message}")
+
+    @property
+    def throughput(self) -> float:
+        """Записей в секунду (чтение, проверка и применение)"""
+        seconds = self.parse_seconds + self.apply_seconds
+        return self.read / seconds if seconds else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"Импорт {self.kind} из {self.source}: прочитано {self.read}, добавлено {self.added}, "
+            f"заменено {self.replaced}, дубликатов {self.duplicates}, с ошибками {self.invalid}",
+            f"Разбор и проверка {self.parse_seconds * 1000:.0f} мс, применение {self.apply_seconds * 1000:.0f} мс, "
+            f"{self.throughput:.0f} записей/с",
+            f"Версия каталога: {self.version}" if self.version is not None else "Каталог не изменен",
+        ]
+        lines.extend(self.issues)
+        if self.invalid > len(self.issues):
+            lines.append(f"... и еще {self.invalid - len(self.issues)} ошибок")
+        return "\n".join(lines)
+
+
+def _collect_materials(records: Iterator[Record], report: ImportReport, replace: bool) -> Dict:
+    materials = {}
+    for number, record in records:
+        report.read += 1
+        try:
+            if not isinstance(record, Mapping):
+                raise CatalogError("ожидается объект с полями")
+            material = material_from_record(record)
+        except CatalogError as e:
+            report.invalid += 1
+            report.issue(number, str(e))
+            continue
+        if material.name in materials or (not replace and material.name in MATERIALS):
+            report.duplicates += 1
+            continue
+        materials[material.name] = material
+    return {"materials": list(materials.values())}
+
+
+def _collect_tools(records: Iterator[Record], report: ImportReport, replace: bool) -> Dict:
+    tools = {}
+    # Совместимость: материал инструмента -> группы материалов (из записей и TOOL_MATERIALS)
+    tool_materials: Dict[str, Dict[str, None]] = {}
+    for number, record in records:
+        report.read += 1
+        try:
+            if not isinstance(record, Mapping):
+                raise CatalogError("ожидается объект с полями")
+            tool, groups = tool_from_record(record)
+            if groups:
+                tool_materials.setdefault(tool.material, {}).update(dict.fromkeys(groups))
+            elif tool.material not in TOOL_MATERIALS and tool.material not in tool_materials:
+                raise CatalogError(f"material: неизвестный материал инструмента «{tool.material}», "
+                                   "укажите группы материалов в поле groups")
+        except CatalogError as e:
+            report.invalid += 1
+            report.issue(number, str(e))
+            continue
+        key = (tool.tool_type, tool.name)
+        existing = TURNING_TOOLS if tool.tool_type == "turning" else MILLING_TOOLS
+        if key in tools or (not replace and tool.name in existing):
+            report.duplicates += 1
+            continue
+        tools[key] = tool
+    return {"tools": list(tools.values()),
+            "tool_materials": {material: list(groups) for material, groups in tool_materials.items()}}
+
+
+def import_records(kind: str, records: Iterator[Record], source: str = "записей", replace: bool = False,
+                   strict: bool = False) -> Tuple[ImportReport, Optional[CatalogChange]]:
+    """
+    Проверка записей и применение одним изменением каталога
+    :param kind: materials/tools
+    :param replace: заменять записи каталога с теми же именами (иначе считаются дубликатами)
+    :param strict: при любой ошибке в записях каталог не изменяется
+    :return: отчет и примененное изменение (None - каталог не изменен)
+    """
+    report = ImportReport(kind, source)
+    start = time.perf_counter()
+    collect = _collect_materials if kind == "materials" else _collect_tools
+    entries = collect(records, report, replace)
+    report.parse_seconds = time.perf_counter() - start
+
+    items = entries.get("materials") or entries.get("tools")
+    if not items or (strict and report.invalid):
+        return report, None
+
+    start = time.perf_counter()
+    change = DatabaseOperations.apply(**entries)
+    report.apply_seconds = time.perf_counter() - start
+    previous = change.previous_materials if kind == "materials" else change.previous_tools
+    report.replaced = sum(1 for value in previous.values() if value is not None)
+    report.added = len(items) - report.replaced
+    report.version = change.version
+    return report, change
+
+
+def import_file(kind: str, path: str, replace: bool = False,
+                strict: bool = False) -> Tuple[ImportReport, Optional[CatalogChange]]:
+    """Импорт файла CSV, JSON или JSON Lines (формат - по расширению)"""
+    if kind not in KINDS:
+        raise ValueError(f"Неизвестный справочник: {kind}")
+    extension = path.rsplit(".", 1)[-1].lower()
+    reader = READERS.get(extension)
+    if reader is None:
+        raise ValueError(f"Неизвестный формат файла: {path} (ожидается {', '.join(READERS)})")
+    # utf-8-sig: CSV из Excel начинается с BOM
+    with open(path, encoding="utf-8-sig", newline="") as file:
+        return import_records(kind, reader(file), path, replace, strict)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Импорт материалов или инструментов из CSV/JSON")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path", help="файл .csv, .json или .jsonl")
+    parser.add_argument("--replace", action="store_true", help="заменять записи с теми же именами")
+    parser.add_argument("--strict", action="store_true", help="не применять импорт при ошибках в записях")
+    parser.add_argument("--snapshot", metavar="PATH", help="пересобрать снимок каталога после импорта")
+    args = parser.parse_args()
+
+    try:
+        result, applied = import_file(args.kind, args.path, args.replace, args.strict)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Ошибка импорта: {e}\n")
+    print(result.format())
+    if applied is not None and args.snapshot:
+        from .catalog_snapshot import build_snapshot
+        build_snapshot(args.snapshot)
+        print(f"Снимок каталога: {args.snapshot}")
@@ -0,0 +1,123 @@
+"""
+Снимок каталога: материалы, инструменты и предрасчитанные таблицы коэффициентов
+в одном файле pickle. При старте словари каталога восстанавливаются из снимка,
+а предрасчет коэффициентов по всему каталогу не выполняется.
+
+Записи хранятся кортежами примитивов: такой pickle загружается быстрее
+объектов dataclass и не импортирует модули каталога при разборе.
+
+Включается переменной окружения CNC_CATALOG_SNAPSHOT=<путь к файлу>
+(каталог в SQLite, CNC_CATALOG_DB, имеет приоритет).
+Сборка снимка из текущего каталога:
+    python -m database.catalog_snapshot build catalog.snapshot
+"""
+import hashlib
+import logging
+import os
+import pickle
+import sys
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Версия формата файла
+FORMAT = 1
+# Таблицы коэффициентов из снимка действительны, пока не изменился код расчета
+_CALCULATION_SOURCES = ("calculations/coefficients.py", "calculations/turning_calc.py",
+                        "calculations/milling_calc.py")
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Загруженные снимки по пути к файлу (None - файл не прочитан)
+_snapshots: Dict[str, Optional[dict]] = {}
+
+
+def calculation_fingerprint() -> str:
+    """Хэш исходников расчета, на которых построены таблицы коэффициентов"""
+    digest = hashlib.sha1()
+    for source in _CALCULATION_SOURCES:
+        with open(os.path.join(_ROOT, source), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _read(path: str) -> Optional[dict]:
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError) as e:
+        logger.warning(f"Снимок каталога {path} не загружен: {e}")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("format") != FORMAT:
+        logger.warning(f"Снимок каталога {path} устаревшего формата, пересоберите его")
+        return None
+    return snapshot
+
+
+def load_snapshot(path: str) -> Optional[dict]:
+    """Снимок из файла (читается один раз на процесс)"""
+    if path not in _snapshots:
+        _snapshots[path] = _read(path)
+    return _snapshots[path]
+
+
+def current() -> Optional[dict]:
+    """Снимок, заданный CNC_CATALOG_SNAPSHOT; None - каталог из словарей или SQLite"""
+    path = os.environ.get("CNC_CATALOG_SNAPSHOT")
+    if not path or os.environ.get("CNC_CATALOG_DB"):
+        return None
+    return load_snapshot(path)
+
+
+def coefficients(snapshot: Optional[dict], name: str) -> Optional[dict]:
+    """Таблица коэффициентов ("turning"/"milling") из снимка, если код расчета не менялся"""
+    if snapshot is None or snapshot["calculation"] != calculation_fingerprint():
+        return None
+    return snapshot["coefficients"].get(name)
+
+
+def _material_row(material) -> tuple:
+    return (material.name, material.group, material.hardness, material.tensile_strength,
+            material.recommended_speed, material.recommended_feed)
+
+
+def _tool_row(tool) -> tuple:
+    return tool.name, tool.tool_type, tool.material, tool.diameter, tool.cutting_edge_angle
+
+
+def build_snapshot(path: str) -> dict:
+    """Снимок текущего каталога с таблицами коэффициентов; файл заменяется атомарно"""
+    from calculations.milling_calc import MILLING_COEFFICIENTS
+    from calculations.turning_calc import TURNING_COEFFICIENTS
+    from .materials_lib import MATERIALS, MATERIAL_GROUPS
+    from .tools_lib import MILLING_TOOLS, TOOL_MATERIALS, TURNING_TOOLS
+
+    tables = {"turning": TURNING_COEFFICIENTS, "milling": MILLING_COEFFICIENTS}
+    for table in tables.values():
+        table.build()
+    snapshot = {
+        "format": FORMAT,
+        "calculation": calculation_fingerprint(),
+        "materials": [_material_row(material) for material in MATERIALS.values()],
+        "material_groups": {group: list(names) for group, names in MATERIAL_GROUPS.items()},
+        "turning_tools": [_tool_row(tool) for tool in TURNING_TOOLS.values()],
+        "milling_tools": [_tool_row(tool) for tool in MILLING_TOOLS.values()],
+        "tool_materials": {material: list(groups) for material, groups in TOOL_MATERIALS.items()},
+        "coefficients": {name: table.export() for name, table in tables.items()},
+    }
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+    _snapshots[path] = snapshot
+    return snapshot
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "build":
+        print("Использование: python -m database.catalog_snapshot build <catalog.snapshot>")
+        sys.exit(1)
+
+    result = build_snapshot(sys.argv[2])
+    print(f"Снимок {sys.argv[2]}: {len(result['materials'])} материалов, "
+          f"{len(result['turning_tools']) + len(result['milling_tools'])} инструментов, "
+          f"{os.path.getsize(sys.argv[2]) / 1024:.1f} КБ")
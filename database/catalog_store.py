@@ -0,0 +1,440 @@
+"""
+Каталог материалов и инструментов в SQLite.
+
+Справочники читаются лениво: словарный доступ (MATERIALS[name], MATERIAL_GROUPS[group],
+TURNING_TOOLS.keys() и т.д.) работает через представления-адаптеры, которые обращаются
+к базе по индексам и держат в памяти только небольшой кэш последних записей.
+
+Включается переменной окружения CNC_CATALOG_DB=<путь к файлу>.
+Заполнение базы встроенным каталогом:
+    python -m database.catalog_store init catalog.db
+"""
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS materials (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    grp TEXT NOT NULL,
+    hardness REAL NOT NULL,
+    tensile_strength REAL NOT NULL,
+    speed_min REAL NOT NULL,
+    speed_max REAL,
+    feed_min REAL NOT NULL,
+    feed_max REAL
+);
+CREATE INDEX IF NOT EXISTS materials_grp ON materials (grp, id);
+CREATE INDEX IF NOT EXISTS materials_hardness ON materials (hardness);
+
+CREATE TABLE IF NOT EXISTS tools (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    tool_type TEXT NOT NULL,
+    material TEXT NOT NULL,
+    diameter REAL,
+    cutting_edge_angle REAL,
+    UNIQUE (tool_type, name)
+);
+CREATE INDEX IF NOT EXISTS tools_material ON tools (material, tool_type);
+
+CREATE TABLE IF NOT EXISTS tool_material_groups (
+    tool_material TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    PRIMARY KEY (tool_material, grp)
+);
+CREATE INDEX IF NOT EXISTS tool_material_groups_grp ON tool_material_groups (grp);
+"""
+
+_MATERIAL_COLUMNS = "name, grp, hardness, tensile_strength, speed_min, speed_max, feed_min, feed_max"
+_TOOL_COLUMNS = "name, tool_type, material, diameter, cutting_edge_angle"
+
+# Открытые каталоги по пути к файлу (материалы и инструменты работают с одной базой)
+_catalogs: Dict[str, "CatalogStore"] = {}
+
+
+def open_catalog(path: str) -> "CatalogStore":
+    """Каталог для файла (один экземпляр на процесс)"""
+    if path not in _catalogs:
+        _catalogs[path] = CatalogStore(path)
+    return _catalogs[path]
+
+
+def _split_range(value) -> Tuple[float, Optional[float]]:
+    """Диапазон (min, max) или одно значение -> столбцы min/max"""
+    if isinstance(value, tuple):
+        return value[0], value[1]
+    return value, None
+
+
+def _join_range(low: float, high: Optional[float]):
+    return low if high is None else (low, high)
+
+
+def _material_from_row(row):
+    from .materials_lib import Material
+    name, group, hardness, tensile_strength, speed_min, speed_max, feed_min, feed_max = row
+    return Material(name, group, hardness, tensile_strength,
+                    _join_range(speed_min, speed_max), _join_range(feed_min, feed_max))
+
+
+def _material_row(material) -> tuple:
+    speed_min, speed_max = _split_range(material.recommended_speed)
+    feed_min, feed_max = _split_range(material.recommended_feed)
+    return (material.name, material.group, material.hardness, material.tensile_strength,
+            speed_min, speed_max, feed_min, feed_max)
+
+
+def _tool_row(tool) -> tuple:
+    return tool.name, tool.tool_type, tool.material, tool.diameter, tool.cutting_edge_angle
+
+
+def _tool_from_row(row):
+    from .tools_lib import CuttingTool
+    return CuttingTool(*row)
+
+
+class CatalogStore:
+    """Каталог в SQLite с вторичными индексами и постраничными запросами"""
+
+    def __init__(self, path: str, cache_size: int = 1024):
+        """
+        :param path: путь к файлу базы
+        :param cache_size: размер кэша записей в представлениях
+        """
+        import sqlite3
+
+        self.path = path
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+        self.materials = MaterialsView(self)
+        self.material_groups = MaterialGroupsView(self)
+        self.turning_tools = ToolsView(self, "turning")
+        self.milling_tools = ToolsView(self, "milling")
+
+    def execute(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def iterate(self, columns: str, table: str, where: str = "", params: tuple = (),
+                batch: int = 500) -> Iterator[tuple]:
+        """
+        Потоковое чтение таблицы пачками по первичному ключу,
+        без загрузки результата в память целиком
+        """
+        condition = f" AND {where}" if where else ""
+        last_id = 0
+        while True:
+            rows = self.execute(
+                f"SELECT id, {columns} FROM {table} WHERE id > ?{condition} ORDER BY id LIMIT ?",
+                (last_id,) + params + (batch,))
+            for row in rows:
+                yield row[1:]
+            if len(rows) < batch:
+                return
+            last_id = rows[-1][0]
+
+    def _write(self, sql: str, rows: list) -> None:
+        """Пакетная запись одной транзакцией"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, rows)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # Заполнение
+
+    def seed_materials(self, materials: Mapping) -> None:
+        """Загрузка встроенных материалов, если таблица пуста"""
+        if not self.execute("SELECT 1 FROM materials LIMIT 1"):
+            self.put_materials(materials.values())
+
+    def seed_tools(self, turning_tools: Mapping, milling_tools: Mapping, tool_materials: Mapping) -> None:
+        """Загрузка встроенных инструментов и совместимости, если таблица пуста"""
+        if not self.execute("SELECT 1 FROM tools LIMIT 1"):
+            self.put_tools(list(turning_tools.values()) + list(milling_tools.values()))
+        if not self.execute("SELECT 1 FROM tool_material_groups LIMIT 1"):
+            self._write("INSERT OR IGNORE INTO tool_material_groups VALUES (?, ?)",
+                        [(tool_material, group) for tool_material, groups in tool_materials.items()
+                         for group in groups])
+
+    def put_materials(self, materials) -> None:
+        rows = [_material_row(material) for material in materials]
+        self._write(f"INSERT OR REPLACE INTO materials ({_MATERIAL_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.materials.clear_cache()
+
+    def put_tools(self, tools) -> None:
+        rows = [_tool_row(tool) for tool in tools]
+        self._write(f"INSERT OR REPLACE INTO tools ({_TOOL_COLUMNS}) VALUES (?, ?, ?, ?, ?)", rows)
+        self.turning_tools.clear_cache()
+        self.milling_tools.clear_cache()
+
+    def apply_change(self, materials=(), tools=(), tool_material_groups=(), remove_materials=(),
+                     remove_tools=(), remove_tool_material_groups=()) -> None:
+        """
+        Запись и удаление записей каталога одной транзакцией (импорт и его откат)
+        :param tool_material_groups: пары (материал инструмента, группа материалов)
+        :param remove_tools: пары (тип инструмента, имя)
+        """
+        statements = [
+            ("DELETE FROM materials WHERE name = ?", [(name,) for name in remove_materials]),
+            ("DELETE FROM tools WHERE tool_type = ? AND name = ?", list(remove_tools)),
+            ("DELETE FROM tool_material_groups WHERE tool_material = ? AND grp = ?",
+             list(remove_tool_material_groups)),
+            (f"INSERT OR REPLACE INTO materials ({_MATERIAL_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+             [_material_row(material) for material in materials]),
+            (f"INSERT OR REPLACE INTO tools ({_TOOL_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+             [_tool_row(tool) for tool in tools]),
+            ("INSERT OR IGNORE INTO tool_material_groups VALUES (?, ?)", list(tool_material_groups)),
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for sql, rows in statements:
+                    if rows:
+                        self._conn.executemany(sql, rows)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        self.materials.clear_cache()
+        self.turning_tools.clear_cache()
+        self.milling_tools.clear_cache()
+
+    # Постраничные запросы по индексам
+
+    def find_materials(
+        self,
+        group: Optional[str] = None,
+        hardness: Optional[Tuple[float, float]] = None,
+        tool_material: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50
+    ) -> List:
+        """
+        Страница материалов по фильтрам
+        :param group: группа материала
+        :param hardness: диапазон твердости HB (включительно)
+        :param tool_material: только группы, совместимые с материалом инструмента (TOOL_MATERIALS)
+        """
+        where, params = self._material_filters(group, hardness, tool_material)
+        rows = self.execute(
+            f"SELECT {_MATERIAL_COLUMNS} FROM materials{where} ORDER BY id LIMIT ? OFFSET ?",
+            params + (limit, offset))
+        return [_material_from_row(row) for row in rows]
+
+    def count_materials(self, group: Optional[str] = None, hardness: Optional[Tuple[float, float]] = None,
+                        tool_material: Optional[str] = None) -> int:
+        where, params = self._material_filters(group, hardness, tool_material)
+        return self.execute(f"SELECT COUNT(*) FROM materials{where}", params)[0][0]
+
+    @staticmethod
+    def _material_filters(group, hardness, tool_material) -> Tuple[str, tuple]:
+        clauses, params = [], []
+        if group is not None:
+            clauses.append("grp = ?")
+            params.append(group)
+        if hardness is not None:
+            clauses.append("hardness BETWEEN ? AND ?")
+            params.extend(hardness)
+        if tool_material is not None:
+            clauses.append("grp IN (SELECT grp FROM tool_material_groups WHERE tool_material = ?)")
+            params.append(tool_material)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+    def find_tools(
+        self,
+        tool_type: Optional[str] = None,
+        tool_material: Optional[str] = None,
+        material_group: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50
+    ) -> List:
+        """
+        Страница инструментов по фильтрам
+        :param tool_type: turning/milling
+        :param tool_material: материал инструмента
+        :param material_group: только инструменты, подходящие для группы материала (TOOL_MATERIALS)
+        """
+        clauses, params = [], []
+        if tool_type is not None:
+            clauses.append("tool_type = ?")
+            params.append(tool_type)
+        if tool_material is not None:
+            clauses.append("material = ?")
+            params.append(tool_material)
+        if material_group is not None:
+            clauses.append("material IN (SELECT tool_material FROM tool_material_groups WHERE grp = ?)")
+            params.append(material_group)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        rows = self.execute(f"SELECT {_TOOL_COLUMNS} FROM tools{where} ORDER BY id LIMIT ? OFFSET ?",
+                            tuple(params) + (limit, offset))
+        return [_tool_from_row(row) for row in rows]
+
+    def compatible_groups(self, tool_material: str) -> List[str]:
+        """Группы материалов для материала инструмента"""
+        return [row[0] for row in self.execute(
+            "SELECT grp FROM tool_material_groups WHERE tool_material = ?", (tool_material,))]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        _catalogs.pop(self.path, None)
+
+
+class CatalogView:
+    """Общая часть представлений: небольшой LRU-кэш записей"""
+
+    def __init__(self, store: CatalogStore):
+        self._store = store
+        self._cache: "OrderedDict[str, object]" = OrderedDict()
+
+    def _cached(self, key: str):
+        value = self._cache.get(key)
+        if value is not None:
+            self._cache.move_to_end(key)
+        return value
+
+    def _remember(self, key: str, value) -> None:
+        self._cache[key] = value
+        if len(self._cache) > self._store.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+
+def is_lazy_catalog(catalog) -> bool:
+    """Справочник хранится в базе (а не во встроенном словаре)"""
+    return isinstance(catalog, CatalogView)
+
+
+def catalog_store(catalog) -> Optional[CatalogStore]:
+    """База справочника (None - встроенный словарь)"""
+    return catalog._store if isinstance(catalog, CatalogView) else None
+
+
+class MaterialsView(CatalogView, MutableMapping):
+    """Адаптер MATERIALS: имя -> Material"""
+
+    def __getitem__(self, name: str):
+        material = self._cached(name)
+        if material is None:
+            rows = self._store.execute(f"SELECT {_MATERIAL_COLUMNS} FROM materials WHERE name = ?", (name,))
+            if not rows:
+                raise KeyError(name)
+            material = _material_from_row(rows[0])
+            self._remember(name, material)
+        return material
+
+    def __contains__(self, name) -> bool:
+        return name in self._cache or bool(self._store.execute("SELECT 1 FROM materials WHERE name = ?", (name,)))
+
+    def __setitem__(self, name: str, material) -> None:
+        self._store.put_materials([material])
+
+    def __delitem__(self, name: str) -> None:
+        self._store.execute("DELETE FROM materials WHERE name = ?", (name,))
+        self.clear_cache()
+
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self._store.iterate("name", "materials"))
+
+    def __len__(self) -> int:
+        return self._store.execute("SELECT COUNT(*) FROM materials")[0][0]
+
+    def values(self):
+        return (_material_from_row(row) for row in self._store.iterate(_MATERIAL_COLUMNS, "materials"))
+
+    def items(self):
+        return ((material.name, material) for material in self.values())
+
+
+class MaterialGroupsView(CatalogView, Mapping):
+    """Адаптер MATERIAL_GROUPS: группа -> список имен материалов (по индексу групп)"""
+
+    def __getitem__(self, group: str) -> List[str]:
+        names = [row[0] for row in self._store.execute(
+            "SELECT name FROM materials WHERE grp = ? ORDER BY id", (group,))]
+        if not names:
+            raise KeyError(group)
+        return names
+
+    def __contains__(self, group) -> bool:
+        return bool(self._store.execute("SELECT 1 FROM materials WHERE grp = ? LIMIT 1", (group,)))
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._store.execute("SELECT grp FROM materials GROUP BY grp ORDER BY MIN(id)")
+        return (row[0] for row in rows)
+
+    def __len__(self) -> int:
+        return self._store.execute("SELECT COUNT(DISTINCT grp) FROM materials")[0][0]
+
+
+class ToolsView(CatalogView, MutableMapping):
+    """Адаптер TURNING_TOOLS / MILLING_TOOLS: имя -> CuttingTool"""
+
+    def __init__(self, store: CatalogStore, tool_type: str):
+        super().__init__(store)
+        self.tool_type = tool_type
+
+    def __getitem__(self, name: str):
+        tool = self._cached(name)
+        if tool is None:
+            rows = self._store.execute(
+                f"SELECT {_TOOL_COLUMNS} FROM tools WHERE tool_type = ? AND name = ?", (self.tool_type, name))
+            if not rows:
+                raise KeyError(name)
+            tool = _tool_from_row(rows[0])
+            self._remember(name, tool)
+        return tool
+
+    def __contains__(self, name) -> bool:
+        return name in self._cache or bool(self._store.execute(
+            "SELECT 1 FROM tools WHERE tool_type = ? AND name = ?", (self.tool_type, name)))
+
+    def __setitem__(self, name: str, tool) -> None:
+        self._store.put_tools([tool])
+
+    def __delitem__(self, name: str) -> None:
+        self._store.execute("DELETE FROM tools WHERE tool_type = ? AND name = ?", (self.tool_type, name))
+        self.clear_cache()
+
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self._store.iterate("name", "tools", "tool_type = ?", (self.tool_type,)))
+
+    def __len__(self) -> int:
+        return self._store.execute("SELECT COUNT(*) FROM tools WHERE tool_type = ?", (self.tool_type,))[0][0]
+
+    def values(self):
+        return (_tool_from_row(row) for row in
+                self._store.iterate(_TOOL_COLUMNS, "tools", "tool_type = ?", (self.tool_type,)))
+
+    def items(self):
+        return ((tool.name, tool) for tool in self.values())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "init":
+        print("Использование: python -m database.catalog_store init <catalog.db>")
+        sys.exit(1)
+
+    # Заполнение из встроенных словарей (import выполняется без CNC_CATALOG_DB)
+    from .materials_lib import MATERIALS
+    from .tools_lib import TURNING_TOOLS, MILLING_TOOLS, TOOL_MATERIALS
+
+    store = open_catalog(sys.argv[2])
+    store.seed_materials(MATERIALS)
+    store.seed_tools(TURNING_TOOLS, MILLING_TOOLS, TOOL_MATERIALS)
+    print(f"Каталог {sys.argv[2]}: {len(store.materials)} материалов, "
+          f"{len(store.turning_tools) + len(store.milling_tools)} инструментов")
@@ -0,0 +1,132 @@
+"""
+Совместимость инструмента и обрабатываемого материала по TOOL_MATERIALS.
+
+Каждой группе материалов из TOOL_MATERIALS присваивается бит, каждому
+инструменту каталога - маска групп, которые подходят его материалу:
+проверка пары материал/инструмент - одно чтение словаря и побитовое И.
+Группы, которых нет ни в одном списке TOOL_MATERIALS (например,
+«Алюминий» встроенного каталога), и материалы инструмента вне
+TOOL_MATERIALS не классифицированы и считаются совместимыми со всем:
+отбор не должен закрывать расчет для того, о чем справочник молчит.
+
+Изменения каталога переносятся по записанным инструментам и классификации
+(DatabaseOperations.written_tools, written_tool_materials); пропуск версии -
+полное построение при следующем обращении.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .db_operations import DatabaseOperations
+from .materials_lib import Material
+from .tools_lib import MILLING_TOOLS, TOOL_MATERIALS, TURNING_TOOLS, CuttingTool
+
+# Маска неклассифицированного материала инструмента: подходит всем группам
+ALL_GROUPS = -1
+
+ToolMasks = Dict[str, Tuple[CuttingTool, int]]  # имя -> (инструмент, маска групп)
+
+
+def _catalog(process_type: str):
+    return TURNING_TOOLS if process_type == "turning" else MILLING_TOOLS
+
+
+class CompatibilityMatrix:
+    """Матрица совместимости групп материалов и инструментов каталога (битовые маски)"""
+
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+        self._masks: Dict[str, int] = {}
+        self._tools: Dict[str, ToolMasks] = {}
+        self._lists: Dict[Tuple[str, Optional[str]], List[CuttingTool]] = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _classify(self) -> None:
+        """Биты групп и маски материалов инструмента по TOOL_MATERIALS"""
+        bits: Dict[str, int] = {}
+        for groups in TOOL_MATERIALS.values():
+            for group in groups:
+                bits.setdefault(group, 1 << len(bits))
+        self._bits = bits
+        self._masks = {tool_material: sum(bits[group] for group in set(groups))
+                       for tool_material, groups in TOOL_MATERIALS.items()}
+
+    def _mask(self, tool: CuttingTool) -> int:
+        return self._masks.get(tool.material, ALL_GROUPS)
+
+    def _build(self) -> None:
+        self._classify()
+        self._tools = {process_type: {tool.name: (tool, self._mask(tool)) for tool in _catalog(process_type).values()}
+                       for process_type in ("turning", "milling")}
+        self._lists = {}
+        self._version = DatabaseOperations.version
+
+    def update(self) -> None:
+        """Перенос изменения каталога в матрицу (подписка на изменения каталога)"""
+        with self._lock:
+            if self._version is None or self._version != DatabaseOperations.version - 1:
+                self._version = None
+                return
+            if DatabaseOperations.written_tool_materials:
+                # Классификация - несколько строк: пересчитываются биты и маски всех инструментов
+                self._classify()
+                for tools in self._tools.values():
+                    for name, (tool, _) in tools.items():
+                        tools[name] = (tool, self._mask(tool))
+            for (process_type, name), tool in DatabaseOperations.written_tools.items():
+                tools = self._tools.setdefault(process_type, {})
+                if tool is None:
+                    tools.pop(name, None)
+                else:
+                    tools[name] = (tool, self._mask(tool))
+            self._lists = {}
+            self._version = DatabaseOperations.version
+
+    def _current(self) -> None:
+        with self._lock:
+            if self._version != DatabaseOperations.version:
+                self._build()
+
+    def compatible(self, group: str, tool_material: str) -> bool:
+        """Подходит ли материал инструмента для группы материалов"""
+        if self._version != DatabaseOperations.version:
+            self._current()
+        bit = self._bits.get(group)
+        return bit is None or bool(self._masks.get(tool_material, ALL_GROUPS) & bit)
+
+    def allows(self, material: Material, tool: CuttingTool) -> bool:
+        """Подходит ли инструмент для материала"""
+        return self.compatible(material.group, tool.material)
+
+    def select(self, material: Material, tools: Iterable[CuttingTool]) -> List[CuttingTool]:
+        """Инструменты из tools, подходящие для материала (одна маска на весь список)"""
+        if self._version != DatabaseOperations.version:
+            self._current()
+        bit = self._bits.get(material.group)
+        if bit is None:
+            return list(tools)
+        masks = self._masks
+        return [tool for tool in tools if masks.get(tool.material, ALL_GROUPS) & bit]
+
+    def tools(self, process_type: str, group: Optional[str] = None) -> List[CuttingTool]:
+        """
+        Инструменты каталога, подходящие для группы, в порядке каталога
+        (None - все). Список общий для вызывающих: не изменять.
+        """
+        if self._version != DatabaseOperations.version:
+            self._current()
+        key = (process_type, group)
+        tools = self._lists.get(key)
+        if tools is None:
+            bit = None if group is None else self._bits.get(group)
+            tools = self._lists[key] = [tool for tool, mask in self._tools.get(process_type, {}).values()
+                                        if bit is None or mask & bit]
+        return tools
+
+    def tool_names(self, process_type: str, group: Optional[str] = None) -> List[str]:
+        return [tool.name for tool in self.tools(process_type, group)]
+
+
+# Общая матрица бота; изменения каталога переносятся в нее без перестройки
+COMPATIBILITY = CompatibilityMatrix()
+DatabaseOperations.subscribe(COMPATIBILITY.update)
@@ -1,29 +1,210 @@
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Mapping, Optional, Tuple
 from .materials_lib import MATERIALS, MATERIAL_GROUPS, Material
-from .tools_lib import TURNING_TOOLS, MILLING_TOOLS, CuttingTool
+from .tools_lib import TURNING_TOOLS, MILLING_TOOLS, TOOL_MATERIALS, CuttingTool
+from .catalog_store import catalog_store
+from .validation import check_material, check_tool
+
+# Сколько последних изменений каталога можно откатить
+HISTORY = 10
+
+ToolKey = Tuple[str, str]  # (тип инструмента, имя)
+
+
+class CatalogChange:
+    """
+    Изменение каталога (новая версия): записанные записи и прежнее состояние для отката.
+    Значение None в прежнем состоянии - записи не было.
+    """
+    __slots__ = ("version", "materials", "tools", "groups", "tool_materials",
+                 "previous_materials", "previous_tools", "previous_groups", "previous_tool_materials")
+
+    def __init__(self):
+        self.version = 0
+        self.materials: Dict[str, Optional[Material]] = {}
+        self.tools: Dict[ToolKey, Optional[CuttingTool]] = {}
+        self.groups: Dict[str, Optional[List[str]]] = {}
+        self.tool_materials: Dict[str, Optional[List[str]]] = {}
+        self.previous_materials: Dict[str, Optional[Material]] = {}
+        self.previous_tools: Dict[ToolKey, Optional[CuttingTool]] = {}
+        self.previous_groups: Dict[str, Optional[List[str]]] = {}
+        self.previous_tool_materials: Dict[str, Optional[List[str]]] = {}
+
+
+def _tools(tool_type: str):
+    return TURNING_TOOLS if tool_type == "turning" else MILLING_TOOLS
+
+
+def _replace(catalog, target: Mapping) -> None:
+    """Запись значений в словарь каталога одним update (None - удалить)"""
+    catalog.update({key: value for key, value in target.items() if value is not None})
+    for key, value in target.items():
+        if value is None:
+            catalog.pop(key, None)
+
 
 class DatabaseOperations:
+    # Версия каталога: увеличивается при каждом изменении справочников
+    version = 0
+    _listeners: List[Callable[[], None]] = []
+    _lock = threading.RLock()
+    _history: Deque[CatalogChange] = deque(maxlen=HISTORY)
+    # Записи последнего изменения (None - удалена): подписчики
+    # с инкрементальным обновлением читают их при уведомлении
+    written_materials: Mapping[str, Optional[Material]] = {}
+    written_tools: Mapping[ToolKey, Optional[CuttingTool]] = {}
+    written_tool_materials: Mapping[str, Optional[List[str]]] = {}
+
+    @staticmethod
+    def subscribe(listener: Callable[[], None]) -> None:
+        """Подписка на изменения каталога материалов и инструментов"""
+        DatabaseOperations._listeners.append(listener)
+
+    @staticmethod
+    def _catalog_changed() -> None:
+        DatabaseOperations.version += 1
+        for listener in DatabaseOperations._listeners:
+            listener()
+
+    @staticmethod
+    def _group_lists(materials: Mapping[str, Material],
+                     previous: Mapping[str, Optional[Material]]) -> Dict[str, Optional[List[str]]]:
+        """
+        Новые списки групп для встроенного каталога: один проход по изменениям,
+        удаление из группы - фильтрацией списка один раз, а не поиском по имени
+        """
+        removed: Dict[str, set] = {}
+        added: Dict[str, List[str]] = {}
+        for name, material in materials.items():
+            old = previous.get(name)
+            if old is not None and old.group == material.group:
+                continue
+            if old is not None:
+                removed.setdefault(old.group, set()).add(name)
+            added.setdefault(material.group, []).append(name)
+
+        lists = {}
+        for group in dict.fromkeys([*removed, *added]):
+            names = MATERIAL_GROUPS.get(group, [])
+            if group in removed:
+                names = [name for name in names if name not in removed[group]]
+            lists[group] = names + added.get(group, []) or None
+        return lists
+
+    @staticmethod
+    def _write(materials: Mapping[str, Optional[Material]], tools: Mapping[ToolKey, Optional[CuttingTool]],
+               groups: Mapping[str, Optional[List[str]]], tool_materials: Mapping[str, Optional[List[str]]]) -> None:
+        """Запись состояния справочников (None - удалить запись)"""
+        DatabaseOperations.written_materials = materials
+        DatabaseOperations.written_tools = tools
+        DatabaseOperations.written_tool_materials = tool_materials
+        store = catalog_store(MATERIALS)
+        if store is not None:
+            # Каталог в SQLite: одна транзакция, группы материалов - индекс базы
+            added, removed = [], []
+            for tool_material, target in tool_materials.items():
+                current, target = set(TOOL_MATERIALS.get(tool_material) or ()), set(target or ())
+                added.extend((tool_material, group) for group in target - current)
+                removed.extend((tool_material, group) for group in current - target)
+            store.apply_change(
+                materials=[material for material in materials.values() if material is not None],
+                tools=[tool for tool in tools.values() if tool is not None],
+                tool_material_groups=added,
+                remove_materials=[name for name, material in materials.items() if material is None],
+                remove_tools=[key for key, tool in tools.items() if tool is None],
+                remove_tool_material_groups=removed,
+            )
+        else:
+            _replace(MATERIALS, materials)
+            _replace(MATERIAL_GROUPS, groups)
+            for tool_type in ("turning", "milling"):
+                _replace(_tools(tool_type), {name: tool for (kind, name), tool in tools.items() if kind == tool_type})
+        _replace(TOOL_MATERIALS, tool_materials)
+
+    @staticmethod
+    def apply(materials: Iterable[Material] = (), tools: Iterable[CuttingTool] = (),
+              tool_materials: Optional[Mapping[str, Iterable[str]]] = None) -> CatalogChange:
+        """
+        Применение набора записей как новой версии каталога.
+        Записи с существующими именами заменяются. Подписчики (предрасчет коэффициентов,
+        маршруты, поиск) уведомляются один раз; если уведомление не удалось - изменение откатывается.
+        Записи должны быть проверены (database.validation).
+        :param tool_materials: дополнительные группы материалов для материалов инструмента
+        """
+        with DatabaseOperations._lock:
+            change = CatalogChange()
+            change.materials = {material.name: material for material in materials}
+            change.tools = {(tool.tool_type, tool.name): tool for tool in tools}
+            change.previous_materials = {name: MATERIALS.get(name) for name in change.materials}
+            change.previous_tools = {key: _tools(key[0]).get(key[1]) for key in change.tools}
+            if catalog_store(MATERIALS) is None:
+                change.groups = DatabaseOperations._group_lists(change.materials, change.previous_materials)
+                change.previous_groups = {group: MATERIAL_GROUPS.get(group) for group in change.groups}
+            for tool_material, groups in (tool_materials or {}).items():
+                current = TOOL_MATERIALS.get(tool_material) or []
+                missing = [group for group in dict.fromkeys(groups) if group not in current]
+                if missing:
+                    change.tool_materials[tool_material] = current + missing
+                    change.previous_tool_materials[tool_material] = TOOL_MATERIALS.get(tool_material)
+
+            DatabaseOperations._write(change.materials, change.tools, change.groups, change.tool_materials)
+            try:
+                DatabaseOperations._catalog_changed()
+            except Exception:
+                DatabaseOperations._restore(change)
+                raise
+            change.version = DatabaseOperations.version
+            DatabaseOperations._history.append(change)
+            return change
+
     @staticmethod
-    def add_material(name: str, group: str, hardness: float, 
+    def _restore(change: CatalogChange) -> None:
+        DatabaseOperations._write(change.previous_materials, change.previous_tools,
+                                  change.previous_groups, change.previous_tool_materials)
+        DatabaseOperations._catalog_changed()
+
+    @staticmethod
+    def rollback() -> Optional[CatalogChange]:
+        """Откат последнего изменения каталога (новая версия с прежним состоянием); None - нечего откатывать"""
+        with DatabaseOperations._lock:
+            if not DatabaseOperations._history:
+                return None
+            change = DatabaseOperations._history.pop()
+            DatabaseOperations._restore(change)
+            return change
+
+    @staticmethod
+    def add_material(name: str, group: str, hardness: float,
                     tensile_strength: float, speed_range: tuple, feed_range: tuple) -> bool:
-        if name in MATERIALS:
-            return False
-            
-        MATERIALS[name] = Material(name, group, hardness, tensile_strength, speed_range, feed_range)
-        
-        if group not in MATERIAL_GROUPS:
-            MATERIAL_GROUPS[group] = []
-        MATERIAL_GROUPS[group].append(name)
-        
+        """
+        Добавление материала (новая версия каталога, как apply).
+        Запись проверяется check_material: имя и группа без крайних пробелов,
+        числа - в пределах validation.LIMITS.
+        :return: False, если материал с таким именем уже есть (каталог не меняется)
+        :raises CatalogError: (подкласс ValueError) пустое имя или группа, значения вне
+            допустимых диапазонов; каталог не меняется
+        """
+        material = check_material(Material(name, group, hardness, tensile_strength, speed_range, feed_range))
+        with DatabaseOperations._lock:
+            if material.name in MATERIALS:
+                return False
+            DatabaseOperations.apply(materials=[material])
         return True
 
     @staticmethod
     def add_tool(name: str, tool_type: str, tool_material: str, **kwargs) -> bool:
-        if tool_type == "turning":
-            if name in TURNING_TOOLS:
-                return False
-            TURNING_TOOLS[name] = CuttingTool(name, tool_type, tool_material, **kwargs)
-        else:
-            if name in MILLING_TOOLS:
+        """
+        Добавление инструмента (kwargs - diameter, cutting_edge_angle), проверка - check_tool.
+        Тип - только validation.TOOL_TYPES: инструмент неизвестного типа отклоняется,
+        а не записывается во фрезерные, как раньше; у фрезы обязателен диаметр.
+        :return: False, если инструмент этого типа с таким именем уже есть (каталог не меняется)
+        :raises CatalogError: (подкласс ValueError) неизвестный тип, нет диаметра фрезы,
+            значения вне допустимых диапазонов; каталог не меняется
+        """
+        tool = check_tool(CuttingTool(name, tool_type, tool_material, **kwargs))
+        with DatabaseOperations._lock:
+            if tool.name in _tools(tool.tool_type):
                 return False
-            MILLING_TOOLS[name] = CuttingTool(name, tool_type, tool_material, **kwargs)
-        return True
\ No newline at end of file
+            DatabaseOperations.apply(tools=[tool])
+        return True
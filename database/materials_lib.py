@@ -1,3 +1,4 @@
+import os
 from dataclasses import dataclass
 from typing import Tuple, Union
 
@@ -9,6 +10,7 @@ class Material:
     tensile_strength: float  # Предел прочности (МПа)
     recommended_speed: Union[float, Tuple[float, float]]  # м/мин
     recommended_feed: Union[float, Tuple[float, float]]  # мм/об
+    inferred: bool = False  # Рассчитан по твердости и прочности (calculations/regime_model.py), не из каталога
 
 # ГОСТ материалы
 MATERIALS = {
@@ -26,4 +28,18 @@ MATERIAL_GROUPS = {
     "Легированная сталь": ["Сталь 40Х"],
     "Нержавеющая сталь": ["12Х18Н10Т", "08Х13"],
     "Алюминий": ["Алюминий АД1"],
-}
\ No newline at end of file
+}
+
+# Каталог в SQLite вместо встроенных словарей (см. database/catalog_store.py)
+if os.environ.get("CNC_CATALOG_DB"):
+    from .catalog_store import open_catalog
+    _catalog = open_catalog(os.environ["CNC_CATALOG_DB"])
+    _catalog.seed_materials(MATERIALS)
+    MATERIALS, MATERIAL_GROUPS = _catalog.materials, _catalog.material_groups
+# Снимок каталога вместо встроенных словарей (см. database/catalog_snapshot.py)
+elif os.environ.get("CNC_CATALOG_SNAPSHOT"):
+    from .catalog_snapshot import current
+    _snapshot = current()
+    if _snapshot is not None:
+        MATERIALS = {row[0]: Material(*row) for row in _snapshot["materials"]}
+        MATERIAL_GROUPS = {group: list(names) for group, names in _snapshot["material_groups"].items()}
@@ -0,0 +1,179 @@
+import heapq
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Латинские буквы, похожие на кириллические: "40X" и "40Х" должны совпадать
+_LOOKALIKES = str.maketrans({
+    "a": "а", "b": "в", "c": "с", "e": "е", "h": "н", "k": "к", "m": "м",
+    "o": "о", "p": "р", "t": "т", "x": "х", "y": "у", "ё": "е",
+})
+_TOKEN = re.compile(r"[0-9a-zа-я]+")
+
+
+def normalize(text: str) -> List[str]:
+    """Слова запроса/названия: нижний регистр, латиница-двойники -> кириллица"""
+    return _TOKEN.findall(text.lower().translate(_LOOKALIKES))
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Индекс поиска по названиям.
+    Точные и префиксные совпадения слов ищутся бинарным поиском по
+    отсортированному списку слов, опечатки - по триграммам с ранжированием
+    по коэффициенту Дайса.
+    """
+
+    def __init__(self, names: Iterable[str], min_similarity: float = 0.4, common_gram_share: float = 0.01):
+        """
+        :param names: названия записей каталога
+        :param min_similarity: минимальное сходство для нечеткого поиска (0..1)
+        :param common_gram_share: триграммы, встречающиеся чаще этой доли записей,
+            не используются для отбора кандидатов (как стоп-слова)
+        """
+        self.names: List[str] = list(names)
+        self.min_similarity = min_similarity
+        self._keys: List[str] = []
+        self._tokens: List[Tuple[str, ...]] = []
+        self._words: List[Tuple[str, int]] = []
+        grams: Dict[str, List[int]] = defaultdict(list)
+        self._gram_counts: List[int] = []
+
+        for entry_id, name in enumerate(self.names):
+            tokens = normalize(name)
+            key = "".join(tokens)
+            if key not in tokens:
+                tokens.append(key)
+            self._keys.append(key)
+            self._tokens.append(tuple(tokens))
+            self._words.extend((token, entry_id) for token in set(tokens))
+            entry_grams = _trigrams(key)
+            self._gram_counts.append(len(entry_grams))
+            for gram in entry_grams:
+                grams[gram].append(entry_id)
+
+        self._words.sort()
+        self._word_list = [word for word, _ in self._words]
+        self._grams = dict(grams)
+        self._max_posting = max(50, int(len(self.names) * common_gram_share))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _prefix_range(self, token: str) -> Tuple[int, int]:
+        """Диапазон отсортированного списка слов с данным префиксом"""
+        return (bisect_left(self._word_list, token),
+                bisect_left(self._word_list, token + "\U0010ffff"))
+
+    def _prefix_search(self, tokens: List[str], limit: int) -> List[int]:
+        # Перебираем записи самого редкого слова запроса, остальные слова проверяем по записи
+        start, end = min((self._prefix_range(token) for token in tokens), key=lambda r: r[1] - r[0])
+        found, seen = [], set()
+        for position in range(start, end):
+            entry_id = self._words[position][1]
+            if entry_id in seen:
+                continue
+            seen.add(entry_id)
+            entry_tokens = self._tokens[entry_id]
+            if len(tokens) == 1 or all(any(word.startswith(token) for word in entry_tokens) for token in tokens):
+                found.append(entry_id)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def _fuzzy_search(self, key: str, limit: int, exclude: set) -> List[int]:
+        query_grams = _trigrams(key)
+        postings = [self._grams[gram] for gram in query_grams if gram in self._grams]
+        selective = [posting for posting in postings if len(posting) <= self._max_posting]
+        counts: Dict[int, int] = defaultdict(int)
+        for posting in (selective or postings):
+            for entry_id in posting:
+                counts[entry_id] += 1
+
+        # Точное сходство считаем только для лучших кандидатов по редким триграммам
+        if selective and len(selective) < len(postings):
+            shortlist = heapq.nlargest(max(limit * 4, 50), counts, key=counts.__getitem__)
+            counts = {entry_id: len(query_grams & _trigrams(self._keys[entry_id])) for entry_id in shortlist}
+
+        scored = []
+        for entry_id, shared in counts.items():
+            if entry_id in exclude:
+                continue
+            score = 2 * shared / (len(query_grams) + self._gram_counts[entry_id])
+            if score >= self.min_similarity:
+                scored.append((score, -len(self._keys[entry_id]), -entry_id))
+        return [-entry_id for _, _, entry_id in heapq.nlargest(limit, scored)]
+
+    def has_prefix(self, token: str) -> bool:
+        """Есть ли в названиях слово с таким началом"""
+        start, end = self._prefix_range(token)
+        return start < end
+
+    def match_ids(self, tokens: List[str], limit: int = 10) -> List[int]:
+        """Номера записей, в названии которых есть слова с началами tokens (без нечеткого поиска)"""
+        return self._prefix_search(tokens, limit) if tokens else []
+
+    def search_ids(self, query: str, offset: int = 0, limit: int = 10) -> List[int]:
+        """Номера записей: сначала префиксные совпадения, затем нечеткие"""
+        tokens = normalize(query)
+        if not tokens:
+            return []
+        wanted = offset + limit
+        found = self._prefix_search(tokens, wanted)
+        if len(found) < wanted:
+            found += self._fuzzy_search("".join(tokens), wanted - len(found), set(found))
+        return found[offset:wanted]
+
+    def search(self, query: str, offset: int = 0, limit: int = 10) -> List[str]:
+        """Названия, подходящие под запрос, с постраничной выдачей"""
+        return [self.names[entry_id] for entry_id in self.search_ids(query, offset, limit)]
+
+
+class CatalogSearch:
+    """
+    Индексы поиска по справочникам бота; пересобираются при изменении каталога.
+    Индекс строится по именам (справочник в SQLite отдает их потоком, пачками), записи
+    не читаются. В памяти - названия, слова и триграммы: около 1.1 КБ на запись
+    при названиях ~30 символов (tests/test_catalog_memory.py).
+    """
+
+    def __init__(self, catalogs: Dict[str, object]):
+        """
+        :param catalogs: вид справочника -> словарь (или адаптер) имя -> запись
+        """
+        self._catalogs = catalogs
+        self._indexes: Dict[str, SearchIndex] = {}
+        self.version = 0
+
+    def rebuild(self) -> None:
+        self._indexes = {}
+        self.version += 1
+
+    def index(self, kind: str) -> SearchIndex:
+        """Индекс справочника (строится при первом обращении)"""
+        index = self._indexes.get(kind)
+        if index is None:
+            index = self._indexes[kind] = SearchIndex(self._catalogs[kind].keys())
+        return index
+
+    def search(self, kind: str, query: str, offset: int = 0, limit: int = 10) -> Tuple[List[Tuple[int, str]], bool]:
+        """
+        Страница результатов: [(номер, название)] и признак следующей страницы.
+        Номера действительны, пока не изменилась version.
+        """
+        index = self.index(kind)
+        ids = index.search_ids(query, offset, limit + 1)
+        return [(entry_id, index.names[entry_id]) for entry_id in ids[:limit]], len(ids) > limit
+
+    def resolve(self, kind: str, version: int, entry_id: int) -> Optional[str]:
+        """Название по номеру из результатов поиска (None, если каталог изменился)"""
+        if version != self.version or kind not in self._catalogs:
+            return None
+        names = self.index(kind).names
+        return names[entry_id] if 0 <= entry_id < len(names) else None
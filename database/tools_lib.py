@@ -1,3 +1,4 @@
+import os
 from dataclasses import dataclass
 from typing import Optional
 
@@ -38,4 +39,19 @@ MILLING_TOOLS = {
 OPERATIONS = {
     "turning": ["Наружное точение", "Растачивание", "Подрезание", "Резьбонарезание", "Отрезание"],
     "milling": ["Торцевое фрезерование", "Контурное фрезерование", "Черновое фрезерование", "Чистовое фрезерование", "Спиральное фрезерование"],
-}
\ No newline at end of file
+}
+
+# Каталог в SQLite вместо встроенных словарей (см. database/catalog_store.py)
+if os.environ.get("CNC_CATALOG_DB"):
+    from .catalog_store import open_catalog
+    _catalog = open_catalog(os.environ["CNC_CATALOG_DB"])
+    _catalog.seed_tools(TURNING_TOOLS, MILLING_TOOLS, TOOL_MATERIALS)
+    TURNING_TOOLS, MILLING_TOOLS = _catalog.turning_tools, _catalog.milling_tools
+# Снимок каталога вместо встроенных словарей (см. database/catalog_snapshot.py)
+elif os.environ.get("CNC_CATALOG_SNAPSHOT"):
+    from .catalog_snapshot import current
+    _snapshot = current()
+    if _snapshot is not None:
+        TURNING_TOOLS = {row[0]: CuttingTool(*row) for row in _snapshot["turning_tools"]}
+        MILLING_TOOLS = {row[0]: CuttingTool(*row) for row in _snapshot["milling_tools"]}
+        TOOL_MATERIALS = {material: list(groups) for material, groups in _snapshot["tool_materials"].items()}
@@ -0,0 +1,152 @@
+"""
+Проверка записей каталога: обязательные поля и допустимые диапазоны значений.
+Записи из файлов импорта (строки CSV, объекты JSON) приводятся к Material/CuttingTool.
+"""
+from typing import List, Mapping, Optional, Tuple, Union
+
+from .materials_lib import Material
+from .tools_lib import CuttingTool
+
+# Допустимые диапазоны значений (включительно)
+LIMITS = {
+    "hardness": (1, 800),  # HB
+    "tensile_strength": (1, 3000),  # МПа
+    "recommended_speed": (1, 2000),  # м/мин
+    "recommended_feed": (0.001, 5),  # мм/об
+    "diameter": (0.1, 500),  # мм
+    "cutting_edge_angle": (1, 179),  # градусы
+}
+NAME_LENGTH = 100
+TOOL_TYPES = ("turning", "milling")
+
+Number = Union[int, float]
+
+
+class CatalogError(ValueError):
+    """Недопустимая запись каталога"""
+
+
+def _number(field: str, value) -> Number:
+    """Число из записи (в CSV - строка, допускается десятичная запятая)"""
+    if isinstance(value, bool):
+        raise CatalogError(f"{field}: ожидается число")
+    if isinstance(value, str):
+        try:
+            value = float(value.strip().replace(",", "."))
+        except ValueError:
+            raise CatalogError(f"{field}: не число «{value}»") from None
+    if not isinstance(value, (int, float)) or value != value:
+        raise CatalogError(f"{field}: ожидается число")
+    # Целые значения - int, как во встроенном каталоге
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+def _check_range(field: str, value: Number) -> Number:
+    low, high = LIMITS[field]
+    if not low <= value <= high:
+        raise CatalogError(f"{field}: {value} вне диапазона {low}-{high}")
+    return value
+
+
+def _check_name(field: str, value) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise CatalogError(f"{field}: не заполнено")
+    value = value.strip()
+    if len(value) > NAME_LENGTH or "\n" in value or value.startswith("/"):
+        raise CatalogError(f"{field}: недопустимое значение «{value[:NAME_LENGTH]}»")
+    return value
+
+
+def _check_interval(field: str, value) -> Union[Number, Tuple[Number, Number]]:
+    if isinstance(value, (tuple, list)):
+        if len(value) != 2:
+            raise CatalogError(f"{field}: ожидается число или диапазон (мин., макс.)")
+        low, high = (_check_range(field, _number(field, item)) for item in value)
+        if low > high:
+            raise CatalogError(f"{field}: минимум {low} больше максимума {high}")
+        return low, high
+    return _check_range(field, _number(field, value))
+
+
+def check_material(material: Material) -> Material:
+    """Проверенная запись материала (имена без лишних пробелов); CatalogError - при ошибке"""
+    return Material(
+        _check_name("name", material.name),
+        _check_name("group", material.group),
+        _check_range("hardness", _number("hardness", material.hardness)),
+        _check_range("tensile_strength", _number("tensile_strength", material.tensile_strength)),
+        _check_interval("recommended_speed", material.recommended_speed),
+        _check_interval("recommended_feed", material.recommended_feed),
+    )
+
+
+def check_tool(tool: CuttingTool) -> CuttingTool:
+    """Проверенная запись инструмента; CatalogError - при ошибке"""
+    if tool.tool_type not in TOOL_TYPES:
+        raise CatalogError(f"tool_type: ожидается {' или '.join(TOOL_TYPES)}, получено «{tool.tool_type}»")
+    if tool.tool_type == "milling" and tool.diameter is None:
+        raise CatalogError("diameter: обязателен для фрезы")
+    return CuttingTool(
+        _check_name("name", tool.name),
+        tool.tool_type,
+        _check_name("material", tool.material),
+        None if tool.diameter is None else _check_range("diameter", _number("diameter", tool.diameter)),
+        None if tool.cutting_edge_angle is None else
+        _check_range("cutting_edge_angle", _number("cutting_edge_angle", tool.cutting_edge_angle)),
+    )
+
+
+def _optional(record: Mapping, field: str):
+    """Значение поля; пустая ячейка CSV - отсутствие значения"""
+    value = record.get(field)
+    return None if value is None or value == "" else value
+
+
+def _interval(record: Mapping, field: str, prefix: str):
+    """Диапазон из поля (число, [мин., макс.], "мин.-макс.") или из пары столбцов prefix_min/prefix_max"""
+    value = _optional(record, field)
+    if value is None:
+        low, high = _optional(record, f"{prefix}_min"), _optional(record, f"{prefix}_max")
+        if low is None:
+            raise CatalogError(f"{field}: не заполнено")
+        return low if high is None else (low, high)
+    if isinstance(value, str) and "-" in value.strip().lstrip("-"):
+        return tuple(value.split("-", 1))
+    return value
+
+
+def material_from_record(record: Mapping) -> Material:
+    """Материал из записи файла импорта (поля как у Material; диапазоны - см. _interval)"""
+    for field in ("hardness", "tensile_strength"):
+        if _optional(record, field) is None:
+            raise CatalogError(f"{field}: не заполнено")
+    return check_material(Material(
+        record.get("name"),
+        record.get("group"),
+        record["hardness"],
+        record["tensile_strength"],
+        _interval(record, "recommended_speed", "speed"),
+        _interval(record, "recommended_feed", "feed"),
+    ))
+
+
+def tool_from_record(record: Mapping) -> Tuple[CuttingTool, Optional[List[str]]]:
+    """
+    Инструмент из записи файла импорта
+    :return: (инструмент, группы материалов для материала инструмента из поля groups или None)
+    """
+    tool = check_tool(CuttingTool(
+        record.get("name"),
+        (record.get("tool_type") or "").strip(),
+        record.get("material"),
+        _optional(record, "diameter"),
+        _optional(record, "cutting_edge_angle"),
+    ))
+    groups = _optional(record, "groups")
+    if groups is None:
+        return tool, None
+    if isinstance(groups, str):
+        groups = groups.split(";")
+    if not isinstance(groups, list):
+        raise CatalogError("groups: ожидается список групп материалов")
+    return tool, [_check_name("groups", group) for group in groups if not isinstance(group, str) or group.strip()]
@@ -1,12 +1,23 @@
-import telebot
-from telebot import types
 import logging
+import threading
+from types import SimpleNamespace
 from config import BOT_TOKEN, ADMIN_CHAT_ID
 from database.materials_lib import MATERIALS, MATERIAL_GROUPS
 from database.tools_lib import TURNING_TOOLS, MILLING_TOOLS, OPERATIONS
-from calculations.turning_calc import TurningCalculator
-from calculations.milling_calc import MillingCalculator
+from calculations.turning_calc import TURNING_COEFFICIENTS
+from calculations.milling_calc import MILLING_COEFFICIENTS
+from database import catalog_snapshot
+from database.compatibility import COMPATIBILITY
+from database.db_operations import DatabaseOperations
+from database.search_index import CatalogSearch
+from utils.formatter import ResultFormatter
 from utils.keyboards import Keyboards
+from utils.router import MessageRouter
+from utils.sessions import SessionStore, MemorySessionStore, SqliteSessionStore
+from runtime.replies import deliver
+from runtime.jobs import BackgroundJobs
+from runtime.outbound import PRIORITY_MENU, PRIORITY_RESULT
+from utils.metrics import REGISTRY, MetricsServer
 
 
 # Настройка логирования
@@ -16,131 +27,532 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-bot = telebot.TeleBot(BOT_TOKEN)
+# Синхронный TeleBot создается при первом обращении (get_bot): импорт telebot - большая часть
+# времени запуска, а асинхронному режиму он нужен только для фоновых задач (выгрузки, файлы)
+_bot = None
+bot_lock = threading.Lock()
 
-class UserState:
-    def __init__(self):
-        self.reset()
-        
-    def reset(self):
-        self.process_type = None  # turning/milling
-        self.operation = None
-        self.material = None
-        self.tool = None
-        self.calculator = None
-        self.awaiting_input = None  # diameter/teeth/etc
+def get_bot():
+    global _bot
+    with bot_lock:
+        if _bot is None:
+            import telebot
+
+            _bot = telebot.TeleBot(BOT_TOKEN)
+            register_handlers(_bot)
+    return _bot
+
+def __getattr__(name):
+    # main.bot - тот же бот для кода снаружи модуля (запуск, нагрузочные тесты)
+    if name == "bot":
+        return get_bot()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class BotMethods:
+    """Методы бота для deliver: в асинхронном режиме вызов копится, и бот не создается"""
+
+    def __getattr__(self, method):
+        return getattr(get_bot(), method)
+
+bot_methods = BotMethods()
+
+# Метрики: время обработчиков, расчетов и отправки (экспорт - --metrics-port, сводка - /stats)
+HANDLER_SECONDS = REGISTRY.histogram("cnc_handler_seconds", "Время обработчика сообщения", "handler")
+CALCULATION_SECONDS = REGISTRY.histogram("cnc_calculation_seconds", "Время расчета режимов", "calculator")
+SEND_SECONDS = REGISTRY.histogram("cnc_send_seconds", "Время отправки ответа (постановки в очередь)", "method")
 
-user_states = {}
+# Таблица маршрутов пересобирается при изменении каталога
+router = MessageRouter(HANDLER_SECONDS)
+DatabaseOperations.subscribe(router.rebuild)
+
+# Предрасчет коэффициентов режимов по всему каталогу (или готовые таблицы из снимка каталога)
+snapshot = catalog_snapshot.current()
+for name, coefficients in (("turning", TURNING_COEFFICIENTS), ("milling", MILLING_COEFFICIENTS)):
+    table = catalog_snapshot.coefficients(snapshot, name)
+    if table is None:
+        coefficients.build()
+    else:
+        coefficients.restore(table)
+    DatabaseOperations.subscribe(coefficients.build)
+
+# Сессии пользователей: в памяти (LRU+TTL) или в SQLite (--sessions)
+sessions: SessionStore = MemorySessionStore()
 
 def get_user_state(user_id):
-    if user_id not in user_states:
-        user_states[user_id] = UserState()
-    return user_states[user_id]
+    return sessions.get(user_id)
+
+def cache_samples():
+    """Попадания и промахи таблиц коэффициентов и кэшей оборотов"""
+    for name, table in (("turning", TURNING_COEFFICIENTS), ("milling", MILLING_COEFFICIENTS)):
+        stats = table.stats()
+        yield {"cache": f"{name}_coefficients", "result": "hit"}, stats["hits"]
+        yield {"cache": f"{name}_coefficients", "result": "miss"}, stats["misses"]
+        yield {"cache": f"{name}_rpm", "result": "hit"}, stats["rpm_hits"]
+        yield {"cache": f"{name}_rpm", "result": "miss"}, stats["rpm_misses"]
+    stats = inline_queries.stats() if inline_queries is not None else {"hits": 0, "misses": 0}
+    yield {"cache": "inline_results", "result": "hit"}, stats["hits"]
+    yield {"cache": "inline_results", "result": "miss"}, stats["misses"]
+
+REGISTRY.callback("cnc_sessions", "Сессии пользователей в хранилище", lambda: len(sessions))
+REGISTRY.callback("cnc_cache_lookups_total", "Обращения к кэшам расчетов", cache_samples, kind="counter")
+
+# Очередь исходящих сообщений (--outbound); None - отправка из обработчика
+outbound = None
+
+def send_message(chat_id, text, priority=PRIORITY_MENU, **kwargs):
+    """
+    Отправка ответа пользователю (в асинхронном режиме - после обработчика,
+    с очередью исходящих - в порядке приоритета и с учетом лимитов Telegram)
+    """
+    with SEND_SECONDS.labels("send_message").time():
+        if outbound is not None:
+            return outbound.send_message(chat_id, text, priority, **kwargs)
+        return deliver(bot_methods, "send_message", chat_id, text, **kwargs)
 
-# Форматирование результатов
+def calculate(calculator, **params):
+    """Расчет режимов с учетом времени в метриках"""
+    with CALCULATION_SECONDS.labels(calculator.__name__).time():
+        return calculator.calculate(**params)
+
+# Поиск по набранному названию материала или инструмента
+catalog_search = CatalogSearch({"material": MATERIALS, "turning": TURNING_TOOLS, "milling": MILLING_TOOLS})
+DatabaseOperations.subscribe(catalog_search.rebuild)
+SEARCH_PAGE_SIZE = 8
+
+# Расчет одной строкой в inline-режиме («@bot токарн 45 Т5К10 50»); ответы - в общем кэше.
+# Создается при первом inline-запросе: режим включается у бота отдельно (/setinline)
+inline_queries = None
+inline_lock = threading.Lock()
+
+def get_inline_queries():
+    global inline_queries
+    with inline_lock:
+        if inline_queries is None:
+            from utils.inline_query import InlineQueries
+            inline_queries = InlineQueries(catalog_search, calculate)
+            DatabaseOperations.subscribe(inline_queries.clear)
+    return inline_queries
+# Сколько секунд Telegram хранит ответ на тот же запрос у себя (запрос не доходит до бота)
+INLINE_CACHE_TIME = 300
+
+def search_kind(user):
+    """Справочник для поиска на текущем шаге диалога (None - выбор не ожидается)"""
+    if user.operation and user.material is None:
+        return "material"
+    if user.material and user.tool is None:
+        return user.process_type
+    return None
+
+# Материал вне каталога: твердость и предел прочности вместо названия («230 750», «HB 230 σв 750 МПа»)
+HARDNESS_LABELS = {"hb", "нв", "σв", "мпа"}
+
+def parse_hardness(text):
+    """(HB, σв) из ввода пользователя; None - ввод не похож на твердость и прочность"""
+    words = [word for word in text.replace(",", ".").lower().split() if word.strip(":=") not in HARDNESS_LABELS]
+    if len(words) != 2:
+        return None
+    try:
+        return float(words[0]), float(words[1])
+    except ValueError:
+        return None
+
+def select_inferred_material(message, user, hardness, tensile_strength):
+    from calculations.regime_model import REGIME_MODEL
+    material = REGIME_MODEL.infer(user.material_group, hardness, tensile_strength)
+    user.material = material
+    speed, feed = material.recommended_speed, material.recommended_feed
+    send_message(message.chat.id,
+                 f"🧪 {material.name}\n"
+                 f"Скорость {speed[0]}-{speed[1]} м/мин, подача {feed[0]}-{feed[1]} мм/об "
+                 f"(по ближайшим материалам каталога)\n\nВыберите инструмент:",
+                 reply_markup=Keyboards.tools_menu(user.process_type, material.group))
+
+def send_search_results(chat_id, kind, query, offset=0):
+    results, has_more = catalog_search.search(kind, query, offset, SEARCH_PAGE_SIZE)
+    if not results:
+        send_message(chat_id, "🔍 Ничего не найдено. Уточните название.")
+        return
+    send_message(chat_id,
+                 f"🔍 Результаты по запросу «{query}»:",
+                 reply_markup=Keyboards.search_results(kind, catalog_search.version, results, query,
+                                                       offset, has_more, SEARCH_PAGE_SIZE))
+
+# Форматирование результатов: шаблоны компилируются один раз на операцию (utils/formatter.py)
 def format_turning_result(result):
-    return (
-        f"⚙️ *Результаты токарной обработки:*\n\n"
-        f"🔧 Операция: {result['operation']}\n"
-        f"📏 Материал: {result['material']}\n"
-        f"🛠 Инструмент: {result['tool']}\n"
-        f"📐 Диаметр: {result['diameter']} мм\n\n"
-        f"⚡ *Параметры:*\n"
-        f"- Скорость резания: {result['speed']} м/мин\n"
-        f"- Подача: {result['feed']} мм/об\n"
-        f"- Обороты: {result['rpm']} об/мин\n\n"
-        f"💡 *Рекомендации:*\n"
-        f"• Используйте СОЖ для охлаждения\n"
-        f"• Для чистовой обработки уменьшите подачу на 20%"
-    )
+    return ResultFormatter.render("turning", result)
 
 def format_milling_result(result):
-    response = (
-        f"⚙️ *Результаты фрезерования:*\n\n"
-        f"🔧 Операция: {result['operation']}\n"
-        f"📏 Материал: {result['material']}\n"
-        f"🛠 Инструмент: {result['tool']}\n"
-        f"📐 Диаметр фрезы: {result['diameter']} мм\n"
-        f"🦷 Зубьев: {result['teeth']}\n\n"
-        f"⚡ *Параметры:*\n"
-        f"- Скорость: {result['speed']} м/мин\n"
-        f"- Подача на зуб: {result['feed_per_tooth']} мм/зуб\n"
-        f"- Обороты: {result['rpm']} об/мин\n"
-        f"- Минутная подача: {result['feed_rate']} мм/мин\n"
-    )
-    
-    if result['operation'] == "Спиральное фрезерование":
-        response += (
-            f"\n🌀 *Параметры спирали:*\n"
-            f"- Шаг между проходами: {result['step_over']} мм\n"
-            f"- Вертикальная подача: {result['plunge_rate']} мм/мин\n"
-            f"- Глубина резания: {result['cutting_depth']} мм\n"
-            f"\n💡 *Рекомендации:*\n"
-            f"• Используйте компрессионные фрезы\n"
-            f"• Начинайте с 70% от расчетной подачи"
+    return ResultFormatter.render("milling", result)
+
+def format_optimization(material, operation, machine, front):
+    lines = [
+        f"📈 *Оптимальные режимы:*\n",
+        f"📏 Материал: {material.name}",
+        f"🔧 Операция: {operation}",
+        f"🏭 Станок: до {machine.max_rpm:.0f} об/мин, до {machine.max_feed_rate:.0f} мм/мин\n",
+        "Съем материала ↑ / шероховатость ↓:",
+    ]
+    for regime in front:
+        lines.append(
+            f"• {regime.tool}, Ø{regime.diameter:g} мм: "
+            f"V={regime.speed:.0f} м/мин, f={regime.feed:.3f}, n={regime.rpm:.0f} об/мин, "
+            f"Vf={regime.feed_rate:.0f} мм/мин → Q={regime.mrr:.1f} см³/мин, Rz≈{regime.roughness:.1f} мкм"
         )
-    return response
+    return "\n".join(lines)
 
 # Обработчики сообщений
-@bot.message_handler(commands=['start', 'help'])
+@router.command(['start', 'help'])
 def handle_start(message):
     user = get_user_state(message.from_user.id)
     user.reset()
-    bot.send_message(message.chat.id,
+    send_message(message.chat.id,
                    "🔧 *CNC Cutting Bot*\nВыберите тип обработки:",
                    reply_markup=Keyboards.main_menu(),
                    parse_mode='Markdown')
 
-@bot.message_handler(func=lambda msg: msg.text in ["Токарная обработка", "Фрезерная обработка"])
+def format_stats():
+    def timings(histogram):
+        return [f"• {name}: {series.count}, p50 {series.quantile(0.5) * 1000:.2f} / "
+                f"p99 {series.quantile(0.99) * 1000:.2f} мс"
+                for name, series in histogram.series()]
+
+    lines = ["📊 Статистика", "", f"👥 Сессий: {len(sessions)}", "", "⏱ Обработчики (число, мс):"]
+    lines += timings(HANDLER_SECONDS)
+    lines += ["", "🧮 Расчеты:"] + timings(CALCULATION_SECONDS)
+    lines += ["", "📤 Отправка:"] + timings(SEND_SECONDS)
+    lines += ["", "💾 Кэши (попадания):"]
+    lookups = {}
+    for labels, value in cache_samples():
+        lookups.setdefault(labels["cache"], {})[labels["result"]] = value
+    for cache, counts in lookups.items():
+        total = counts["hit"] + counts["miss"]
+        lines.append(f"• {cache}: {counts['hit'] / total:.1%} из {total}" if total else f"• {cache}: нет обращений")
+    if outbound is not None:
+        stats = outbound.stats()
+        lines += ["", f"📮 Очередь исходящих: {stats['depth']}, отправлено {stats['sent']}, "
+                      f"склеено {stats['coalesced']}, 429: {stats['throttled']}, ошибок {stats['failed']}, "
+                      f"p99 {stats['latency_p99'] * 1000:.0f} мс"]
+    return "\n".join(lines)
+
+@router.command(['stats'])
+def handle_stats(message):
+    if str(message.chat.id) != str(ADMIN_CHAT_ID):
+        send_message(message.chat.id, "Команда доступна только администратору.")
+        return
+    send_message(message.chat.id, format_stats())
+
+OPTIMIZE_USAGE = "Использование: /optimize [макс. обороты] [макс. минутная подача]\nНапример: /optimize 4000 2000"
+OPTIMIZE_POINTS = 8
+
+@router.command(['optimize'])
+def handle_optimize(message):
+    # Перебор режимов нужен редко: модуль (и concurrent.futures) не грузится при старте
+    from calculations.optimizer import MachineEnvelope, sample_front, sweep_material
+
+    user = get_user_state(message.from_user.id)
+    if user.material is None or user.operation is None:
+        send_message(message.chat.id, "Сначала выберите тип обработки, операцию и материал.")
+        return
+    try:
+        limits = [float(value) for value in message.text.split()[1:3]]
+        if any(value <= 0 for value in limits):
+            raise ValueError(limits)
+        machine = MachineEnvelope(*limits)
+    except ValueError:
+        send_message(message.chat.id, OPTIMIZE_USAGE)
+        return
+
+    tools = COMPATIBILITY.tools(user.process_type, user.material.group)
+    with CALCULATION_SECONDS.labels("optimizer").time():
+        fronts = sweep_material(user.material, user.process_type, tools, machine, operations=[user.operation])
+    front = fronts[user.operation]
+    if not front:
+        send_message(message.chat.id, "⚠️ Нет режимов в пределах возможностей станка.")
+        return
+    send_message(message.chat.id,
+                 format_optimization(user.material, user.operation, machine,
+                                     sample_front(front, OPTIMIZE_POINTS)),
+                 priority=PRIORITY_RESULT,
+                 parse_mode='Markdown')
+
+ESTIMATE_USAGE = {
+    "turning": ("Введите через пробел: <Диаметр детали> <Длина> <Припуск на сторону> <Партия, шт>\n"
+                "Пример: 50 120 3 200"),
+    "milling": ("Введите через пробел: <Длина> <Ширина> <Припуск по глубине> <Партия, шт>\n"
+                "Пример: 200 80 4 50"),
+}
+
+def format_estimate(result):
+    hours = result["batch_time"] / 60
+    lines = [
+        "⏱ *Оценка партии:*\n",
+        f"🔧 Операция: {result['operation']}",
+        f"📏 Материал: {result['material']}",
+        f"🛠 Инструмент: {result['tool']}\n",
+        f"Проходов: {result['passes']}" + (f" × {result['width_passes']} по ширине" if "width_passes" in result else "")
+        + f", глубина {result['depth']:.2f} мм",
+        f"V={result['speed']:.0f} м/мин, n={result['rpm']} об/мин",
+        f"Машинное время детали: {result['cut_time']:.2f} мин",
+        f"Партия {result['batch']} шт: {hours:.1f} ч (со сменой кромок)",
+        f"Стойкость (Тейлор): {result['tool_life']:.0f} мин",
+        f"Расход: кромок {result['edges']:.1f}, "
+        + ("пластин" if "width_passes" not in result else "фрез") + f" {result['tools']}",
+    ]
+    if not result["compatible"]:
+        lines.append("\n⚠️ Материал инструмента не рекомендован для этой группы материалов")
+    return "\n".join(lines)
+
+def estimate(user, text):
+    """Оценка партии по введенным размерам; ValueError - неверный ввод"""
+    from calculations.estimator import MachiningEstimator
+
+    values = [float(value.replace(",", ".")) for value in text.split()]
+    if len(values) != 4 or values[3] != int(values[3]):
+        raise ValueError(text)
+    with CALCULATION_SECONDS.labels("estimator").time():
+        if user.process_type == "turning":
+            return MachiningEstimator.estimate_turning(user.material, user.tool, user.operation,
+                                                       *values[:3], int(values[3]))
+        return MachiningEstimator.estimate_milling(user.material, user.tool, user.operation,
+                                                   *values[:3], int(values[3]))
+
+@router.command(['estimate'])
+def handle_estimate(message):
+    user = get_user_state(message.from_user.id)
+    if user.tool is None:
+        send_message(message.chat.id, "Сначала выберите тип обработки, операцию, материал и инструмент.")
+        return
+    args = message.text.split(maxsplit=1)[1:]
+    if not args:
+        user.awaiting_input = "estimate"
+        send_message(message.chat.id, "⏱ *Оценка партии*\n" + ESTIMATE_USAGE[user.process_type],
+                     reply_markup=Keyboards.remove(), parse_mode='Markdown')
+        return
+    try:
+        result = estimate(user, args[0])
+    except ValueError:
+        send_message(message.chat.id, ESTIMATE_USAGE[user.process_type])
+        return
+    send_message(message.chat.id, format_estimate(result), priority=PRIORITY_RESULT, parse_mode='Markdown')
+
+EXPORT_USAGE = ("Использование: /export [csv|xlsx] [от] [до] [шаг] - диаметры, мм\n"
+                "Например: /export xlsx 10 200 5\n"
+                "Таблица строится для выбранного материала, без выбора - по всему каталогу.")
+# Диапазоны диаметров по умолчанию: (от, до, шаг), мм
+EXPORT_DIAMETERS = {"turning": (10, 500, 10), "milling": (2, 50, 1)}
+EXPORT_MAX_ROWS = 1_000_000
+# Предельный размер документа, отправляемого ботом
+DOCUMENT_LIMIT = 50 * 1024 * 1024
+
+# Выгрузки выполняются в фоне: обработчики диалога их не ждут
+exports = BackgroundJobs(workers=1, name="export")
+REGISTRY.callback("cnc_export_jobs", "Выгрузок в очереди и в работе", exports.active)
+
+def export_chart(chat_id, process_type, materials, output, diameters):
+    """Таблица режимов в документ (временный файл на диске) и отправка в чат"""
+    import tempfile
+    from calculations.regime_chart import COLUMNS, chart_rows
+    from utils.documents import WRITERS
+
+    tools = list((TURNING_TOOLS if process_type == "turning" else MILLING_TOOLS).values())
+    rows = chart_rows(process_type, materials, tools, OPERATIONS[process_type], diameters)
+    title = materials[0].name if len(materials) == 1 else "каталог"
+    try:
+        with tempfile.TemporaryFile() as file:
+            with CALCULATION_SECONDS.labels("export").time():
+                count = WRITERS[output](file, COLUMNS[process_type], rows)
+            if file.tell() > DOCUMENT_LIMIT:
+                send_message(chat_id, "⚠️ Таблица больше 50 МБ. Уменьшите диапазон или увеличьте шаг диаметров.")
+                return
+            file.seek(0)
+            # Документ отправляется мимо очереди исходящих: выгрузки редки, а файл читается с диска
+            with SEND_SECONDS.labels("send_document").time():
+                deliver(bot_methods, "send_document", chat_id, file,
+                        visible_file_name=f"Режимы резания - {title}.{output}",
+                        caption=f"📊 {title}: {count} строк, Ø{diameters.start:g}-{diameters.stop:g} мм")
+    except Exception:
+        send_message(chat_id, "⚠️ Не удалось подготовить таблицу, попробуйте позже.")
+        raise
+
+@router.command(['export'])
+def handle_export(message):
+    from calculations.regime_chart import DiameterRange
+    from utils.documents import WRITERS
+
+    user = get_user_state(message.from_user.id)
+    if user.process_type is None:
+        send_message(message.chat.id, "Сначала выберите тип обработки.\n" + EXPORT_USAGE)
+        return
+    args = message.text.split()[1:]
+    output = args.pop(0).lower() if args and args[0].lower() in WRITERS else "xlsx"
+    try:
+        if len(args) not in (0, 3):
+            raise ValueError(args)
+        bounds = [float(value.replace(",", ".")) for value in args] or EXPORT_DIAMETERS[user.process_type]
+        diameters = DiameterRange(*bounds)
+        if bounds[0] <= 0 or not len(diameters):
+            raise ValueError(bounds)
+    except ValueError:
+        send_message(message.chat.id, EXPORT_USAGE)
+        return
+
+    materials = [user.material] if user.material else list(MATERIALS.values())
+    # Строки только для подходящих материалу инструментов (несовместимые пары не выгружаются)
+    pairs = sum(len(COMPATIBILITY.tools(user.process_type, material.group)) for material in materials)
+    count = pairs * len(OPERATIONS[user.process_type]) * len(diameters)
+    if count > EXPORT_MAX_ROWS:
+        send_message(message.chat.id,
+                     f"⚠️ Получится {count} строк, допускается до {EXPORT_MAX_ROWS}. "
+                     "Выберите материал или увеличьте шаг диаметров.")
+        return
+    if not exports.submit(message.from_user.id, export_chart, message.chat.id, user.process_type,
+                          materials, output, diameters):
+        send_message(message.chat.id, "⏳ Предыдущая выгрузка еще готовится или очередь занята, попробуйте позже.")
+        return
+    send_message(message.chat.id, f"⏳ Готовлю таблицу ({count} строк, {output.upper()}), файл придет следом.")
+
+GCODE_USAGE = ("📋 Отправьте файл управляющей программы (.nc, .tap, .txt) или вставьте ее текст.\n"
+               "S и F проверяются по режимам для выбранных материала, инструмента и операции.")
+# Предельный размер файла, который бот может скачать из Telegram
+GCODE_FILE_LIMIT = 20 * 1024 * 1024
+
+# Проверка загруженных программ выполняется в фоне: скачивание и разбор файла
+program_checks = BackgroundJobs(workers=1, name="gcode")
+REGISTRY.callback("cnc_gcode_jobs", "Проверок программ в очереди и в работе", program_checks.active)
+
+def check_gcode(data, user, source):
+    """
+    Проверка программы по режиму выбранных материала, инструмента и операции
+    :param data: текст программы (bytes) или открытый файл
+    """
+    from calculations.gcode_check import RegimeBounds, check_opened, check_program
+
+    bounds = RegimeBounds.for_regime(user.process_type, user.material, user.tool, user.operation)
+    check = check_program if isinstance(data, bytes) else check_opened
+    with CALCULATION_SECONDS.labels("gcode").time():
+        return check(data, bounds, source)
+
+# Файл скачивается частями во временный файл: программа не читается в память целиком
+DOWNLOAD_CHUNK = 64 * 1024
+
+def download_to(file_path, target):
+    """Скачивание файла Telegram в открытый файл target"""
+    from telebot import apihelper
+
+    url = (apihelper.FILE_URL or "https://api.telegram.org/file/bot{0}/{1}").format(BOT_TOKEN, file_path)
+    with apihelper._get_req_session().get(url, proxies=apihelper.proxy, stream=True,
+                                          timeout=(apihelper.CONNECT_TIMEOUT, apihelper.READ_TIMEOUT)) as response:
+        if response.status_code != 200:
+            raise apihelper.ApiHTTPException("Download file", response)
+        for chunk in response.iter_content(DOWNLOAD_CHUNK):
+            target.write(chunk)
+    target.flush()
+
+def check_uploaded_program(chat_id, file_id, file_name, user):
+    import tempfile
+
+    try:
+        with tempfile.TemporaryFile() as file:
+            download_to(get_bot().get_file(file_id).file_path, file)
+            report = check_gcode(file, user, file_name)
+        send_message(chat_id, report.format(), priority=PRIORITY_RESULT)
+    except Exception:
+        send_message(chat_id, "⚠️ Не удалось проверить программу, попробуйте позже.")
+        raise
+
+@router.command(['gcode'])
+def handle_gcode(message):
+    user = get_user_state(message.from_user.id)
+    if user.tool is None:
+        send_message(message.chat.id, "Сначала выберите тип обработки, операцию, материал и инструмент.")
+        return
+    user.awaiting_input = "gcode"
+    send_message(message.chat.id, GCODE_USAGE, reply_markup=Keyboards.remove())
+
+def handle_document(message):
+    user = get_user_state(message.from_user.id)
+    if user.tool is None:
+        send_message(message.chat.id, "Программа проверяется по режимам: сначала выберите тип обработки, "
+                                      "операцию, материал и инструмент.")
+        return
+    document = message.document
+    if document.file_size and document.file_size > GCODE_FILE_LIMIT:
+        send_message(message.chat.id, "⚠️ Файл больше 20 МБ: бот не может его скачать.")
+        return
+    # Копия выбора: сессия сбрасывается, проверка идет в фоне
+    selection = SimpleNamespace(process_type=user.process_type, material=user.material,
+                                tool=user.tool, operation=user.operation)
+    if not program_checks.submit(message.from_user.id, check_uploaded_program, message.chat.id,
+                                 document.file_id, document.file_name or "программы", selection):
+        send_message(message.chat.id, "⏳ Предыдущая программа еще проверяется, попробуйте позже.")
+        return
+    user.reset()
+    send_message(message.chat.id, "⏳ Проверяю программу, отчет придет следом.", reply_markup=Keyboards.main_menu())
+
+@router.handler(["Токарная обработка", "Фрезерная обработка"])
 def handle_process_type(message):
     user = get_user_state(message.from_user.id)
     user.process_type = "turning" if message.text == "Токарная обработка" else "milling"
-    user.calculator = TurningCalculator() if user.process_type == "turning" else MillingCalculator()
     
-    bot.send_message(message.chat.id,
+    send_message(message.chat.id,
                    f"Выберите операцию:",
                    reply_markup=Keyboards.operations_menu(user.process_type))
 
-@bot.message_handler(func=lambda msg: msg.text in OPERATIONS['turning'] + OPERATIONS['milling'])
+@router.handler(lambda: OPERATIONS['turning'] + OPERATIONS['milling'])
 def handle_operation(message):
     user = get_user_state(message.from_user.id)
     user.operation = message.text
-    bot.send_message(message.chat.id,
+    send_message(message.chat.id,
                    "Выберите группу материала:",
                    reply_markup=Keyboards.material_groups())
 
-@bot.message_handler(func=lambda msg: msg.text in MATERIAL_GROUPS.keys())
+@router.lookup(MATERIAL_GROUPS)
 def handle_material_group(message):
     user = get_user_state(message.from_user.id)
     user.material_group = message.text
-    bot.send_message(message.chat.id,
-                   "Выберите материал:",
+    send_message(message.chat.id,
+                   "Выберите материал или введите твердость HB и предел прочности σв, МПа "
+                   "(например: 230 750):",
                    reply_markup=Keyboards.materials_from_group(message.text))
 
-@bot.message_handler(func=lambda msg: msg.text in MATERIALS.keys())
+@router.lookup(MATERIALS)
 def handle_material(message):
     user = get_user_state(message.from_user.id)
     user.material = MATERIALS[message.text]
-    bot.send_message(message.chat.id,
+    send_message(message.chat.id,
                    "Выберите инструмент:",
-                   reply_markup=Keyboards.tools_menu(user.process_type))
+                   reply_markup=Keyboards.tools_menu(user.process_type, user.material.group))
+
+def incompatible_tool(message, user, tool):
+    """Инструмент не подходит для выбранного материала: повторный выбор из подходящих"""
+    if user.material is None or COMPATIBILITY.allows(user.material, tool):
+        return False
+    send_message(message.chat.id,
+                 f"⚠️ {tool.name} ({tool.material}) не рекомендуется для группы «{user.material.group}».\n"
+                 "Выберите инструмент:",
+                 reply_markup=Keyboards.tools_menu(user.process_type, user.material.group))
+    return True
 
 # Токарная обработка
-@bot.message_handler(func=lambda msg: msg.text in TURNING_TOOLS.keys())
+@router.lookup(TURNING_TOOLS)
 def handle_turning_tool(message):
     user = get_user_state(message.from_user.id)
+    if incompatible_tool(message, user, TURNING_TOOLS[message.text]):
+        return
     user.tool = TURNING_TOOLS[message.text]
     user.awaiting_input = "turning_diameter"
-    bot.send_message(message.chat.id,
+    send_message(message.chat.id,
                    "Введите диаметр обработки в мм:",
-                   reply_markup=types.ReplyKeyboardRemove())
+                   reply_markup=Keyboards.remove())
     
     
 
 # Фрезерная обработка
-@bot.message_handler(func=lambda msg: msg.text in MILLING_TOOLS.keys())
+@router.lookup(MILLING_TOOLS)
 def handle_milling_tool(message):
     user = get_user_state(message.from_user.id)
+    if incompatible_tool(message, user, MILLING_TOOLS[message.text]):
+        return
     user.tool = MILLING_TOOLS[message.text]
     
     if user.operation == "Спиральное фрезерование":
@@ -155,53 +567,57 @@ def handle_milling_tool(message):
                 "<Диаметр фрезы> <Зубья>\n"
                 "Пример: 12 4")
     
-    bot.send_message(message.chat.id,
+    send_message(message.chat.id,
                    text,
-                   reply_markup=types.ReplyKeyboardRemove(),
+                   reply_markup=Keyboards.remove(),
                    parse_mode='Markdown')
 
-@bot.message_handler(func=lambda msg: True)
+@router.fallback
 def handle_input(message):
     user = get_user_state(message.from_user.id)
+
+    # Вместо нажатия кнопки пользователь набрал название материала/инструмента
+    kind = search_kind(user) if user.awaiting_input is None else None
+    if kind == "material" and user.material_group and parse_hardness(message.text):
+        try:
+            select_inferred_material(message, user, *parse_hardness(message.text))
+        except ValueError as e:
+            send_message(message.chat.id, f"❌ Ошибка! {e}")
+        return
+    if kind:
+        send_search_results(message.chat.id, kind, message.text)
+        return
     
     try:
         if user.awaiting_input == "turning_diameter":
             diameter = float(message.text)
-            result = user.calculator.calculate(
+            result = calculate(
+                user.calculator,
                 material=user.material,
                 tool=user.tool,
                 operation=user.operation,
                 diameter=diameter
             )
-            response = format_turning_result({
-                **result,
-                "material": user.material.name,
-                "tool": user.tool.name,
-                "diameter": diameter
-            })
+            response = format_turning_result(result)
             user.reset()
             
         elif user.awaiting_input == "milling_params":
             diameter, teeth = map(float, message.text.split())
-            result = user.calculator.calculate(
+            result = calculate(
+                user.calculator,
                 material=user.material,
                 tool=user.tool,
                 operation=user.operation,
                 diameter=diameter,
                 teeth=int(teeth)
             )
-            response = format_milling_result({
-                **result,
-                "material": user.material.name,
-                "tool": user.tool.name,
-                "diameter": diameter,
-                "teeth": int(teeth)
-            })
+            response = format_milling_result(result)
             user.reset()
             
         elif user.awaiting_input == "spiral_params":
             diameter, teeth, depth = map(float, message.text.split())
-            result = user.calculator.calculate(
+            result = calculate(
+                user.calculator,
                 material=user.material,
                 tool=user.tool,
                 operation=user.operation,
@@ -209,21 +625,27 @@ def handle_input(message):
                 teeth=int(teeth),
                 cutting_depth=depth
             )
-            response = format_milling_result({
-                **result,
-                "material": user.material.name,
-                "tool": user.tool.name,
-                "diameter": diameter,
-                "teeth": int(teeth),
-                "cutting_depth": depth
-            })
+            response = format_milling_result(result)
             user.reset()
+
+        elif user.awaiting_input == "estimate":
+            response = format_estimate(estimate(user, message.text))
+            user.reset()
+
+        elif user.awaiting_input == "gcode":
+            # Отчет без Markdown: в кадрах бывают * и _
+            report = check_gcode(message.text.encode(), user, "из сообщения")
+            user.reset()
+            send_message(message.chat.id, report.format(), priority=PRIORITY_RESULT,
+                         reply_markup=Keyboards.main_menu())
+            return
             
         else:
             raise ValueError("Неизвестный ввод")
             
-        bot.send_message(message.chat.id,
+        send_message(message.chat.id,
                        response,
+                       priority=PRIORITY_RESULT,
                        reply_markup=Keyboards.main_menu(),
                        parse_mode='Markdown')
         
@@ -232,33 +654,223 @@ def handle_input(message):
         error_text = {
             "turning_diameter": "Введите число для диаметра (например: 50.5)",
             "milling_params": "Введите два числа через пробел (например: 12 4)",
-            "spiral_params": "Введите три числа через пробел (например: 12 4 20)"
+            "spiral_params": "Введите три числа через пробел (например: 12 4 20)",
+            "estimate": ESTIMATE_USAGE.get(user.process_type, "Введите четыре числа через пробел")
         }.get(user.awaiting_input, "Неверный формат ввода")
         
-        bot.send_message(message.chat.id,
+        send_message(message.chat.id,
                        f"❌ Ошибка! {error_text}",
                        reply_markup=Keyboards.main_menu())
         
     except Exception as e:
         logger.error(f"Системная ошибка: {str(e)}")
-        bot.send_message(message.chat.id,
+        send_message(message.chat.id,
                        "⚠️ Произошла внутренняя ошибка. Попробуйте снова.",
                        reply_markup=Keyboards.main_menu())
 
-if __name__ == "__main__":
-    logger.info(" 🤖 Бот запущен...")
+# Все текстовые сообщения и команды выбираются по таблице маршрутов одним поиском
+def handle_update(message):
+    try:
+        router.dispatch(message)
+    finally:
+        sessions.commit(message.from_user.id)
 
+# Загруженные файлы (управляющие программы)
+def handle_document_update(message):
     try:
-        #Отправляем сообщение при запуске
-        bot.send_message(
-            ADMIN_CHAT_ID,
-            "🤖 Бот успешно запущен и готов к работе!\n"
-            "Используйте /start для начала работы.",
-            parse_mode='Markdown'
-        )
-    except Exception as e:
-        logger.error(f'Ошибка отправки стартового сообщения: {e}')
+        with HANDLER_SECONDS.labels("handle_document").time():
+            handle_document(message)
+    finally:
+        sessions.commit(message.from_user.id)
+
+# Нажатия inline-кнопок результатов поиска
+def handle_callback(call):
+    action, kind, arg, rest = (call.data.split(":", 3) + [""] * 4)[:4]
+    notice = None
+    try:
+        if action == "pick":
+            name = catalog_search.resolve(kind, int(arg), int(rest))
+            if name is None:
+                notice = "Каталог обновился, повторите поиск"
+            else:
+                # Выбор из результатов равносилен нажатию кнопки с этим названием
+                router.dispatch(SimpleNamespace(text=name, chat=call.message.chat, from_user=call.from_user))
+        elif action == "page":
+            send_search_results(call.message.chat.id, kind, rest, int(arg))
+    except ValueError as e:
+        logger.error(f"Неверные данные кнопки: {call.data} ({e})")
+    finally:
+        sessions.commit(call.from_user.id)
+        deliver(bot_methods, "answer_callback_query", call.id, text=notice)
 
-    bot.polling(none_stop=True)
+# Inline-запросы: ответ за одно обновление, без диалога и сессии
+def handle_inline_query(query):
+    with HANDLER_SECONDS.labels("handle_inline_query").time():
+        try:
+            results = get_inline_queries().answer(query.query)
+        except Exception as e:
+            logger.error(f"Ошибка inline-запроса «{query.query}»: {e}")
+            results = []
+        deliver(bot_methods, "answer_inline_query", query.id, results, cache_time=INLINE_CACHE_TIME, is_personal=False)
 
-    
\ No newline at end of file
+# Распределение обновлений по шардам (--shards); None - обработка в потоке telebot
+dispatcher = None
+
+def run_handler(task):
+    handler, update = task
+    handler(update)
+
+def route(handler, update):
+    if dispatcher is None:
+        handler(update)
+    else:
+        # Опрос ждет места в очереди шарда - естественное обратное давление
+        dispatcher.submit(update.from_user.id, (handler, update), timeout=None)
+
+def register_handlers(bot):
+    bot.message_handler(content_types=['text'])(lambda message: route(handle_update, message))
+    bot.message_handler(content_types=['document'])(lambda message: route(handle_document_update, message))
+    bot.callback_query_handler(func=lambda call: True)(lambda call: route(handle_callback, call))
+    bot.inline_handler(func=lambda query: True)(lambda query: route(handle_inline_query, query))
+
+STARTUP_TEXT = ("🤖 Бот успешно запущен и готов к работе!\n"
+                "Используйте /start для начала работы.")
+
+def notify_admin():
+    """Сообщение о запуске в фоновом потоке: первый опрос не ждет ответа Bot API"""
+    def send():
+        try:
+            get_bot().send_message(
+                ADMIN_CHAT_ID,
+                STARTUP_TEXT,
+                parse_mode='Markdown'
+            )
+        except Exception as e:
+            logger.error(f'Ошибка отправки стартового сообщения: {e}')
+
+    threading.Thread(target=send, name="notify-admin", daemon=True).start()
+
+def start_outbound(workers):
+    global outbound
+    from runtime.outbound import OutboundQueue, pooled_session
+
+    pooled_session(workers)
+    outbound = OutboundQueue(get_bot(), workers=workers)
+
+    def outbound_samples():
+        stats = outbound.stats()
+        for status in ("sent", "coalesced", "throttled", "failed"):
+            yield {"status": status}, stats[status]
+
+    REGISTRY.callback("cnc_outbound_depth", "Сообщений в очереди исходящих", outbound.depth)
+    REGISTRY.callback("cnc_outbound_messages_total", "Исходящие сообщения по итогу", outbound_samples,
+                      kind="counter")
+    REGISTRY.callback("cnc_outbound_latency_seconds", "Задержка постановка -> отправка",
+                      lambda: [({"quantile": "0.5"}, outbound.stats()["latency_p50"]),
+                               ({"quantile": "0.99"}, outbound.stats()["latency_p99"])])
+
+def stop_outbound():
+    if outbound is not None and not outbound.drain(timeout=10):
+        logger.warning(f"Не отправлено сообщений: {outbound.depth()}")
+
+def shard_metrics(pool):
+    """Счетчики шардов в /metrics: общие и для рабочих-процессов, в отличие от метрик обработчиков"""
+    REGISTRY.callback("cnc_shard_processed_total", "Обновлений обработано рабочим шарда",
+                      lambda: [({"shard": str(i)}, count) for i, count in enumerate(pool.processed_by_shard())],
+                      kind="counter")
+    REGISTRY.callback("cnc_shard_rejected_total", "Обновлений отклонено (очередь шарда заполнена)",
+                      lambda: pool.rejected, kind="counter")
+    REGISTRY.callback("cnc_shard_queue_depth", "Обновлений в очередях шардов", pool.qsize)
+
+def run_polling(shards=0, processes=False):
+    global dispatcher
+    bot = get_bot()
+    if shards:
+        from runtime.sharded import ShardedDispatcher
+
+        dispatcher = ShardedDispatcher(run_handler, shards, processes=processes)
+        shard_metrics(dispatcher)
+        # Поток опроса только раскладывает обновления по шардам
+        bot.threaded = False
+    notify_admin()
+    try:
+        bot.polling(none_stop=True)
+    finally:
+        if dispatcher is not None:
+            dispatcher.drain(timeout=10)
+        stop_outbound()
+
+def run_webhook(listen, url=None, secret=None, workers=8, shards=0, processes=False):
+    from runtime.webhook import WebhookServer
+
+    host, _, port = listen.rpartition(":")
+    server = WebhookServer(handle_update, handle_callback, handle_inline_query, handle_document_update,
+                           listen=(host or "0.0.0.0", int(port)), secret_token=secret, workers=workers,
+                           shards=shards, processes=processes)
+    if shards:
+        shard_metrics(server.pool)
+    if url:
+        get_bot().set_webhook(url=url, secret_token=secret, max_connections=workers * 5)
+    notify_admin()
+    server.run()
+    stop_outbound()
+
+def run_async(workers=8):
+    from runtime.async_runtime import AsyncRuntime
+
+    runtime = AsyncRuntime(BOT_TOKEN, handle_update, handle_callback, handle_inline_query, handle_document_update,
+                           workers=workers)
+
+    async def notify_admin():
+        try:
+            await runtime.send_message(ADMIN_CHAT_ID, STARTUP_TEXT, parse_mode='Markdown')
+        except Exception as e:
+            logger.error(f'Ошибка отправки стартового сообщения: {e}')
+
+    runtime.run(on_startup=notify_admin)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CNC Cutting Bot")
+    parser.add_argument("--mode", choices=["polling", "async", "webhook"], default="polling",
+                        help="polling - синхронный опрос, async - конкурентная обработка на asyncio, "
+                             "webhook - прием обновлений по HTTP с пулом потоков")
+    parser.add_argument("--sessions", metavar="PATH",
+                        help="файл SQLite для сессий (сохраняются между перезапусками)")
+    parser.add_argument("--listen", default="0.0.0.0:8443", metavar="HOST:PORT",
+                        help="адрес HTTP-сервера в режиме webhook")
+    parser.add_argument("--webhook-url", metavar="URL",
+                        help="публичный адрес webhook (регистрируется в Telegram при запуске)")
+    parser.add_argument("--webhook-secret", metavar="TOKEN",
+                        help="секрет заголовка X-Telegram-Bot-Api-Secret-Token")
+    parser.add_argument("--workers", type=int, default=8, help="рабочих потоков в режимах webhook и async")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="polling/webhook: закрепить пользователей за N рабочими (по порядку для каждого)")
+    parser.add_argument("--processes", action="store_true",
+                        help="рабочие шардов - процессы (нагрузка на несколько ядер); метрики обработчиков "
+                             "и кэшей в /metrics - только родительского процесса, счетчики шардов - общие")
+    parser.add_argument("--outbound", type=int, default=0, metavar="N",
+                        help="polling/webhook: очередь исходящих с лимитами Telegram и N потоками отправки")
+    parser.add_argument("--metrics-port", type=int, default=0, metavar="PORT",
+                        help="экспорт метрик Prometheus на 127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+    if args.outbound and (args.mode == "async" or args.processes):
+        parser.error("--outbound работает с потоками в режимах polling и webhook")
+
+    if args.outbound:
+        start_outbound(args.outbound)
+    if args.metrics_port:
+        MetricsServer(port=args.metrics_port).start()
+    if args.sessions:
+        sessions = SqliteSessionStore(args.sessions)
+
+    logger.info(f" 🤖 Бот запущен ({args.mode})...")
+
+    if args.mode == "async":
+        run_async(args.workers)
+    elif args.mode == "webhook":
+        run_webhook(args.listen, args.webhook_url, args.webhook_secret, args.workers,
+                    args.shards, args.processes)
+    else:
+        run_polling(args.shards, args.processes)
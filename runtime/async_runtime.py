@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import logging
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+# deliver живет отдельно: синхронным режимам не нужен импорт asyncio
+from runtime.replies import Reply, _pending_replies, deliver
+
+logger = logging.getLogger(__name__)
+
+
+def _user_key(update) -> Optional[int]:
+    """id пользователя обновления (ключ порядка обработки)"""
+    user = getattr(update, "from_user", None)
+    return user.id if user is not None else None
+
+
+def _chat_key(update) -> Optional[int]:
+    """id чата, в который отвечает обработчик (у inline-запроса чата нет)"""
+    message = update if hasattr(update, "chat") else getattr(update, "message", None)
+    return message.chat.id if message is not None else None
+
+
+class _KeyedLocks:
+    """Блокировки asyncio по ключу; блокировка удаляется, когда ее никто не держит и не ждет"""
+
+    def __init__(self):
+        self._locks: Dict[Hashable, Tuple[asyncio.Lock, int]] = {}
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key: Optional[Hashable]):
+        if key is None:
+            yield
+            return
+        lock, users = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            # asyncio.Lock отдается ожидающим по очереди: порядок захвата - порядок обновлений
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+def _call(handler: Callable, update) -> List[Reply]:
+    """Обработчик в рабочем потоке; вызовы Bot API копятся и возвращаются"""
+    replies: List[Reply] = []
+    token = _pending_replies.set(replies)
+    try:
+        handler(update)
+    finally:
+        _pending_replies.reset(token)
+    return replies
+
+
+class AsyncRuntime:
+    """
+    Асинхронный режим работы бота на telebot.async_telebot.
+    Синхронные обработчики выполняются в пуле потоков, не занимая цикл событий:
+    обновления одного пользователя - строго по очереди, разных - параллельно.
+    Ответы одного чата отправляются по очереди, число одновременных
+    отправок ограничено семафором.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        handle_update: Callable,
+        handle_callback: Optional[Callable] = None,
+        handle_inline: Optional[Callable] = None,
+        handle_document: Optional[Callable] = None,
+        max_in_flight: int = 64,
+        workers: int = 8,
+        api_url: Optional[str] = None,
+        drain_timeout: float = 10.0
+    ):
+        """
+        :param token: токен бота
+        :param handle_update: обработчик текстового сообщения (тот же, что в режиме polling)
+        :param handle_callback: обработчик нажатий inline-кнопок
+        :param handle_inline: обработчик inline-запросов («@bot ...»)
+        :param handle_document: обработчик сообщений с файлом (управляющие программы)
+        :param max_in_flight: максимум одновременных запросов send_message
+        :param workers: потоков для обработчиков
+        :param api_url: адрес Bot API в формате telebot ("http://host/bot{0}/{1}"), например локальный фейк
+        :param drain_timeout: время на завершение начатых обработок при остановке (сек)
+        """
+        from telebot import asyncio_helper
+        from telebot.async_telebot import AsyncTeleBot
+
+        if api_url:
+            asyncio_helper.API_URL = api_url
+
+        self.bot = AsyncTeleBot(token)
+        self._handle_update = handle_update
+        self._handle_callback = handle_callback
+        self._handle_inline = handle_inline
+        self._handle_document = handle_document
+        self._max_in_flight = max_in_flight
+        self._workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._users = _KeyedLocks()
+        self._chats = _KeyedLocks()
+        self._drain_timeout = drain_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._active = set()
+        self._stopped: Optional[asyncio.Event] = None
+        self.bot.message_handler(content_types=['text'])(self._on_message)
+        if handle_document is not None:
+            self.bot.message_handler(content_types=['document'])(self._on_document)
+        if handle_callback is not None:
+            self.bot.callback_query_handler(func=lambda call: True)(self._on_callback)
+        if handle_inline is not None:
+            self.bot.inline_handler(func=lambda query: True)(self._on_inline)
+
+    async def _on_message(self, message) -> None:
+        await self._run(self._handle_update, message)
+
+    async def _on_document(self, message) -> None:
+        await self._run(self._handle_document, message)
+
+    async def _on_callback(self, call) -> None:
+        await self._run(self._handle_callback, call)
+
+    async def _on_inline(self, query) -> None:
+        await self._run(self._handle_inline, query)
+
+    async def _run(self, handler: Callable, update) -> None:
+        task = asyncio.current_task()
+        self._active.add(task)
+        try:
+            # Следующее обновление пользователя ждет и обработки, и отправки ответов этого
+            async with self._users.hold(_user_key(update)):
+                loop = asyncio.get_running_loop()
+                replies = await loop.run_in_executor(self._executor, _call, handler, update)
+                async with self._chats.hold(_chat_key(update)):
+                    for method, args, kwargs in replies:
+                        async with self._semaphore:
+                            await getattr(self.bot, method)(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Ошибка обработки обновления: {e}")
+        finally:
+            self._active.discard(task)
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        """Отправка сообщения вне обработчиков (например, уведомление о запуске)"""
+        async with self._semaphore:
+            return await self.bot.send_message(chat_id, text, **kwargs)
+
+    def stop(self) -> None:
+        """Запрос остановки; обработка завершается в serve()"""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def serve(self, on_startup: Optional[Callable] = None) -> None:
+        """
+        Основной цикл: опрос обновлений до вызова stop(),
+        затем ожидание начатых обработок и остановка опроса
+        :param on_startup: корутина-функция, вызываемая после старта опроса
+        """
+        self._semaphore = asyncio.Semaphore(self._max_in_flight)
+        self._stopped = asyncio.Event()
+        self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="handler")
+
+        polling = asyncio.create_task(self.bot.infinity_polling(timeout=20))
+        if on_startup is not None:
+            asyncio.create_task(on_startup())
+
+        await self._stopped.wait()
+
+        # Сначала дожидаемся начатых обработок: при остановке опрос закрывает HTTP-сессию
+        if self._active:
+            logger.info(f"Завершение {len(self._active)} обработок...")
+            await asyncio.wait(set(self._active), timeout=self._drain_timeout)
+
+        polling.cancel()
+        await asyncio.gather(polling, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+    def run(self, on_startup: Optional[Callable] = None) -> None:
+        """Запуск до SIGINT/SIGTERM"""
+        async def main():
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, self.stop)
+            await self.serve(on_startup)
+
+        asyncio.run(main())
@@ -0,0 +1,74 @@
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, Hashable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundJobs:
+    """
+    Долгие задачи (выгрузки документов) в фоновых потоках: обработчик диалога
+    ставит задачу и сразу возвращается. У ключа (пользователя) не больше одной
+    задачи в очереди или в работе; очередь ограничена.
+    Потоки запускаются при первой задаче: в рабочих процессах шардов - в самом процессе.
+    """
+
+    def __init__(self, workers: int = 1, max_queue: int = 32, name: str = "job"):
+        self._workers = workers
+        self._max_queue = max_queue
+        self._name = name
+        self._lock = threading.Condition()
+        self._queue: Deque[Tuple[Hashable, Callable, tuple]] = deque()
+        self._keys: Set[Hashable] = set()
+        self._threads: List[threading.Thread] = []
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, key: Hashable, func: Callable, *args) -> bool:
+        """
+        Постановка задачи func(*args)
+        :return: False, если у ключа уже есть задача или очередь заполнена
+        """
+        with self._lock:
+            if key in self._keys or len(self._queue) >= self._max_queue:
+                return False
+            self._keys.add(key)
+            self._queue.append((key, func, args))
+            if not self._threads:
+                self._threads = [threading.Thread(target=self._work, name=f"{self._name}-{i}", daemon=True)
+                                 for i in range(self._workers)]
+                for thread in self._threads:
+                    thread.start()
+            self._lock.notify()
+        return True
+
+    def active(self) -> int:
+        """Задач в очереди и в работе"""
+        with self._lock:
+            return len(self._keys)
+
+    def drain(self, timeout: float = None) -> bool:
+        """Ожидание выполнения всех задач; False - не успели за timeout"""
+        with self._lock:
+            return self._lock.wait_for(lambda: not self._keys, timeout)
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                self._lock.wait_for(lambda: self._queue)
+                key, func, args = self._queue.popleft()
+            succeeded = False
+            try:
+                func(*args)
+                succeeded = True
+            except Exception:
+                logger.exception(f"Ошибка фоновой задачи {self._name} ({key})")
+            finally:
+                with self._lock:
+                    if succeeded:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+                    self._keys.discard(key)
+                    self._lock.notify_all()
@@ -0,0 +1,345 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты исходящих сообщений: меньше - раньше
+PRIORITY_RESULT = 0
+PRIORITY_MENU = 1
+
+# Максимальная длина сообщения Telegram
+MESSAGE_LIMIT = 4096
+
+
+def pooled_session(pool_size: int):
+    """
+    Общая для всех потоков HTTP-сессия telebot с пулом соединений
+    (по умолчанию telebot создает отдельную сессию на каждый поток)
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from telebot import apihelper
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    apihelper.session = session
+    return session
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, не более capacity в запасе"""
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Сколько ждать до появления токена (0 - можно сейчас)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, now: float, seconds: float) -> None:
+        """Запрет отправки на seconds (ответ 429 с retry_after)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Outgoing:
+    """Исходящий вызов Bot API"""
+    __slots__ = ("method", "chat_id", "args", "kwargs", "priority", "queued_at")
+
+    def __init__(self, method: str, chat_id: int, args: tuple, kwargs: dict, priority: int, queued_at: float):
+        self.method = method
+        self.chat_id = chat_id
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.queued_at = queued_at
+
+    def merge(self, other: "_Outgoing") -> bool:
+        """
+        Склейка идущих подряд send_message одного чата в одно сообщение.
+        Клавиатура берется от последнего; inline-кнопки привязаны к своему
+        сообщению, поэтому такие сообщения не склеиваются.
+        """
+        if self.method != "send_message" or other.method != "send_message":
+            return False
+        markup = self.kwargs.get("reply_markup")
+        if markup is not None and type(markup).__name__ == "InlineKeyboardMarkup":
+            return False
+        if self.kwargs.get("parse_mode") != other.kwargs.get("parse_mode"):
+            return False
+        text = f"{self.args[0]}\n\n{other.args[0]}"
+        if len(text) > MESSAGE_LIMIT:
+            return False
+        kwargs = dict(self.kwargs)
+        kwargs.update(other.kwargs)
+        self.args = (text,)
+        self.kwargs = kwargs
+        self.priority = min(self.priority, other.priority)
+        return True
+
+
+class OutboundQueue:
+    """
+    Очередь исходящих сообщений с учетом ограничений Telegram.
+    Обработчики ставят сообщения в очередь и не ждут сети; рабочие потоки
+    отправляют их через общий пул соединений.
+
+    - Ограничения частоты: token bucket на каждый чат и общий на бота.
+    - Порядок внутри чата сохраняется; между чатами первыми уходят
+      сообщения с меньшим приоритетом (результаты расчетов раньше меню).
+    - Сообщения одного чата, ожидающие отправки подряд, склеиваются.
+    - Ответ 429 приостанавливает чат на retry_after, сообщение отправляется повторно.
+    """
+
+    def __init__(
+        self,
+        bot,
+        workers: int = 8,
+        global_rate: float = 30.0,
+        global_burst: float = 1.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        max_retries: int = 5,
+        latency_window: int = 10_000
+    ):
+        """
+        :param bot: экземпляр telebot.TeleBot
+        :param workers: число потоков отправки (и размер пула соединений)
+        :param global_rate: сообщений в секунду на бота
+        :param global_burst: сколько сообщений бот может отправить подряд без ожидания
+        :param chat_rate: сообщений в секунду в один чат
+        :param chat_burst: сколько сообщений в чат можно отправить подряд без ожидания
+        :param max_retries: повторов после 429 до отказа от сообщения
+        :param latency_window: сколько последних задержек хранить для метрик
+        """
+        self._bot = bot
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._max_retries = max_retries
+        self._lock = threading.Condition()
+        self._seq = itertools.count()
+        self._queues: Dict[int, Deque[_Outgoing]] = {}
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._global = TokenBucket(global_rate, global_burst, time.monotonic())
+        # Чаты с сообщениями: готовые к отправке (приоритет, порядок) и ожидающие лимита (время, порядок).
+        # Чат стоит не более чем в одной из куч и не в отправке одновременно - порядок в чате сохраняется
+        self._ready: List[Tuple[int, int, int]] = []
+        # Действующая запись чата в _ready (порядковый номер); остальные записи чата устарели
+        self._ready_seq: Dict[int, int] = {}
+        self._delayed: List[Tuple[float, int, int]] = []
+        self._active = set()  # чаты в кучах или в отправке
+        self._retries: Dict[int, int] = {}
+        self._closed = False
+        self._in_flight = 0
+        self._depth = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.throttled = 0
+        self.failed = 0
+        self.latencies: Deque[float] = deque(maxlen=latency_window)
+        self.latencies_by_priority: Dict[int, Deque[float]] = {}
+        self._threads = [threading.Thread(target=self._work, name=f"outbound-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, method: str, chat_id: int, *args, priority: int = PRIORITY_MENU, **kwargs) -> None:
+        """Постановка вызова Bot API (первый аргумент - chat_id) в очередь"""
+        now = time.monotonic()
+        outgoing = _Outgoing(method, chat_id, args, kwargs, priority, now)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Очередь исходящих сообщений остановлена")
+            queue = self._queues.get(chat_id)
+            if queue is None:
+                queue = self._queues[chat_id] = deque()
+            elif queue:
+                last = queue[-1]
+                priority = last.priority
+                if last.merge(outgoing):
+                    self.coalesced += 1
+                    # Склейка подняла приоритет первого сообщения чата - запись в куче заменяется
+                    if last.priority != priority and len(queue) == 1 and chat_id in self._ready_seq:
+                        self._push_ready(chat_id, last.priority)
+                        self._lock.notify()
+                    return
+            queue.append(outgoing)
+            self._depth += 1
+            # Чат без сообщений в очереди и не в отправке - планируем
+            if chat_id not in self._active:
+                self._active.add(chat_id)
+                self._schedule(chat_id, now)
+            self._lock.notify()
+
+    def send_message(self, chat_id: int, text: str, priority: int = PRIORITY_MENU, **kwargs) -> None:
+        self.submit("send_message", chat_id, text, priority=priority, **kwargs)
+
+    def _bucket(self, chat_id: int, now: float) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self._chat_rate, self._chat_burst, now)
+        return bucket
+
+    def _push_ready(self, chat_id: int, priority: int) -> None:
+        seq = next(self._seq)
+        self._ready_seq[chat_id] = seq
+        heapq.heappush(self._ready, (priority, seq, chat_id))
+
+    def _schedule(self, chat_id: int, now: float) -> None:
+        delay = self._bucket(chat_id, now).delay(now)
+        if delay <= 0:
+            self._push_ready(chat_id, self._queues[chat_id][0].priority)
+        else:
+            heapq.heappush(self._delayed, (now + delay, next(self._seq), chat_id))
+
+    def _next(self) -> Optional[_Outgoing]:
+        """Следующее сообщение к отправке (вызывается под блокировкой); None - остановка"""
+        while True:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, chat_id = heapq.heappop(self._delayed)
+                self._schedule(chat_id, now)
+
+            # Записи, замененные после склейки
+            while self._ready and self._ready_seq.get(self._ready[0][2]) != self._ready[0][1]:
+                heapq.heappop(self._ready)
+
+            timeout = self._delayed[0][0] - now if self._delayed else None
+            if self._ready:
+                wait = self._global.delay(now)
+                if wait <= 0:
+                    _, _, chat_id = heapq.heappop(self._ready)
+                    del self._ready_seq[chat_id]
+                    self._global.take(now)
+                    self._bucket(chat_id, now).take(now)
+                    self._in_flight += 1
+                    self._depth -= 1
+                    return self._queues[chat_id].popleft()
+                timeout = wait if timeout is None else min(timeout, wait)
+            elif self._closed and not self._delayed and not self._in_flight:
+                return None
+            self._lock.wait(timeout)
+
+    def _work(self) -> None:
+        from telebot.apihelper import ApiTelegramException
+
+        while True:
+            with self._lock:
+                outgoing = self._next()
+            if outgoing is None:
+                return
+
+            sent, retry_after = False, None
+            try:
+                getattr(self._bot, outgoing.method)(outgoing.chat_id, *outgoing.args, **outgoing.kwargs)
+                sent = True
+            except ApiTelegramException as e:
+                if e.error_code == 429:
+                    retry_after = float((e.result_json.get("parameters") or {}).get("retry_after", 1))
+                else:
+                    logger.error(f"Ошибка отправки в чат {outgoing.chat_id}: {e}")
+            except Exception as e:
+                logger.error(f"Ошибка отправки в чат {outgoing.chat_id}: {e}")
+
+            with self._lock:
+                self._finish(outgoing, sent, retry_after)
+                self._lock.notify_all()
+
+    def _finish(self, outgoing: _Outgoing, sent: bool, retry_after: Optional[float]) -> None:
+        now = time.monotonic()
+        chat_id = outgoing.chat_id
+        queue = self._queues[chat_id]
+        self._in_flight -= 1
+
+        if retry_after is not None:
+            self.throttled += 1
+            retries = self._retries.get(chat_id, 0) + 1
+            if retries <= self._max_retries:
+                # Повтор того же сообщения первым после паузы
+                self._retries[chat_id] = retries
+                queue.appendleft(outgoing)
+                self._depth += 1
+                self._bucket(chat_id, now).pause(now, retry_after)
+                self._schedule(chat_id, now)
+                return
+            logger.error(f"Сообщение в чат {chat_id} не отправлено: превышен лимит повторов")
+            self.failed += 1
+        elif not sent:
+            self.failed += 1
+        else:
+            self.sent += 1
+            latency = now - outgoing.queued_at
+            self.latencies.append(latency)
+            by_priority = self.latencies_by_priority.get(outgoing.priority)
+            if by_priority is None:
+                by_priority = self.latencies_by_priority[outgoing.priority] = deque(maxlen=self.latencies.maxlen)
+            by_priority.append(latency)
+
+        self._retries.pop(chat_id, None)
+        if queue:
+            self._schedule(chat_id, now)
+        else:
+            del self._queues[chat_id]
+            self._active.discard(chat_id)
+            # Лимиты простаивающих чатов больше не нужны
+            if len(self._buckets) > 10_000:
+                self._buckets = {chat: bucket for chat, bucket in self._buckets.items() if not bucket.idle(now)}
+
+    def depth(self) -> int:
+        """Сообщений в очереди (без отправляемых)"""
+        return self._depth
+
+    def stats(self) -> Dict[str, float]:
+        """Метрики очереди: глубина, счетчики, задержка постановка -> отправка (сек)"""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            in_flight = self._in_flight
+            depth = self._depth
+
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+
+        return {
+            "depth": depth,
+            "in_flight": in_flight,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "throttled": self.throttled,
+            "failed": self.failed,
+            "latency_p50": percentile(0.5),
+            "latency_p99": percentile(0.99),
+        }
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Остановка после отправки всех сообщений; True - очередь опустела до timeout"""
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in self._threads)
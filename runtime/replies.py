@@ -0,0 +1,18 @@
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+# Вызовы Bot API, накопленные обработчиком в асинхронном режиме: (метод, аргументы, параметры)
+Reply = Tuple[str, tuple, dict]
+_pending_replies: ContextVar[Optional[List[Reply]]] = ContextVar("pending_replies", default=None)
+
+
+def deliver(bot, method: str, *args, **kwargs):
+    """
+    Вызов Bot API из обработчика (send_message, answer_callback_query и т.п.).
+    В синхронном режиме выполняется сразу, в асинхронном -
+    копится и выполняется средой выполнения после завершения обработчика.
+    """
+    replies = _pending_replies.get()
+    if replies is None:
+        return getattr(bot, method)(*args, **kwargs)
+    replies.append((method, args, kwargs))
@@ -0,0 +1,117 @@
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Callable, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Сигнал остановки рабочему шарду
+_STOP = None
+
+
+class ShardedDispatcher:
+    """
+    Диспетчер обновлений по шардам: ключ (id пользователя) хэшируется
+    в номер рабочего, у каждого рабочего своя ограниченная очередь.
+    Обновления одного пользователя всегда попадают к одному рабочему и
+    выполняются по порядку, разные пользователи - параллельно.
+
+    Рабочие - потоки или процессы (processes=True, для нагрузки на несколько ядер).
+    Процессы запускаются через fork, поэтому диспетчер создается до запуска
+    остальных потоков; состояние пользователя живет в процессе его шарда.
+    Метрики обработчиков и кэшей (utils.metrics) у каждого процесса свои, поэтому
+    /metrics родителя их не видит; общими остаются счетчики processed_by_shard и rejected.
+    """
+
+    def __init__(self, handle: Callable, shards: int = 4, max_queue: int = 1000, processes: bool = False):
+        """
+        :param handle: обработчик задачи; в режиме процессов задачи передаются через pickle
+        :param shards: число рабочих
+        :param max_queue: размер очереди каждого рабочего
+        :param processes: рабочие - процессы вместо потоков
+        """
+        self._handle = handle
+        self._closed = False
+        self.rejected = 0
+        if processes:
+            context = multiprocessing.get_context("fork")
+            self._queues = [context.Queue(max_queue) for _ in range(shards)]
+            # Счетчик каждого шарда пишет только его процесс
+            self._processed = context.Array("q", shards, lock=False)
+            self._workers = [context.Process(target=self._work, args=(i,), name=f"shard-{i}", daemon=True)
+                             for i in range(shards)]
+        else:
+            self._queues = [queue.Queue(max_queue) for _ in range(shards)]
+            self._processed = [0] * shards
+            self._workers = [threading.Thread(target=self._work, args=(i,), name=f"shard-{i}", daemon=True)
+                             for i in range(shards)]
+        for worker in self._workers:
+            worker.start()
+
+    def shard(self, key: Hashable) -> int:
+        """Номер рабочего для ключа (для целых id - остаток от деления)"""
+        return hash(key) % len(self._queues)
+
+    def submit(self, key: Hashable, item, timeout: Optional[float] = 0.0) -> bool:
+        """
+        Постановка задачи в очередь шарда ключа.
+        :param timeout: сколько ждать места в очереди (сек, None - без ограничения)
+        :return: False, если очередь шарда заполнена или диспетчер останавливается
+        """
+        if self._closed:
+            return False
+        try:
+            self._queues[self.shard(key)].put(item, True, timeout)
+        except queue.Full:
+            self.rejected += 1
+            return False
+        return True
+
+    def _work(self, index: int) -> None:
+        tasks = self._queues[index]
+        processed = self._processed
+        while True:
+            item = tasks.get()
+            if item is _STOP:
+                return
+            try:
+                self._handle(item)
+            except Exception as e:
+                logger.error(f"Ошибка обработки обновления: {e}")
+            processed[index] += 1
+
+    @property
+    def processed(self) -> int:
+        return sum(self._processed)
+
+    def processed_by_shard(self) -> List[int]:
+        """Выполнено задач каждым рабочим (в режиме процессов - из общей памяти)"""
+        return list(self._processed)
+
+    def qsize(self) -> int:
+        try:
+            return sum(tasks.qsize() for tasks in self._queues)
+        except NotImplementedError:  # multiprocessing.Queue на macOS
+            return 0
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Остановка: новые задачи не принимаются, принятые выполняются.
+        :return: True, если все рабочие завершились до истечения timeout
+        """
+        self._closed = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        for tasks in self._queues:
+            try:
+                tasks.put(_STOP, True, remaining())
+            except queue.Full:
+                pass
+        for worker in self._workers:
+            worker.join(remaining())
+        return not any(worker.is_alive() for worker in self._workers)
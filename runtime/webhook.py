@@ -0,0 +1,265 @@
+import hmac
+import json
+import logging
+import signal
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # Всплески входящих запросов: очередь accept по умолчанию (5) мала
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class KeyedWorkerPool:
+    """
+    Пул рабочих потоков с сохранением порядка по ключу (id пользователя).
+    Задачи одного ключа выполняются строго последовательно, разные ключи - параллельно.
+    Очередь ограничена: при переполнении submit() отказывает (обратное давление).
+    """
+
+    def __init__(self, handle: Callable, workers: int = 8, max_queue: int = 10_000):
+        """
+        :param handle: обработчик задачи, вызывается в рабочем потоке
+        :param workers: число рабочих потоков
+        :param max_queue: максимум задач в очереди (включая выполняемые)
+        """
+        self._handle = handle
+        self._max_queue = max_queue
+        self._lock = threading.Condition()
+        # Задачи по ключам и очередь ключей, готовых к выполнению.
+        # Ключ стоит в _ready не более одного раза, пока у него есть задачи,
+        # поэтому задачи одного ключа не попадают в два потока одновременно
+        self._pending: Dict[Hashable, Deque] = {}
+        self._ready: Deque[Hashable] = deque()
+        self._size = 0
+        self._closed = False
+        self.processed = 0
+        self.rejected = 0
+        self._threads = [threading.Thread(target=self._work, name=f"worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key: Hashable, item, timeout: float = 0.0) -> bool:
+        """
+        Постановка задачи в очередь ключа.
+        :param timeout: сколько ждать места в очереди (сек)
+        :return: False, если очередь заполнена или пул останавливается
+        """
+        with self._lock:
+            if self._size >= self._max_queue and timeout > 0:
+                self._lock.wait_for(lambda: self._size < self._max_queue or self._closed, timeout)
+            if self._closed or self._size >= self._max_queue:
+                self.rejected += 1
+                return False
+            queue = self._pending.get(key)
+            if queue is None:
+                self._pending[key] = deque((item,))
+                self._ready.append(key)
+                self._lock.notify_all()
+            else:
+                queue.append(item)
+            self._size += 1
+            return True
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                self._lock.wait_for(lambda: self._ready or self._closed)
+                if not self._ready:
+                    return  # пул закрыт и задач не осталось
+                key = self._ready.popleft()
+                queue = self._pending[key]
+
+            # Выполняем задачи ключа подряд, пока они есть
+            while True:
+                with self._lock:
+                    if not queue:
+                        del self._pending[key]
+                        break
+                    item = queue.popleft()
+                try:
+                    self._handle(item)
+                except Exception as e:
+                    logger.error(f"Ошибка обработки обновления: {e}")
+                with self._lock:
+                    self._size -= 1
+                    self.processed += 1
+                    self._lock.notify_all()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Остановка: новые задачи не принимаются, принятые выполняются.
+        :return: True, если очередь опустела до истечения timeout
+        """
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+            drained = self._lock.wait_for(lambda: self._size == 0, timeout)
+        if drained:
+            for thread in self._threads:
+                thread.join()
+        return drained
+
+
+def update_user_id(update: dict) -> Optional[int]:
+    """id пользователя обновления (ключ порядка обработки)"""
+    for kind in ("message", "edited_message", "callback_query", "inline_query", "chosen_inline_result"):
+        payload = update.get(kind)
+        if payload:
+            sender = payload.get("from") or {}
+            return sender.get("id")
+    return None
+
+
+class WebhookServer:
+    """
+    Прием обновлений через webhook.
+    HTTP-поток только разбирает JSON и ставит обновление в KeyedWorkerPool;
+    разбор в объекты telebot и обработка выполняются рабочими потоками.
+    При заполненной очереди отвечает 503 - Telegram повторит доставку позже.
+    """
+
+    def __init__(
+        self,
+        handle_update: Callable,
+        handle_callback: Optional[Callable] = None,
+        handle_inline: Optional[Callable] = None,
+        handle_document: Optional[Callable] = None,
+        listen: Tuple[str, int] = ("0.0.0.0", 8443),
+        path: str = "/webhook",
+        secret_token: Optional[str] = None,
+        workers: int = 8,
+        max_queue: int = 10_000,
+        enqueue_timeout: float = 1.0,
+        drain_timeout: float = 10.0,
+        shards: int = 0,
+        processes: bool = False
+    ):
+        """
+        :param handle_update: обработчик текстового сообщения (тот же, что в режиме polling)
+        :param handle_callback: обработчик нажатий inline-кнопок
+        :param handle_inline: обработчик inline-запросов («@bot ...»)
+        :param handle_document: обработчик сообщений с файлом (управляющие программы)
+        :param listen: адрес и порт HTTP-сервера
+        :param path: путь, на который Telegram отправляет обновления
+        :param secret_token: ожидаемый заголовок X-Telegram-Bot-Api-Secret-Token
+        :param workers: число рабочих потоков
+        :param max_queue: максимум обновлений в очереди
+        :param enqueue_timeout: сколько HTTP-поток ждет места в очереди перед ответом 503 (сек)
+        :param drain_timeout: время на обработку принятых обновлений при остановке (сек)
+        :param shards: вместо общего пула - ShardedDispatcher с закреплением пользователя за рабочим
+        :param processes: рабочие шардов - процессы
+        """
+        self._handle_update = handle_update
+        self._handle_callback = handle_callback
+        self._handle_inline = handle_inline
+        self._handle_document = handle_document
+        self.path = path
+        self._secret_token = secret_token
+        self._enqueue_timeout = enqueue_timeout
+        self._drain_timeout = drain_timeout
+        # Пул создается до HTTP-сервера: шарды-процессы запускаются через fork
+        if shards:
+            from runtime.sharded import ShardedDispatcher
+            self.pool = ShardedDispatcher(self._process, shards, max(1, max_queue // shards), processes)
+        else:
+            self.pool = KeyedWorkerPool(self._process, workers, max_queue)
+        self._server = _HTTPServer(listen, self._make_handler())
+        self._stopped = threading.Event()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def _process(self, raw: dict) -> None:
+        from telebot.types import Update
+
+        update = Update.de_json(raw)
+        if update.message is not None and update.message.content_type == "text":
+            self._handle_update(update.message)
+        elif update.message is not None and update.message.content_type == "document":
+            if self._handle_document is not None:
+                self._handle_document(update.message)
+        elif update.callback_query is not None and self._handle_callback is not None:
+            self._handle_callback(update.callback_query)
+        elif update.inline_query is not None and self._handle_inline is not None:
+            self._handle_inline(update.inline_query)
+
+    def accept(self, body: bytes) -> int:
+        """Прием тела запроса, возвращает HTTP-статус ответа"""
+        try:
+            raw = json.loads(body)
+            key = update_user_id(raw)
+        except (ValueError, AttributeError):
+            return 400
+        # Обновления без пользователя (например, каналы) обрабатываем по update_id
+        if key is None:
+            key = ("update", raw.get("update_id"))
+        return 200 if self.pool.submit(key, raw, self._enqueue_timeout) else 503
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело уходят отдельными пакетами: без TCP_NODELAY ответ ждет ACK ~40 мс
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int) -> None:
+                self.send_response(status)
+                if status == 503:
+                    self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                if self.path != server.path:
+                    self._reply(404)
+                    return
+                secret = self.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+                if server._secret_token and not hmac.compare_digest(secret, server._secret_token):
+                    self._reply(403)
+                    return
+                self._reply(server.accept(body))
+
+        return Handler
+
+    def serve(self) -> None:
+        """Обработка запросов до вызова stop(), затем завершение принятых обновлений"""
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        logger.info(f"Webhook: http://{self.address[0]}:{self.address[1]}{self.path}")
+        self._stopped.wait()
+
+        # Сначала перестаем принимать запросы, затем дорабатываем очередь
+        self._server.shutdown()
+        self._server.server_close()
+        pending = self.pool.qsize()
+        if pending:
+            logger.info(f"Завершение {pending} обработок...")
+        if not self.pool.drain(self._drain_timeout):
+            logger.warning(f"Не обработано обновлений: {self.pool.qsize()}")
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def run(self) -> None:
+        """Запуск до SIGINT/SIGTERM"""
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self.stop())
+        self.serve()
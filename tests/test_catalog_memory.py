@@ -0,0 +1,87 @@
+"""
+Индексы по каталогу в SQLite (database/catalog_store.py) читают его потоком:
+записи не материализуются, память индексов - в пределах заявленной на запись.
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+import calculations.regime_model as regime_model
+from database.catalog_store import CatalogStore
+from database.materials_lib import Material
+from database.search_index import CatalogSearch
+from utils.router import MessageRouter
+
+COUNT = 5000
+GROUPS = ["Конструкционная сталь", "Легированная сталь", "Алюминиевые сплавы"]
+# Байт на запись (названия ~30 символов): см. docstring CatalogSearch и RegimeModel
+SEARCH_BYTES = 1500
+REGIME_BYTES = 1200
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CatalogStore(str(tmp_path / "catalog.db"))
+    store.put_materials(Material(f"Сталь {i}Х{i % 97}Н{i % 13}МФА-{i}", GROUPS[i % 3], 150 + i % 200,
+                                 500 + i % 700, (100, 150), (0.1, 0.2)) for i in range(COUNT))
+    yield store
+    store.close()
+
+
+def peak_per_entry(build):
+    tracemalloc.start()
+    try:
+        result = build()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / COUNT
+
+
+def test_search_index_streams_names(store):
+    search = CatalogSearch({"material": store.materials})
+    index, used = peak_per_entry(lambda: search.index("material"))
+    assert len(index) == COUNT
+    assert used < SEARCH_BYTES
+    assert len(store.materials._cache) == 0  # записи Material не создавались
+    assert search.search("material", "сталь 42х42")[0][0][1] == "Сталь 42Х42Н3МФА-42"
+
+
+def test_regime_model_streams_rows(store, monkeypatch):
+    monkeypatch.setattr(regime_model, "MATERIALS", store.materials)
+
+    def build():
+        model = regime_model.RegimeModel()
+        model.build()
+        return model
+
+    model, used = peak_per_entry(build)
+    assert len(model) == COUNT
+    assert used < REGIME_BYTES
+    assert len(store.materials._cache) == 0
+    assert model.nearest("Легированная сталь", 151, 501)[0][0] == 0
+
+
+def test_router_looks_up_catalog(store):
+    router = MessageRouter()
+    router.handler(["Токарная обработка"])(lambda message: "process")
+    router.lookup(store.materials)(lambda message: "material")
+    router.fallback(lambda message: "input")
+    # Таблица не содержит названий каталога
+    assert len(router._table) == 1
+    assert router.dispatch(SimpleNamespace(text="Сталь 7Х7Н7МФА-7")) == "material"
+    assert router.dispatch(SimpleNamespace(text="Токарная обработка")) == "process"
+    assert router.dispatch(SimpleNamespace(text="50")) == "input"
+
+
+def test_router_keeps_registration_priority():
+    router = MessageRouter()
+    router.lookup({"Сталь 45": None})(lambda message: "material")
+    router.handler(["Сталь 45", "Назад"])(lambda message: "button")
+    router.lookup({"Назад": None})(lambda message: "tool")
+    assert router.dispatch(SimpleNamespace(text="Сталь 45")) == "material"
+    assert router.dispatch(SimpleNamespace(text="Назад")) == "button"
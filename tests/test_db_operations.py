@@ -0,0 +1,73 @@
+"""
+DatabaseOperations.add_material / add_tool: принятые записи попадают в каталог,
+недопустимые отклоняются CatalogError без изменения каталога.
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import pytest
+
+from database.db_operations import DatabaseOperations
+from database.materials_lib import MATERIAL_GROUPS, MATERIALS
+from database.tools_lib import MILLING_TOOLS, TURNING_TOOLS
+from database.validation import CatalogError
+
+
+@pytest.fixture(autouse=True)
+def rollback_changes():
+    """Изменения теста откатываются"""
+    history = len(DatabaseOperations._history)
+    yield
+    while len(DatabaseOperations._history) > history:
+        DatabaseOperations.rollback()
+
+
+def test_add_material():
+    version = DatabaseOperations.version
+    assert DatabaseOperations.add_material(" Сталь опытная 1 ", "Конструкционная сталь", 163, 410,
+                                           (140, 220), (0.1, 0.3))
+    assert DatabaseOperations.version == version + 1
+    assert MATERIALS["Сталь опытная 1"].hardness == 163
+    assert "Сталь опытная 1" in MATERIAL_GROUPS["Конструкционная сталь"]
+    # Повтор имени - False без новой версии
+    assert not DatabaseOperations.add_material("Сталь опытная 1", "Конструкционная сталь", 170, 420, 150, 0.2)
+    assert DatabaseOperations.version == version + 1
+
+
+@pytest.mark.parametrize("values", [
+    ("", "Конструкционная сталь", 163, 410, 150, 0.2),
+    ("Сталь опытная 1", " ", 163, 410, 150, 0.2),
+    ("Сталь опытная 1", "Конструкционная сталь", 0, 410, 150, 0.2),
+    ("Сталь опытная 1", "Конструкционная сталь", 163, 410, (220, 140), 0.2),
+    ("Сталь опытная 1", "Конструкционная сталь", 163, 410, 150, 9),
+])
+def test_add_material_rejects(values):
+    version = DatabaseOperations.version
+    with pytest.raises(CatalogError):
+        DatabaseOperations.add_material(*values)
+    assert DatabaseOperations.version == version
+    assert "Сталь опытная 1" not in MATERIALS
+
+
+@pytest.mark.parametrize("tool_type, catalog, kwargs", [
+    ("turning", TURNING_TOOLS, {"cutting_edge_angle": 45}),
+    ("milling", MILLING_TOOLS, {"diameter": 8}),
+])
+def test_add_tool(tool_type, catalog, kwargs):
+    assert DatabaseOperations.add_tool("Новый инструмент", tool_type, "Т15К6", **kwargs)
+    assert catalog["Новый инструмент"].tool_type == tool_type
+    assert not DatabaseOperations.add_tool("Новый инструмент", tool_type, "Т15К6", **kwargs)
+
+
+@pytest.mark.parametrize("tool_type, kwargs", [
+    ("drilling", {"diameter": 8}),  # раньше записывался во фрезерные
+    ("milling", {}),  # фреза без диаметра
+    ("milling", {"diameter": 1000}),
+    ("turning", {"cutting_edge_angle": 180}),
+])
+def test_add_tool_rejects(tool_type, kwargs):
+    version = DatabaseOperations.version
+    with pytest.raises(ValueError):  # CatalogError - подкласс ValueError
+        DatabaseOperations.add_tool("Новый инструмент", tool_type, "Т15К6", **kwargs)
+    assert DatabaseOperations.version == version
+    assert "Новый инструмент" not in TURNING_TOOLS and "Новый инструмент" not in MILLING_TOOLS
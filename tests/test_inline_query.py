@@ -0,0 +1,46 @@
+"""
+Inline-запросы: разбор, расчет и текст ответа (utils/inline_query.py).
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import pytest
+
+from database.materials_lib import MATERIALS
+from database.search_index import CatalogSearch
+from database.tools_lib import MILLING_TOOLS, TURNING_TOOLS
+from utils.inline_query import USAGE, InlineQueries
+
+
+@pytest.fixture
+def queries():
+    search = CatalogSearch({"material": MATERIALS, "turning": TURNING_TOOLS, "milling": MILLING_TOOLS})
+    return InlineQueries(search, lambda calculator, **params: calculator.calculate(**params))
+
+
+def texts(results):
+    return [result.input_message_content.message_text for result in results]
+
+
+def test_spiral_without_depth_asks_for_parameters(queries):
+    results = queries.answer("фрез спир 45 концевая 10 4")
+    assert [result.title for result in results] == ["Укажите параметры в конце запроса"]
+    assert USAGE["milling"] in results[0].description
+
+
+def test_spiral_with_depth(queries):
+    results = queries.answer("фрез спир 45 концевая 10 4 5")
+    assert results and all("Шаг между проходами" in text for text in texts(results))
+
+
+def test_milling_without_depth(queries):
+    results = queries.answer("фрез контур 45 концевая 10 4")
+    assert results and all("Минутная подача" in text for text in texts(results))
+
+
+def test_result_ids_fit_bot_api(queries):
+    results = queries.answer("токарн 12Х18Н10Т 50")
+    assert results
+    for result in results:
+        assert len(result.id.encode()) <= 64
+    assert len({result.id for result in results}) == len(results)
@@ -0,0 +1,118 @@
+"""
+Готовые клавиатуры (utils/keyboards.py): замороженный JSON совпадает с to_json() разметки telebot
+и доходит до Bot API без изменений - из синхронного TeleBot и из AsyncTeleBot (асинхронный режим).
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import asyncio
+import json
+
+import pytest
+from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove
+
+from benchmarks.fake_bot_api import FakeBotAPI, TEST_TOKEN
+from database.compatibility import COMPATIBILITY
+from database.materials_lib import MATERIAL_GROUPS
+from database.tools_lib import OPERATIONS
+from utils.keyboards import Keyboards
+
+
+def reply_markup(buttons, row_width):
+    """Клавиатура в том виде, в котором ее строит telebot"""
+    markup = ReplyKeyboardMarkup(resize_keyboard=True, row_width=row_width)
+    markup.add(*buttons)
+    return markup
+
+
+def menus():
+    """(название, замороженная клавиатура, та же клавиатура telebot) для всех меню бота"""
+    yield "main_menu", Keyboards.main_menu(), reply_markup(["Токарная обработка", "Фрезерная обработка"], 2)
+    for process_type in OPERATIONS:
+        yield (f"operations_menu/{process_type}", Keyboards.operations_menu(process_type),
+               reply_markup(OPERATIONS[process_type] + ["Назад"], 1))
+        for group in [None, *MATERIAL_GROUPS]:
+            yield (f"tools_menu/{process_type}/{group}", Keyboards.tools_menu(process_type, group),
+                   reply_markup(COMPATIBILITY.tool_names(process_type, group) + ["Назад"], 1))
+    yield "material_groups", Keyboards.material_groups(), reply_markup(list(MATERIAL_GROUPS) + ["Назад"], 2)
+    for group, materials in MATERIAL_GROUPS.items():
+        yield f"materials_from_group/{group}", Keyboards.materials_from_group(group), \
+            reply_markup(materials + ["Назад"], 2)
+    yield "yes_no", Keyboards.yes_no_keyboard(), reply_markup(["Да", "Нет"], 2)
+    yield "remove", Keyboards.remove(), ReplyKeyboardRemove()
+
+
+MENUS = list(menus())
+
+
+@pytest.mark.parametrize("name, frozen, markup", MENUS, ids=[menu[0] for menu in MENUS])
+def test_frozen_json_matches_telebot(name, frozen, markup):
+    assert frozen.to_json() == markup.to_json()
+
+
+def test_menus_are_cached():
+    assert Keyboards.main_menu() is Keyboards.main_menu()
+
+
+def test_search_results_keyboard():
+    markup = Keyboards.search_results("material", 3, [(0, "Сталь 45"), (5, "Сталь 40Х")], "сталь", 8, True, 8)
+    expected = InlineKeyboardMarkup(row_width=1)
+    expected.add(InlineKeyboardButton("Сталь 45", callback_data="pick:material:3:0"))
+    expected.add(InlineKeyboardButton("Сталь 40Х", callback_data="pick:material:3:5"))
+    expected.row(InlineKeyboardButton("◀️", callback_data="page:material:0:сталь"),
+                 InlineKeyboardButton("▶️", callback_data="page:material:16:сталь"))
+    assert markup.to_json() == expected.to_json()
+
+
+@pytest.fixture
+def api():
+    api = FakeBotAPI().start()
+    yield api
+    api.stop()
+
+
+def received(api):
+    return [json.loads(params["reply_markup"]) for params in api.sent]
+
+
+def sent_markups():
+    """Все меню и inline-клавиатура результатов поиска - в том виде, в каком их отправляет бот"""
+    search = Keyboards.search_results("milling", 1, [(2, "Фреза концевая 6мм Т5К10")], "фреза", 0, False, 8)
+    return [frozen for _, frozen, _ in MENUS] + [search]
+
+
+def expected_markups():
+    return [json.loads(markup.to_json()) for _, _, markup in MENUS] + [json.loads(sent_markups()[-1].to_json())]
+
+
+def test_sync_bot_sends_frozen_json(api):
+    from telebot import TeleBot, apihelper
+
+    url, apihelper.API_URL = apihelper.API_URL, api.url
+    try:
+        bot = TeleBot(TEST_TOKEN, threaded=False)
+        for markup in sent_markups():
+            bot.send_message(1, "меню", reply_markup=markup)
+    finally:
+        apihelper.API_URL = url
+    assert received(api) == expected_markups()
+
+
+def test_async_bot_sends_frozen_json(api):
+    from telebot import asyncio_helper
+    from telebot.async_telebot import AsyncTeleBot
+
+    async def send_all():
+        bot = AsyncTeleBot(TEST_TOKEN)
+        try:
+            for markup in sent_markups():
+                await bot.send_message(1, "меню", reply_markup=markup)
+        finally:
+            await bot.close_session()
+
+    url, asyncio_helper.API_URL = asyncio_helper.API_URL, api.url
+    try:
+        asyncio.run(send_all())
+    finally:
+        asyncio_helper.API_URL = url
+    assert received(api) == expected_markups()
@@ -0,0 +1,145 @@
+"""
+MillingCalculator.calculate против поштучных расчетов calculate_* и calculate_helical_milling.
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+from fractions import Fraction
+
+import pytest
+
+from calculations.milling_calc import MillingCalculator
+from database.materials_lib import MATERIALS
+from database.tools_lib import MILLING_TOOLS, OPERATIONS
+
+CASES = [(material, tool, operation)
+         for material in MATERIALS.values()
+         for tool in MILLING_TOOLS.values()
+         for operation in OPERATIONS["milling"]]
+DIAMETERS = [0, 3, 10, 25.5]
+DEPTHS = [2, 100]
+
+
+def case_id(case):
+    material, tool, operation = case
+    return f"{material.name}/{tool.name}/{operation}"
+
+
+@pytest.mark.parametrize("case", CASES, ids=case_id)
+def test_calculate_matches_helpers(case):
+    """Каждое поле calculate - значение поштучного расчета, округленное как в токарном расчете"""
+    material, tool, operation = case
+    speed = round(MillingCalculator.calculate_cutting_speed(material, tool, operation), 1)
+    feed_per_tooth = round(MillingCalculator.calculate_feed_per_tooth(material, tool, operation), 3)
+    for diameter in DIAMETERS:
+        rpm = round(MillingCalculator.calculate_rpm(speed, diameter))
+        for depth in DEPTHS:
+            result = MillingCalculator.calculate(material, tool, operation, diameter, 4, depth)
+            helical = MillingCalculator.calculate_helical_milling(
+                diameter, MillingCalculator.mill_type(tool), material.group, depth)
+            assert result["speed"] == speed
+            assert result["feed_per_tooth"] == feed_per_tooth
+            assert result["rpm"] == rpm
+            assert result["feed_rate"] == round(MillingCalculator.calculate_feed_rate(feed_per_tooth, 4, rpm), 1)
+            assert result["step_over"] == helical["step_over"]
+            assert result["plunge_rate"] == helical["max_plunge_rate"]
+            assert result["helix_angle"] == helical["recommended_helix_angle"]
+
+
+@pytest.mark.parametrize("case", CASES[::7], ids=case_id)
+def test_batch_matches_calculate(case):
+    material, tool, operation = case
+    teeth = [2, 3, 4, 6]
+    table = MillingCalculator.calculate_batch(material, tool, operation, DIAMETERS, teeth, [5] * len(DIAMETERS))
+    for i, diameter in enumerate(DIAMETERS):
+        row = MillingCalculator.calculate(material, tool, operation, diameter, teeth[i], 5)
+        for field in ("speed", "feed_per_tooth", "rpm", "feed_rate", "step_over", "plunge_rate"):
+            assert table[field][i] == row[field], field
+
+
+def test_calculate_values():
+    result = MillingCalculator.calculate(MATERIALS["Сталь 45"], MILLING_TOOLS["Фреза концевая 10мм Т15К6"],
+                                         "Контурное фрезерование", 10, 4, 5)
+    assert result == {
+        "operation": "Контурное фрезерование", "speed": 111.2, "feed_per_tooth": 0.022, "rpm": 3540,
+        "feed_rate": 311.5, "material": "Сталь 45", "tool": "Фреза концевая 10мм Т15К6", "diameter": 10,
+        "teeth": 4, "cutting_depth": 5, "step_over": 2.5, "plunge_rate": 1.0, "helix_angle": 15,
+    }
+    # Без глубины резания - без параметров спирального фрезерования
+    assert "step_over" not in MillingCalculator.calculate(
+        MATERIALS["Сталь 45"], MILLING_TOOLS["Фреза концевая 10мм Т15К6"], "Контурное фрезерование", 10, 4)
+
+
+def test_helpers_not_rounded():
+    material, tool = MATERIALS["Сталь 45"], MILLING_TOOLS["Фреза концевая 10мм Т15К6"]
+    assert MillingCalculator.calculate_cutting_speed(material, tool, "Контурное фрезерование") == \
+        pytest.approx(111.15)
+    assert MillingCalculator.calculate_feed_per_tooth(material, tool, "Контурное фрезерование") == \
+        pytest.approx(0.0216)
+    assert MillingCalculator.calculate_rpm(111.15, 10) == pytest.approx(3538.0061115)
+    assert MillingCalculator.calculate_rpm(100, 0) == 0
+    assert MillingCalculator.calculate_feed_rate(0.1, 3, 1000.5) == pytest.approx(300.15)
+
+
+@pytest.mark.parametrize("material, expected", [
+    ("Сталь", (2.5, 1.4, 15)),
+    ("Алюминий", (4.0, 2.1, 30)),
+    ("Нержавеющая сталь", (2.0, 1.05, 10)),
+    ("Титан", (1.5, 0.7, 7)),
+    ("Конструкционная сталь", (2.5, 1.4, 15)),
+    ("Неизвестный материал", (2.5, 1.4, 15)),
+])
+def test_helical_milling(material, expected):
+    helical = MillingCalculator.calculate_helical_milling(10, "Торцевая фреза", material, 5)
+    assert (helical["step_over"], helical["max_plunge_rate"], helical["recommended_helix_angle"]) == expected
+    assert helical["material"] == material
+
+
+def test_helical_deep_cut():
+    helical = MillingCalculator.calculate_helical_milling(10, "Концевая фреза", "Титан", 40)
+    assert (helical["step_over"], helical["max_plunge_rate"]) == (1.2, 0.35)
+
+
+@pytest.mark.parametrize("teeth", [4, 4.0, Fraction(4), range(4, 8)])
+def test_batch_teeth_scalar_or_sequence(teeth):
+    material, tool = MATERIALS["Сталь 45"], MILLING_TOOLS["Фреза концевая 10мм Т15К6"]
+    table = MillingCalculator.calculate_batch(material, tool, "Контурное фрезерование", DIAMETERS, teeth)
+    expected = list(teeth) if isinstance(teeth, range) else [teeth] * len(DIAMETERS)
+    assert table["teeth"] == expected
+    assert len(table["feed_rate"]) == len(DIAMETERS)
+
+
+def test_batch_repeated_grid_matches_calculate():
+    """Повторяющаяся сетка диаметров (словарное кодирование столбцов) - те же значения, что у calculate"""
+    material, tool = MATERIALS["12Х18Н10Т"], MILLING_TOOLS["Фреза концевая 6мм Т5К10"]
+    diameters = [0, 2.5, 6, 10, 12.7] * 20
+    teeth = [2, 3, 4, 6] * 25
+    depths = [i * 0.75 for i in range(100)]
+    for operation in OPERATIONS["milling"]:
+        for column in (teeth, 4):
+            table = MillingCalculator.calculate_batch(material, tool, operation, diameters, column, depths)
+            for i, diameter in enumerate(diameters):
+                row = MillingCalculator.calculate(material, tool, operation, diameter, table["teeth"][i], depths[i])
+                for field in ("rpm", "feed_rate", "step_over", "plunge_rate"):
+                    assert table[field][i] == row[field], (field, diameter, depths[i])
+
+
+@pytest.mark.parametrize("name, mill_type", [
+    ("Фреза торцевая 20мм ВК8", "Торцевая фреза"),
+    ("Фреза концевая 10мм Т15К6", "Концевая фреза"),
+    ("Фреза червячная Р6М5", "Червячная фреза"),
+])
+def test_mill_type(name, mill_type):
+    assert MillingCalculator.mill_type(MILLING_TOOLS[name]) == mill_type
+
+
+def test_face_mill_plunge_rate():
+    """Торцевая фреза врезается с долей 0.7: 20 мм * 0.2 (сталь) * 0.7 = 2.8"""
+    material, tool = MATERIALS["Сталь 45"], MILLING_TOOLS["Фреза торцевая 20мм ВК8"]
+    row = MillingCalculator.calculate(material, tool, "Спиральное фрезерование", 20, 6, 10)
+    assert (row["step_over"], row["plunge_rate"]) == (5.0, 2.8)
+    table = MillingCalculator.calculate_batch(material, tool, "Спиральное фрезерование", [20, 20, 10], 6, [10, 10, 10])
+    assert table["plunge_rate"] == [2.8, 2.8, 1.4]
+    # Концевая фреза того же диаметра - консервативная доля 0.5
+    end_mill = MILLING_TOOLS["Фреза концевая 10мм Т15К6"]
+    assert MillingCalculator.calculate(material, end_mill, "Спиральное фрезерование", 20, 6, 10)["plunge_rate"] == 2.0
@@ -0,0 +1,102 @@
+"""
+OutboundQueue (runtime/outbound.py): повтор после 429 с retry_after на фейковом Bot API,
+порядок сообщений в чате, склейка и приоритет склеенного сообщения.
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import threading
+import time
+
+import pytest
+
+from benchmarks.fake_bot_api import FakeBotAPI, TEST_TOKEN
+from runtime.outbound import PRIORITY_MENU, PRIORITY_RESULT, OutboundQueue
+
+
+@pytest.fixture
+def api():
+    from telebot import apihelper
+
+    api = FakeBotAPI(chat_interval=0.5).start()
+    url, apihelper.API_URL = apihelper.API_URL, api.url
+    yield api
+    apihelper.API_URL = url
+    api.stop()
+
+
+def sent_by_chat(api):
+    chats = {}
+    for params in api.sent:
+        chats.setdefault(int(params["chat_id"]), []).append(params["text"])
+    return chats
+
+
+def test_retry_after_keeps_order(api):
+    """Очередь шлет чаще лимита API: 429 приостанавливает чат, сообщения уходят повторно и по порядку"""
+    from telebot import TeleBot
+
+    queue = OutboundQueue(TeleBot(TEST_TOKEN, threaded=False), workers=4, global_rate=1000, chat_rate=100,
+                          chat_burst=10)
+    start = time.monotonic()
+    for i in range(3):
+        for chat_id in (1, 2):
+            # Разный parse_mode - сообщения не склеиваются
+            queue.send_message(chat_id, f"{chat_id}-{i}", parse_mode="HTML" if i % 2 else None)
+    assert queue.drain(timeout=30)
+    stats = queue.stats()
+    assert sent_by_chat(api) == {1: ["1-0", "1-1", "1-2"], 2: ["2-0", "2-1", "2-2"]}
+    assert (stats["sent"], stats["failed"], stats["coalesced"]) == (6, 0, 0)
+    assert stats["throttled"] == api.throttled > 0
+    # Пауза на retry_after (1 с): не больше одного 429 на сообщение
+    assert api.throttled <= 4
+    assert time.monotonic() - start >= 1.0
+
+
+class GatedBot:
+    """Бот, первая отправка которого ждет сигнала: остальные сообщения успевают встать в очередь"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        if not self.calls:
+            self.started.set()
+            self.release.wait(10)
+        self.calls.append((chat_id, text, kwargs.get("parse_mode")))
+
+
+@pytest.fixture
+def gated():
+    bot = GatedBot()
+    queue = OutboundQueue(bot, workers=1, global_rate=1000, chat_rate=1000, chat_burst=10)
+    queue.send_message(99, "занят")
+    assert bot.started.wait(10)
+    yield bot, queue
+    bot.release.set()
+    queue.drain(timeout=10)
+
+
+def test_coalescing(gated):
+    bot, queue = gated
+    queue.send_message(1, "a")
+    queue.send_message(1, "b")
+    queue.send_message(1, "c", parse_mode="HTML")
+    queue.send_message(1, "d", parse_mode="HTML")
+    bot.release.set()
+    assert queue.drain(timeout=10)
+    assert bot.calls[1:] == [(1, "a\n\nb", None), (1, "c\n\nd", "HTML")]
+    assert queue.stats()["coalesced"] == 2
+
+
+def test_coalesced_result_keeps_its_priority(gated):
+    """Результат, склеенный с меню в ожидании, уходит раньше меню других чатов"""
+    bot, queue = gated
+    queue.send_message(1, "меню 1", PRIORITY_MENU)
+    queue.send_message(2, "меню 2", PRIORITY_MENU)
+    queue.send_message(2, "результат 2", PRIORITY_RESULT)
+    bot.release.set()
+    assert queue.drain(timeout=10)
+    assert [text for _, text, _ in bot.calls[1:]] == ["меню 2\n\nрезультат 2", "меню 1"]
@@ -0,0 +1,36 @@
+"""
+Расчетные материалы (calculations/regime_model.py): имя inferred_name восстанавливается
+в тот же материал - и через from_name, и через сохраненную сессию.
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import pytest
+
+from calculations.regime_model import REGIME_MODEL, inferred_name
+from utils.sessions import UserState
+
+
+@pytest.mark.parametrize("hardness, tensile_strength", [
+    (230, 750),
+    (250.5, 812.25),
+    (230.123456789, 750.987654321),
+    (199.99999999999997, 3000.0),
+    (1, 1),
+    (1234567 / 1643, 2999.0000001),
+])
+def test_inferred_name_round_trip(hardness, tensile_strength):
+    material = REGIME_MODEL.infer("Конструкционная сталь", hardness, tensile_strength)
+    assert (material.hardness, material.tensile_strength) == (hardness, tensile_strength)
+    restored = REGIME_MODEL.from_name(material.name)
+    assert restored == material
+    assert restored.name == inferred_name("Конструкционная сталь", hardness, tensile_strength)
+
+    state = UserState()
+    state.process_type, state.material = "turning", material
+    assert UserState.from_row(state.to_row()).material == material
+
+
+def test_inferred_name_format():
+    assert inferred_name("Титан", 300.0, 950) == "Титан, HB 300, σв 950"
+    assert REGIME_MODEL.from_name("Сталь 45") is None
@@ -0,0 +1,48 @@
+"""
+Хранилища сессий (utils/sessions.py): интерфейс SessionStore, сохранение и истечение сессий.
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import pytest
+
+from database.materials_lib import MATERIALS
+from utils.sessions import MemorySessionStore, SessionStore, SqliteSessionStore
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+    class Partial(SessionStore):
+        def get(self, user_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = MemorySessionStore() if request.param == "memory" else SqliteSessionStore(str(tmp_path / "s.db"))
+    yield store
+    store.close()
+
+
+def test_state_survives_commit(store):
+    state = store.get(1)
+    state.process_type = "turning"
+    state.material = MATERIALS["Сталь 45"]
+    store.commit(1)
+    assert store.get(1).material.name == "Сталь 45"
+    store.commit(1)
+    assert len(store) == 1
+    store.delete(1)
+    assert store.get(1).material is None
+
+
+def test_expired_sessions_not_counted(store):
+    store.ttl = -1
+    store.get(1)
+    store.commit(1)
+    assert len(store) == 0
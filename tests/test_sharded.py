@@ -0,0 +1,93 @@
+"""
+ShardedDispatcher (runtime/sharded.py): перемешанные обновления многих пользователей,
+итоговое состояние каждого пользователя - как при последовательной обработке.
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import multiprocessing
+import sys
+import threading
+
+import pytest
+
+from runtime.sharded import ShardedDispatcher
+
+USERS = 300
+ROUNDS = 20
+
+
+def updates():
+    """Обновления раундами: в каждом раунде по одному от каждого пользователя"""
+    return [(user, step) for step in range(ROUNDS) for user in range(USERS)]
+
+
+def fold(state, step):
+    """Состояние зависит от порядка шагов: перестановка или пропуск меняют результат"""
+    return (state * 31 + step + 1) % 1_000_000_007
+
+
+def expected_states():
+    states = {}
+    for user, step in updates():
+        states[user] = fold(states.get(user, 0), step)
+    return states
+
+
+def test_threads_keep_per_user_order():
+    states, shards = {}, {}
+    lock = threading.Lock()
+
+    def handle(item):
+        user, step = item
+        # Состояние пользователя меняет только рабочий его шарда - без блокировки
+        states[user] = fold(states.get(user, 0), step)
+        with lock:
+            shards.setdefault(user, set()).add(threading.current_thread().name)
+
+    dispatcher = ShardedDispatcher(handle, shards=4, max_queue=50)
+    for user, step in updates():
+        assert dispatcher.submit(user, (user, step), timeout=None)
+    assert dispatcher.drain(timeout=30)
+    assert states == expected_states()
+    assert all(len(names) == 1 for names in shards.values())
+    assert dispatcher.processed == USERS * ROUNDS
+    assert sum(dispatcher.processed_by_shard()) == USERS * ROUNDS
+    assert dispatcher.rejected == 0
+
+
+def test_full_queue_rejects():
+    release = threading.Event()
+    dispatcher = ShardedDispatcher(lambda item: release.wait(), shards=1, max_queue=2)
+    # Первая задача занимает рабочего, еще две заполняют очередь
+    accepted = [dispatcher.submit(1, i, timeout=0.5) for i in range(3)]
+    assert accepted == [True, True, True]
+    assert not dispatcher.submit(1, 3)
+    assert dispatcher.rejected == 1
+    release.set()
+    assert dispatcher.drain(timeout=10)
+    assert not dispatcher.submit(1, 4)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="рабочие-процессы запускаются через fork")
+def test_processes_keep_per_user_order():
+    results = multiprocessing.get_context("fork").Queue()
+    states = {}
+
+    def handle(item):
+        user, step = item
+        states[user] = fold(states.get(user, 0), step)
+        results.put((user, states[user]))
+
+    dispatcher = ShardedDispatcher(handle, shards=3, max_queue=50, processes=True)
+    for user, step in updates():
+        assert dispatcher.submit(user, (user, step), timeout=None)
+    final = {}
+    for _ in range(USERS * ROUNDS):
+        user, state = results.get(timeout=30)
+        final[user] = state
+    assert dispatcher.drain(timeout=30)
+    assert final == expected_states()
+    # Счетчики рабочих-процессов видны родителю (общая память)
+    assert dispatcher.processed == USERS * ROUNDS
+    assert all(dispatcher.processed_by_shard())
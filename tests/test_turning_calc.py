@@ -0,0 +1,26 @@
+"""
+TurningCalculator.calculate_batch против поштучного calculate.
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import pytest
+
+from calculations.turning_calc import TurningCalculator
+from database.materials_lib import MATERIALS
+from database.tools_lib import OPERATIONS, TURNING_TOOLS
+
+
+@pytest.mark.parametrize("diameters", [
+    [0, -1, 0.5, 20, 45.3, 120],  # без повторов - расчет по всему столбцу
+    [0, 0.5, 20, 45.3, 120] * 10,  # повторяющаяся сетка - по различным диаметрам
+])
+def test_batch_matches_calculate(diameters):
+    for material in MATERIALS.values():
+        for tool in TURNING_TOOLS.values():
+            for operation in OPERATIONS["turning"]:
+                table = TurningCalculator.calculate_batch(material, tool, operation, diameters)
+                for i, diameter in enumerate(diameters):
+                    row = TurningCalculator.calculate(material, tool, operation, diameter)
+                    assert (table["speed"][i], table["feed"][i], table["rpm"][i]) == \
+                        (row["speed"], row["feed"], row["rpm"])
@@ -0,0 +1,102 @@
+"""
+KeyedWorkerPool (runtime/webhook.py): порядок задач одного ключа и обратное давление
+ограниченной очереди; ответ 503 webhook при заполненной очереди.
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import json
+import threading
+import time
+
+from benchmarks.fake_bot_api import make_update
+from runtime.webhook import KeyedWorkerPool, WebhookServer, update_user_id
+
+KEYS = 100
+ROUNDS = 30
+
+
+def test_per_key_order():
+    done, running = {}, set()
+    lock = threading.Lock()
+    overlaps = []
+
+    def handle(item):
+        key, step = item
+        with lock:
+            if key in running:
+                overlaps.append(key)
+            running.add(key)
+        if step % 7 == 0:
+            time.sleep(0.0005)  # разная длительность задач перемешивает рабочих
+        with lock:
+            running.discard(key)
+            done.setdefault(key, []).append(step)
+
+    pool = KeyedWorkerPool(handle, workers=8, max_queue=KEYS * ROUNDS)
+    for step in range(ROUNDS):
+        for key in range(KEYS):
+            assert pool.submit(key, (key, step))
+    assert pool.drain(timeout=30)
+    assert done == {key: list(range(ROUNDS)) for key in range(KEYS)}
+    assert overlaps == []
+    assert (pool.processed, pool.rejected, pool.qsize()) == (KEYS * ROUNDS, 0, 0)
+
+
+def blocked_pool(max_queue):
+    release = threading.Event()
+    started = threading.Event()
+
+    def handle(item):
+        started.set()
+        release.wait(10)
+
+    pool = KeyedWorkerPool(handle, workers=1, max_queue=max_queue)
+    return pool, started, release
+
+
+def test_full_queue_rejects():
+    pool, started, release = blocked_pool(max_queue=3)
+    # Выполняемая задача тоже занимает место в очереди
+    assert all(pool.submit(key, key) for key in (1, 2, 1))
+    assert started.wait(10)
+    assert not pool.submit(3, 3)
+    assert not pool.submit(1, 4, timeout=0.05)
+    assert (pool.rejected, pool.qsize()) == (2, 3)
+    release.set()
+    assert pool.drain(timeout=10)
+    assert (pool.processed, pool.rejected) == (3, 2)
+    # После остановки задачи не принимаются
+    assert not pool.submit(1, 5)
+    assert pool.rejected == 3
+
+
+def test_submit_waits_for_room():
+    pool, started, release = blocked_pool(max_queue=1)
+    assert pool.submit(1, 1)
+    assert started.wait(10)
+    threading.Timer(0.05, release.set).start()
+    assert pool.submit(2, 2, timeout=5)
+    assert pool.drain(timeout=10)
+    assert (pool.processed, pool.rejected) == (2, 0)
+
+
+def test_update_user_id():
+    assert update_user_id(make_update(1, 42, "/start")) == 42
+    assert update_user_id({"update_id": 2, "callback_query": {"id": "1", "from": {"id": 7}}}) == 7
+    assert update_user_id({"update_id": 3, "channel_post": {"chat": {"id": -1}}}) is None
+
+
+def test_webhook_answers_503_when_full():
+    release = threading.Event()
+    server = WebhookServer(lambda message: release.wait(10), listen=("127.0.0.1", 0), workers=1, max_queue=1,
+                           enqueue_timeout=0.05)
+    try:
+        assert server.accept(json.dumps(make_update(1, 1, "a")).encode()) == 200
+        assert server.accept(json.dumps(make_update(2, 2, "b")).encode()) == 503
+        assert server.accept(b"not json") == 400
+        assert server.pool.rejected == 1
+    finally:
+        release.set()
+        server.pool.drain(timeout=10)
+        server._server.server_close()
@@ -0,0 +1,226 @@
+"""
+Потоковая запись таблиц в документы CSV и XLSX.
+Строки читаются из итератора и сразу пишутся в файл: в памяти не держится
+ни таблица, ни документ целиком. XLSX собирается стандартным zipfile
+(лист пишется в архив по мере поступления строк), без openpyxl.
+"""
+import csv
+import io
+import zipfile
+from typing import BinaryIO, Dict, Iterable, List, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# Строк на листе XLSX (включая заголовок); дальше - следующий лист
+XLSX_SHEET_ROWS = 1_048_576
+
+# Столбец документа: (заголовок, текстовый ли столбец)
+Column = Tuple[str, bool]
+
+
+def write_csv(file: BinaryIO, columns: Sequence[Column], rows: Iterable[Sequence]) -> int:
+    """
+    Таблица в CSV (UTF-8 с BOM - Excel распознает кириллицу)
+    :return: число записанных строк без заголовка
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="", write_through=False)
+    counter = _Counter(rows)
+    try:
+        writer = csv.writer(text)
+        writer.writerow([title for title, _ in columns])
+        writer.writerows(counter)
+    finally:
+        text.flush()
+        text.detach()
+    return counter.count
+
+
+class _Counter:
+    """Итератор строк со счетчиком (writerows не возвращает число строк)"""
+    __slots__ = ("_rows", "count")
+
+    def __init__(self, rows: Iterable[Sequence]):
+        self._rows = iter(rows)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self._rows)
+        self.count += 1
+        return row
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '{sheets}</Types>'
+)
+_SHEET_CONTENT_TYPE = ('<Override PartName="/xl/worksheets/sheet{index}.xml" '
+                       'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>')
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}'
+    '<Relationship Id="rIdStyles" Target="styles.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+    '<Relationship Id="rIdStrings" Target="sharedStrings.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"/>'
+    '</Relationships>'
+)
+# Стиль 1 - полужирный шрифт заголовка
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '</styleSheet>'
+)
+# Заголовок листа: ширина столбцов и закрепленная первая строка
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" '
+    'state="frozen"/></sheetView></sheetViews>'
+    '<cols>{cols}</cols><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+class XlsxWriter:
+    """
+    Книга XLSX с одной таблицей, записываемая построчно.
+    Текстовые значения - общие строки (названия из каталога повторяются
+    в каждой строке), числа - значения ячеек.
+    """
+
+    def __init__(self, file: BinaryIO, columns: Sequence[Column], sheet_title: str = "Лист"):
+        self._zip = zipfile.ZipFile(file, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6)
+        self._columns = list(columns)
+        self._title = sheet_title
+        self._strings: Dict[str, int] = {}
+        self._sheets: List[str] = []
+        self._sheet = None
+        self._row = 0
+        self.count = 0
+        self._template = self._row_template()
+        self._text = [index for index, (_, text) in enumerate(self._columns) if text]
+
+    def _row_template(self) -> str:
+        """Строка листа по типам столбцов: одна подстановка str.format на строку таблицы"""
+        cells = []
+        for index, (_, text) in enumerate(self._columns, start=1):
+            cells.append(f'<c t="s"><v>{{{index}}}</v></c>' if text else f"<c><v>{{{index}}}</v></c>")
+        return '<row r="{0}">' + "".join(cells) + "</row>"
+
+    def _string(self, value: str) -> int:
+        index = self._strings.get(value)
+        if index is None:
+            index = self._strings[value] = len(self._strings)
+        return index
+
+    def _open_sheet(self) -> None:
+        self._close_sheet()
+        number = len(self._sheets) + 1
+        name = self._title if number == 1 else f"{self._title} {number}"
+        self._sheets.append(name)
+        self._sheet = io.TextIOWrapper(
+            self._zip.open(f"xl/worksheets/sheet{number}.xml", "w", force_zip64=True),
+            encoding="utf-8", write_through=False)
+        # Текстовые столбцы - названия из каталога, шире числовых
+        widths = "".join(f'<col min="{index}" max="{index}" width="{max(30 if text else 12, len(title) + 4)}" '
+                         f'customWidth="1"/>' for index, (title, text) in enumerate(self._columns, start=1))
+        self._sheet.write(_SHEET_HEAD.format(cols=widths))
+        header = "".join(f'<c t="s" s="1"><v>{self._string(title)}</v></c>' for title, _ in self._columns)
+        self._sheet.write(f'<row r="1">{header}</row>')
+        self._row = 1
+
+    def _close_sheet(self) -> None:
+        if self._sheet is not None:
+            self._sheet.write(_SHEET_TAIL)
+            self._sheet.close()
+            self._sheet = None
+
+    def write_rows(self, rows: Iterable[Sequence]) -> None:
+        template = self._template
+        text_columns = self._text
+        # Лист может быть открыт предыдущим вызовом write_rows
+        write = self._sheet.write if self._sheet is not None else None
+        for row in rows:
+            if self._sheet is None or self._row >= XLSX_SHEET_ROWS:
+                self._open_sheet()
+                write = self._sheet.write
+            values = list(row)
+            for index in text_columns:
+                values[index] = self._string(values[index])
+            self._row += 1
+            write(template.format(self._row, *values))
+            self.count += 1
+
+    def close(self) -> None:
+        if self._sheet is None:
+            self._open_sheet()  # пустая таблица - лист с заголовком
+        self._close_sheet()
+        sheets = range(1, len(self._sheets) + 1)
+        self._zip.writestr("[Content_Types].xml", _CONTENT_TYPES.format(
+            sheets="".join(_SHEET_CONTENT_TYPE.format(index=index) for index in sheets)))
+        self._zip.writestr("_rels/.rels", _ROOT_RELS)
+        self._zip.writestr("xl/workbook.xml", _WORKBOOK.format(sheets="".join(
+            f'<sheet name="{escape(name[:31])}" sheetId="{index}" r:id="rId{index}"/>'
+            for index, name in zip(sheets, self._sheets))))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS.format(sheets="".join(
+            f'<Relationship Id="rId{index}" Target="worksheets/sheet{index}.xml" '
+            f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+            for index in sheets)))
+        self._zip.writestr("xl/styles.xml", _STYLES)
+        strings = "".join(f"<si><t>{escape(value)}</t></si>" for value in self._strings)
+        self._zip.writestr("xl/sharedStrings.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            f'uniqueCount="{len(self._strings)}">{strings}</sst>'))
+        self._zip.close()
+
+
+def write_xlsx(file: BinaryIO, columns: Sequence[Column], rows: Iterable[Sequence], sheet_title: str = "Лист") -> int:
+    """
+    Таблица в XLSX
+    :return: число записанных строк без заголовка
+    """
+    writer = XlsxWriter(file, columns, sheet_title)
+    writer.write_rows(rows)
+    writer.close()
+    return writer.count
+
+
+# Формат документа (он же расширение файла) -> функция записи (file, columns, rows) -> число строк
+WRITERS = {
+    "csv": write_csv,
+    "xlsx": write_xlsx,
+}
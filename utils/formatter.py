@@ -0,0 +1,192 @@
+"""
+Форматирование результатов расчета по шаблонам.
+
+Шаблон - текст в разметке Markdown с полями {имя} из словаря результата
+калькулятора. Шаблон компилируется один раз на (вид расчета, операция, язык,
+формат вывода): постоянные фрагменты склеиваются и заранее экранируются,
+название операции подставляется при компиляции, а результат расчета
+подставляется в сгенерированную f-строку без промежуточных словарей.
+"""
+import html
+import re
+import string
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Форматы вывода: Markdown (parse_mode='Markdown'), простой текст, HTML (parse_mode='HTML'), строка CSV
+FORMATS = ("markdown", "plain", "html", "csv")
+DEFAULT_LOCALE = "ru"
+# Текстовые поля экранируются; остальные - числа, выводятся через str() как в f-строке
+TEXT_FIELDS = frozenset({"operation", "material", "tool"})
+
+# Шаблоны: язык -> вид расчета -> (основной текст, дополнения по операциям)
+TEMPLATES: Dict[str, Dict[str, Tuple[str, Dict[str, str]]]] = {
+    "ru": {
+        "turning": (
+            "⚙️ *Результаты токарной обработки:*\n\n"
+            "🔧 Операция: {operation}\n"
+            "📏 Материал: {material}\n"
+            "🛠 Инструмент: {tool}\n"
+            "📐 Диаметр: {diameter} мм\n\n"
+            "⚡ *Параметры:*\n"
+            "- Скорость резания: {speed} м/мин\n"
+            "- Подача: {feed} мм/об\n"
+            "- Обороты: {rpm} об/мин\n\n"
+            "💡 *Рекомендации:*\n"
+            "• Используйте СОЖ для охлаждения\n"
+            "• Для чистовой обработки уменьшите подачу на 20%",
+            {},
+        ),
+        "milling": (
+            "⚙️ *Результаты фрезерования:*\n\n"
+            "🔧 Операция: {operation}\n"
+            "📏 Материал: {material}\n"
+            "🛠 Инструмент: {tool}\n"
+            "📐 Диаметр фрезы: {diameter} мм\n"
+            "🦷 Зубьев: {teeth}\n\n"
+            "⚡ *Параметры:*\n"
+            "- Скорость: {speed} м/мин\n"
+            "- Подача на зуб: {feed_per_tooth} мм/зуб\n"
+            "- Обороты: {rpm} об/мин\n"
+            "- Минутная подача: {feed_rate} мм/мин\n",
+            {
+                "Спиральное фрезерование": (
+                    "\n🌀 *Параметры спирали:*\n"
+                    "- Шаг между проходами: {step_over} мм\n"
+                    "- Вертикальная подача: {plunge_rate} мм/мин\n"
+                    "- Глубина резания: {cutting_depth} мм\n"
+                    "\n💡 *Рекомендации:*\n"
+                    "• Используйте компрессионные фрезы\n"
+                    "• Начинайте с 70% от расчетной подачи"
+                ),
+            },
+        ),
+    },
+}
+
+_BOLD = re.compile(r"\*([^*\n]+)\*")
+_MARKDOWN_SPECIAL = re.compile(r"([_*`\[])")
+
+
+@lru_cache(maxsize=4096)
+def escape_markdown(text: str) -> str:
+    """Экранирование для parse_mode='Markdown' (названия из каталога повторяются - кэш)"""
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+@lru_cache(maxsize=4096)
+def escape_html(text: str) -> str:
+    return html.escape(text, quote=False)
+
+
+@lru_cache(maxsize=4096)
+def escape_csv(text: str) -> str:
+    """Поле CSV: в кавычках, если содержит разделитель, кавычку или перевод строки"""
+    if any(char in text for char in ',"\n\r'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def _identity(text: str) -> str:
+    return text
+
+
+# Формат -> (преобразование постоянного текста с разметкой, экранирование текстовых полей)
+_OUTPUT: Dict[str, Tuple[Callable[[str], str], Callable[[str], str]]] = {
+    "markdown": (_identity, escape_markdown),
+    "plain": (lambda text: _BOLD.sub(r"\1", text), _identity),
+    "html": (lambda text: _BOLD.sub(r"<b>\1</b>", escape_html(text)), escape_html),
+    "csv": (_identity, escape_csv),
+}
+
+
+def _fstring_literal(text: str) -> str:
+    """Постоянный текст как часть литерала f"..." (кавычки, переводы строк, скобки)"""
+    encoded = repr(text)
+    if encoded[0] == "'":
+        encoded = encoded.replace('"', '\\"')
+    encoded = encoded[1:-1]
+    return encoded.replace("{", "{{").replace("}", "}}")
+
+
+class CompiledTemplate:
+    """Шаблон, скомпилированный в функцию result -> текст"""
+    __slots__ = ("fields", "header", "render")
+
+    def __init__(self, parts: List[Tuple[str, Optional[str]]], escape: Callable[[str], str], header: str = ""):
+        """
+        :param parts: пары (постоянный текст, поле результата или None); текст уже экранирован
+        :param escape: экранирование текстовых полей
+        :param header: строка заголовков (для CSV)
+        """
+        self.fields = [field for _, field in parts if field is not None]
+        self.header = header
+        # Одна f-строка вида f"...{r['speed']}...{escape(r['material'])}...": постоянные
+        # части склеены, значения подставляются без цикла по полям и без промежуточных словарей
+        code = []
+        for literal, field in parts:
+            code.append(_fstring_literal(literal))
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"Недопустимое имя поля шаблона: {field}")
+            code.append(f"{{escape(r['{field}'])}}" if field in TEXT_FIELDS else f"{{r['{field}']}}")
+        self.render: Callable[[dict], str] = eval(f'lambda r: f"{"".join(code)}"', {"escape": escape})
+
+
+class ResultFormatter:
+    # Скомпилированные шаблоны по (вид расчета, операция, язык, формат)
+    _compiled: Dict[Tuple[str, str, str, str], CompiledTemplate] = {}
+
+    @staticmethod
+    def _source(kind: str, operation: str, locale: str) -> str:
+        templates = TEMPLATES.get(locale) or TEMPLATES[DEFAULT_LOCALE]
+        base, extras = templates[kind]
+        return base + extras.get(operation, "")
+
+    @staticmethod
+    def _compile(kind: str, operation: str, locale: str, output: str) -> CompiledTemplate:
+        source = ResultFormatter._source(kind, operation, locale)
+        convert, escape = _OUTPUT[output]
+        parts = []
+        literal = ""
+        for text, field, _, _ in string.Formatter().parse(source):
+            literal += convert(text)
+            if field == "operation":
+                # Операция известна при компиляции: подставляется как постоянный текст
+                literal += escape(operation)
+            elif field is not None:
+                parts.append((literal, field))
+                literal = ""
+        parts.append((literal, None))
+
+        if output == "csv":
+            # Строка CSV: операция и поля шаблона в порядке появления, без текста шаблона
+            fields = [field for _, field in parts if field is not None]
+            row = [(escape(operation) + ",", fields[0])] + [(",", field) for field in fields[1:]] + [("", None)]
+            return CompiledTemplate(row, escape, ",".join(["operation"] + fields))
+        return CompiledTemplate(parts, escape)
+
+    @staticmethod
+    def template(kind: str, operation: str, locale: str = DEFAULT_LOCALE,
+                 output: str = "markdown") -> CompiledTemplate:
+        """Скомпилированный шаблон (компилируется при первом обращении)"""
+        key = (kind, operation, locale, output)
+        compiled = ResultFormatter._compiled.get(key)
+        if compiled is None:
+            if output not in _OUTPUT:
+                raise ValueError(f"Неизвестный формат вывода: {output}")
+            compiled = ResultFormatter._compiled[key] = ResultFormatter._compile(kind, operation, locale, output)
+        return compiled
+
+    @staticmethod
+    def render(kind: str, result: dict, locale: str = DEFAULT_LOCALE, output: str = "markdown") -> str:
+        """
+        Текст результата расчета
+        :param kind: вид расчета ("turning"/"milling")
+        :param result: словарь калькулятора (calculate) без дополнительных полей
+        """
+        compiled = ResultFormatter._compiled.get((kind, result["operation"], locale, output))
+        if compiled is None:
+            compiled = ResultFormatter.template(kind, result["operation"], locale, output)
+        return compiled.render(result)
@@ -0,0 +1,217 @@
+"""
+Расчет одной строкой в inline-режиме: «@bot токарн 45 Т5К10 50».
+
+Запрос разбирается за одно обновление: слова вида обработки и операции
+сопоставляются по началу слова, числа в конце - параметры расчета
+(точение: диаметр; фрезерование: диаметр фрезы и зубья, для спирального -
+и глубина), остальные слова делятся между материалом и инструментом
+по индексам поиска каталога (database/search_index.py). Без инструмента
+в запросе выдаются расчеты для всех подходящих материалу инструментов.
+
+Ответы (статьи inline-результатов) хранятся в общем LRU-кэше по
+нормализованному запросу: повтор запроса любым пользователем не повторяет
+разбор и расчет. Кэш очищается при изменении каталога. Inline-режим
+включается у бота командой /setinline в @BotFather.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Tuple
+
+from telebot.types import InlineQueryResultArticle, InputTextMessageContent
+
+from database.compatibility import COMPATIBILITY
+from database.materials_lib import MATERIALS
+from database.search_index import CatalogSearch, normalize
+from database.tools_lib import MILLING_TOOLS, OPERATIONS, TURNING_TOOLS
+from utils.formatter import ResultFormatter
+
+# Начала слов вида обработки
+PROCESS_WORDS = {"токар": "turning", "фрез": "milling"}
+# Кратчайшее начало слова операции («нар», «раст», «спир»)
+OPERATION_PREFIX = 3
+# Число кандидатов при неоднозначном материале/инструменте и статей в ответе
+MATERIAL_CANDIDATES = 5
+MAX_RESULTS = 10
+CACHE_SIZE = 4096
+
+USAGE = {
+    "turning": "токарн <операция> <материал> <инструмент> <диаметр>",
+    "milling": "фрез <операция> <материал> <инструмент> <диаметр фрезы> <зубья> [глубина - для спирального]",
+}
+
+Key = Tuple[str, ...]
+
+
+def _result_id(*parts: str) -> str:
+    """Id статьи: Bot API ограничивает его 64 байтами, кириллические имена в них не помещаются"""
+    return hashlib.sha1("\0".join(parts).encode()).hexdigest()
+
+
+def _number(word: str) -> Optional[float]:
+    try:
+        value = float(word.replace(",", "."))
+    except ValueError:
+        return None
+    return value if value == value and value not in (float("inf"), float("-inf")) else None
+
+
+def query_key(query: str) -> Key:
+    """Нормализованный запрос: слова без регистра и латиницы-двойников, числа - в одном виде"""
+    key = []
+    for word in query.split():
+        value = _number(word)
+        if value is not None:
+            key.append(f"{value:g}")
+        else:
+            key.extend(normalize(word))
+    return tuple(key)
+
+
+class InlineQueries:
+    """Разбор inline-запросов, расчет и общий LRU-кэш ответов"""
+
+    def __init__(self, search: CatalogSearch, calculate: Callable, cache_size: int = CACHE_SIZE):
+        """
+        :param search: индексы поиска по справочникам ("material", "turning", "milling")
+        :param calculate: расчет calculate(calculator, **params) (в боте - с метриками)
+        """
+        self._search = search
+        self._calculate = calculate
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[Key, List[InlineQueryResultArticle]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        """Сброс кэша (подписка на изменения каталога)"""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+    def answer(self, query: str) -> List[InlineQueryResultArticle]:
+        """Статьи ответа на запрос (из кэша или с расчетом)"""
+        key = query_key(query)
+        with self._lock:
+            results = self._cache.get(key)
+            if results is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return results
+            self.misses += 1
+        results = self._results(key)
+        with self._lock:
+            self._cache[key] = results
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return results
+
+    @staticmethod
+    def _operation(process_type: Optional[str], token: str) -> Optional[Tuple[str, str]]:
+        """(вид обработки, операция), если начало слова указывает на одну операцию"""
+        if len(token) < OPERATION_PREFIX:
+            return None
+        found = [(kind, operation) for kind in ([process_type] if process_type else OPERATIONS)
+                 for operation in OPERATIONS[kind]
+                 if any(word.startswith(token) for word in normalize(operation))]
+        return found[0] if len(found) == 1 else None
+
+    def _resolve(self, kind: str, tokens: List[str], limit: int) -> List[int]:
+        """Записи справочника по словам: по началам слов, при неудаче - нечеткий поиск"""
+        index = self._search.index(kind)
+        found = index.match_ids(tokens, limit)
+        if not found and tokens:
+            found = index.search_ids(" ".join(tokens), 0, limit)
+        return found
+
+    def _results(self, key: Key) -> List[InlineQueryResultArticle]:
+        # Вид обработки и операция - по словам запроса
+        process_type, operation, words = None, None, []
+        for token in key:
+            kind = next((kind for prefix, kind in PROCESS_WORDS.items() if token.startswith(prefix)), None)
+            if kind is not None and process_type in (None, kind):
+                process_type = kind
+                continue
+            found = None if operation else self._operation(process_type, token)
+            if found is not None:
+                process_type, operation = found
+                continue
+            words.append(token)
+
+        # Слова инструмента определяют вид обработки, если он не назван
+        if process_type is None:
+            process_type = next((kind for kind in ("turning", "milling")
+                                 if any(self._search.index(kind).has_prefix(word) for word in words
+                                        if _number(word) is None)), "turning")
+        operation = operation or OPERATIONS[process_type][0]
+
+        # Параметры - числа в конце запроса
+        wanted = 1 if process_type == "turning" else 3 if operation == "Спиральное фрезерование" else 2
+        count = 0
+        while count < min(wanted, len(words)) and _number(words[-1 - count]) is not None:
+            count += 1
+        params = [_number(word) for word in words[len(words) - count:]]
+        words = words[:len(words) - count]
+
+        # Слова делятся между материалом и инструментом по индексам;
+        # общие слова («10» - «Сталь 10» и «концевая 10мм») пробуются с обеих сторон
+        materials, tools = self._search.index("material"), self._search.index(process_type)
+        shared = [word for word in words if materials.has_prefix(word) and tools.has_prefix(word)]
+        material_words = [word for word in words if word not in shared and not tools.has_prefix(word)]
+        tool_words = [word for word in words if word not in shared and tools.has_prefix(word)]
+        if not material_words and not shared:
+            return [self._hint(process_type, "Укажите материал", operation)]
+        material_ids = materials.match_ids(material_words + shared, MATERIAL_CANDIDATES)
+        if not material_ids:
+            material_ids = self._resolve("material", material_words or shared, MATERIAL_CANDIDATES)
+        if not material_ids:
+            return [self._hint(process_type, "Материал не найден", " ".join(material_words + shared))]
+        tool_ids = tools.match_ids(tool_words + shared, MAX_RESULTS) if tool_words else []
+        if not tool_ids:
+            tool_ids = self._resolve(process_type, tool_words, MAX_RESULTS) if tool_words else \
+                range(len(tools))
+        # Спиральному фрезерованию нужна глубина: без нее нет параметров спирали для ответа
+        if len(params) < wanted or any(value <= 0 for value in params):
+            return [self._hint(process_type, "Укажите параметры в конце запроса", USAGE[process_type])]
+
+        # Несовместимые пары материал/инструмент не считаются
+        catalog = TURNING_TOOLS if process_type == "turning" else MILLING_TOOLS
+        pairs = ((material, tool) for material in (MATERIALS[materials.names[i]] for i in material_ids)
+                 for tool in (catalog[tools.names[i]] for i in tool_ids) if COMPATIBILITY.allows(material, tool))
+        results = [self._article(process_type, operation, material, tool, params)
+                   for material, tool in islice(pairs, MAX_RESULTS)]
+        return results or [self._hint(process_type, "Инструмент не подходит для материала",
+                                      "Уберите инструмент из запроса, чтобы увидеть подходящие")]
+
+    def _article(self, process_type: str, operation: str, material, tool, params: List[float]):
+        if process_type == "turning":
+            from calculations.turning_calc import TurningCalculator
+            result = self._calculate(TurningCalculator, material=material, tool=tool, operation=operation,
+                                     diameter=params[0])
+            summary = f"V={result['speed']} м/мин, f={result['feed']} мм/об, n={result['rpm']} об/мин"
+        else:
+            from calculations.milling_calc import MillingCalculator
+            depth = params[2] if len(params) > 2 else None
+            result = self._calculate(MillingCalculator, material=material, tool=tool, operation=operation,
+                                     diameter=params[0], teeth=int(params[1]), cutting_depth=depth)
+            summary = f"V={result['speed']} м/мин, n={result['rpm']} об/мин, Vf={result['feed_rate']} мм/мин"
+        return InlineQueryResultArticle(
+            id=_result_id(process_type, material.name, tool.name),
+            title=f"{material.name} · {tool.name}",
+            description=f"{operation}: {summary}",
+            input_message_content=InputTextMessageContent(ResultFormatter.render(process_type, result),
+                                                          parse_mode="Markdown"),
+        )
+
+    @staticmethod
+    def _hint(process_type: str, title: str, description: str) -> InlineQueryResultArticle:
+        return InlineQueryResultArticle(
+            id=f"hint:{process_type}",
+            title=title,
+            description=description,
+            input_message_content=InputTextMessageContent(f"Формат запроса: {USAGE[process_type]}"),
+        )
@@ -1,47 +1,112 @@
-from telebot.types import ReplyKeyboardMarkup, KeyboardButton
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+from database.compatibility import COMPATIBILITY
+from database.db_operations import DatabaseOperations
 from database.materials_lib import MATERIAL_GROUPS
-from database.tools_lib import OPERATIONS, TURNING_TOOLS, MILLING_TOOLS
+from database.tools_lib import OPERATIONS
+
+
+# Ограничение Telegram на callback_data (байт)
+CALLBACK_DATA_LIMIT = 64
+
+
+def _page_callback(kind: str, offset: int, query: str) -> str:
+    """callback_data листания результатов поиска; запрос обрезается по лимиту"""
+    prefix = f"page:{kind}:{offset}:"
+    room = CALLBACK_DATA_LIMIT - len(prefix.encode())
+    return prefix + query.encode()[:room].decode(errors="ignore")
+
+
+class FrozenMarkup(str):
+    """
+    reply_markup с заранее сериализованным JSON (как ReplyKeyboardMarkup.to_json).
+    Строку telebot передает в Bot API как есть, поэтому меню строятся без импорта telebot.
+    """
+
+    def to_json(self) -> str:
+        return str(self)
+
 
 class Keyboards:
+    # Готовые клавиатуры, действительные для версии каталога _cache_version
+    _cache: Dict[Tuple, FrozenMarkup] = {}
+    _cache_version = None
+
     @staticmethod
-    def _create_markup(buttons: list, row_width: int = 2) -> ReplyKeyboardMarkup:
-        """Создает клавиатуру с заданными кнопками"""
-        markup = ReplyKeyboardMarkup(resize_keyboard=True, row_width=row_width)
-        markup.add(*[KeyboardButton(btn) for btn in buttons])
+    def _cached(key: Tuple, build: Callable[[], FrozenMarkup]) -> FrozenMarkup:
+        """Клавиатура из кэша; кэш сбрасывается при изменении версии каталога"""
+        if Keyboards._cache_version != DatabaseOperations.version:
+            Keyboards._cache = {}
+            Keyboards._cache_version = DatabaseOperations.version
+        markup = Keyboards._cache.get(key)
+        if markup is None:
+            markup = Keyboards._cache[key] = build()
         return markup
 
     @staticmethod
-    def main_menu() -> ReplyKeyboardMarkup:
+    def _create_markup(buttons: list, row_width: int = 2) -> FrozenMarkup:
+        """Создает клавиатуру с заданными кнопками (по row_width в ряд)"""
+        rows = [[{"text": btn} for btn in buttons[i:i + row_width]] for i in range(0, len(buttons), row_width)]
+        return FrozenMarkup(json.dumps({"keyboard": rows, "resize_keyboard": True}))
+
+    @staticmethod
+    def main_menu() -> FrozenMarkup:
         """Главное меню"""
         buttons = ["Токарная обработка", "Фрезерная обработка"]
-        return Keyboards._create_markup(buttons)
+        return Keyboards._cached(("main_menu",), lambda: Keyboards._create_markup(buttons))
 
     @staticmethod
-    def operations_menu(process_type: str) -> ReplyKeyboardMarkup:
+    def operations_menu(process_type: str) -> FrozenMarkup:
         """Меню операций для токарной/фрезерной обработки"""
-        buttons = OPERATIONS[process_type] + ["Назад"]
-        return Keyboards._create_markup(buttons, row_width=1)
+        return Keyboards._cached(("operations_menu", process_type), lambda: Keyboards._create_markup(
+            OPERATIONS[process_type] + ["Назад"], row_width=1))
 
     @staticmethod
-    def material_groups() -> ReplyKeyboardMarkup:
+    def material_groups() -> FrozenMarkup:
         """Список групп материалов"""
-        buttons = list(MATERIAL_GROUPS.keys()) + ["Назад"]
-        return Keyboards._create_markup(buttons, row_width=2)
+        return Keyboards._cached(("material_groups",), lambda: Keyboards._create_markup(
+            list(MATERIAL_GROUPS.keys()) + ["Назад"], row_width=2))
 
     @staticmethod
-    def materials_from_group(group: str) -> ReplyKeyboardMarkup:
+    def materials_from_group(group: str) -> FrozenMarkup:
         """Список материалов в группе"""
-        buttons = MATERIAL_GROUPS[group] + ["Назад"]
-        return Keyboards._create_markup(buttons, row_width=2)
+        return Keyboards._cached(("materials_from_group", group), lambda: Keyboards._create_markup(
+            MATERIAL_GROUPS[group] + ["Назад"], row_width=2))
 
     @staticmethod
-    def tools_menu(process_type: str) -> ReplyKeyboardMarkup:
-        """Список инструментов для типа обработки"""
-        tools = list(TURNING_TOOLS.keys()) if process_type == "turning" else list(MILLING_TOOLS.keys())
-        buttons = tools + ["Назад"]
-        return Keyboards._create_markup(buttons, row_width=1)
+    def tools_menu(process_type: str, group: Optional[str] = None) -> FrozenMarkup:
+        """Список инструментов для типа обработки (подходящих для группы материалов, если она задана)"""
+        def build():
+            buttons = COMPATIBILITY.tool_names(process_type, group) + ["Назад"]
+            return Keyboards._create_markup(buttons, row_width=1)
+        return Keyboards._cached(("tools_menu", process_type, group), build)
 
     @staticmethod
-    def yes_no_keyboard() -> ReplyKeyboardMarkup:
+    def yes_no_keyboard() -> FrozenMarkup:
         """Клавиатура Да/Нет"""
-        return Keyboards._create_markup(["Да", "Нет"], row_width=2)
\ No newline at end of file
+        return Keyboards._cached(("yes_no",), lambda: Keyboards._create_markup(["Да", "Нет"], row_width=2))
+
+    @staticmethod
+    def remove() -> FrozenMarkup:
+        """Скрытие клавиатуры"""
+        return Keyboards._cached(("remove",), lambda: FrozenMarkup(json.dumps({"remove_keyboard": True})))
+
+    @staticmethod
+    def search_results(kind: str, version: int, results: List[Tuple[int, str]], query: str,
+                       offset: int, has_more: bool, page_size: int):
+        """Результаты поиска по каталогу с листанием страниц (InlineKeyboardMarkup)"""
+        from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+        markup = InlineKeyboardMarkup(row_width=1)
+        for entry_id, name in results:
+            markup.add(InlineKeyboardButton(name, callback_data=f"pick:{kind}:{version}:{entry_id}"))
+        navigation = []
+        if offset > 0:
+            navigation.append(InlineKeyboardButton(
+                "◀️", callback_data=_page_callback(kind, max(0, offset - page_size), query)))
+        if has_more:
+            navigation.append(InlineKeyboardButton(
+                "▶️", callback_data=_page_callback(kind, offset + page_size, query)))
+        if navigation:
+            markup.row(*navigation)
+        return markup
@@ -0,0 +1,207 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Границы корзин гистограмм по умолчанию (сек): от 10 мкс до 10 с
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Значение метрики-функции: число или пары (метки, число)
+Sample = Union[float, Iterable[Tuple[Dict[str, str], float]]]
+
+
+class Series:
+    """Гистограмма одного набора меток: счетчики корзин, сумма и число наблюдений"""
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> "Timer":
+        """Контекстный менеджер: наблюдение - время выполнения блока"""
+        return Timer(self)
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантили по корзинам (линейно внутри корзины)"""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class Timer:
+    __slots__ = ("_series", "_start")
+
+    def __init__(self, series: Series):
+        self._series = series
+
+    def __enter__(self) -> "Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._series.observe(time.perf_counter() - self._start)
+
+
+class Histogram:
+    """Гистограмма с одной меткой (например, имя обработчика)"""
+
+    def __init__(self, name: str, help: str, label: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self._series: Dict[str, Series] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, value: str) -> Series:
+        series = self._series.get(value)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(value, Series(self.buckets))
+        return series
+
+    def series(self) -> List[Tuple[str, Series]]:
+        return sorted(self._series.items())
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, series in self.series():
+            label = f'{self.label}="{_escape(value)}"'
+            with series._lock:
+                counts, total, count = list(series.counts), series.sum, series.count
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {count}")
+        return lines
+
+
+class Callback:
+    """Метрика, значение которой читается функцией при экспорте (размеры, счетчики кэшей)"""
+
+    def __init__(self, name: str, help: str, func: Callable[[], Sample], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self._func = func
+
+    def samples(self) -> List[Tuple[Dict[str, str], float]]:
+        value = self._func()
+        if isinstance(value, (int, float)):
+            return [({}, value)]
+        return list(value)
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.samples():
+            label = ",".join(f'{key}="{_escape(str(item))}"' for key, item in labels.items())
+            lines.append(f"{self.name}{{{label}}} {value}" if label else f"{self.name} {value}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    """Набор метрик процесса и экспорт в текстовом формате Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Histogram, Callback]] = {}
+
+    def histogram(self, name: str, help: str, label: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help, label, buckets))
+
+    def callback(self, name: str, help: str, func: Callable[[], Sample], kind: str = "gauge") -> Callback:
+        """Регистрация (или замена) метрики-функции"""
+        metric = self._metrics[name] = Callback(name, help, func, kind)
+        return metric
+
+    def get(self, name: str) -> Optional[Union[Histogram, Callback]]:
+        return self._metrics.get(name)
+
+    def expose(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.expose())
+            except Exception as e:
+                lines.append(f"# {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+# Метрики процесса бота
+REGISTRY = Registry()
+
+
+class MetricsServer:
+    """HTTP-сервер экспорта метрик (GET /metrics) в фоновом потоке"""
+
+    def __init__(self, registry: Registry = REGISTRY, host: str = "127.0.0.1", port: int = 9108):
+        from http.server import ThreadingHTTPServer
+
+        self._registry = registry
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        from http.server import BaseHTTPRequestHandler
+
+        registry = self._registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.expose().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,104 @@
+from collections.abc import Container
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Источник текстов кнопок: готовый список или функция, возвращающая актуальный список
+KeySource = Union[Iterable[str], Callable[[], Iterable[str]]]
+
+
+class MessageRouter:
+    """
+    Маршрутизатор текстовых сообщений.
+    Вместо последовательной проверки фильтров каждого обработчика
+    строит одну неизменяемую таблицу «текст кнопки → обработчик»
+    и выбирает обработчик одним поиском по словарю.
+    Справочники (lookup) в таблицу не копируются: текст проверяется
+    в самом справочнике, так каталог в SQLite не читается в память целиком.
+    """
+
+    def __init__(self, latency=None):
+        """
+        :param latency: гистограмма времени обработчиков (utils.metrics.Histogram) с меткой-именем обработчика
+        """
+        self._latency = latency
+        # Маршруты с номером регистрации: (номер, тексты, обработчик) и (номер, справочник, обработчик)
+        self._routes: List[Tuple[int, KeySource, Callable]] = []
+        self._lookups: List[Tuple[int, Container, Callable]] = []
+        self._commands: Dict[str, Callable] = {}
+        self._fallback: Optional[Callable] = None
+        self._table = MappingProxyType({})
+
+    def handler(self, keys: KeySource):
+        """
+        Декоратор регистрации обработчика для набора текстов.
+        Приоритет как у цепочки фильтров: первый зарегистрированный выигрывает.
+        """
+        def decorator(func: Callable) -> Callable:
+            self._routes.append((self._position(), keys, func))
+            self.rebuild()
+            return func
+        return decorator
+
+    def lookup(self, catalog: Container):
+        """
+        Декоратор обработчика для текстов из справочника (проверка `text in catalog`
+        при разборе сообщения). Приоритет - по порядку регистрации, как у handler.
+        """
+        def decorator(func: Callable) -> Callable:
+            self._lookups.append((self._position(), catalog, func))
+            return func
+        return decorator
+
+    def _position(self) -> int:
+        return len(self._routes) + len(self._lookups)
+
+    def command(self, names: Iterable[str]):
+        """Декоратор обработчика команд (/start, /help@bot и т.п.)"""
+        def decorator(func: Callable) -> Callable:
+            for name in names:
+                self._commands[name] = func
+            return func
+        return decorator
+
+    def fallback(self, func: Callable) -> Callable:
+        """Декоратор обработчика для всех остальных сообщений"""
+        self._fallback = func
+        return func
+
+    def rebuild(self) -> None:
+        """Пересборка таблицы маршрутов (при изменении каталога)"""
+        table = {}
+        for position, keys, func in self._routes:
+            for key in (keys() if callable(keys) else keys):
+                table.setdefault(key, (position, func))
+        # Подмена ссылки атомарна: читатели видят либо старую, либо новую таблицу
+        self._table = MappingProxyType(table)
+
+    def resolve(self, text: str) -> Optional[Callable]:
+        """Обработчик для текста сообщения"""
+        route = self._table.get(text)
+        # Справочники, зарегистрированные раньше найденного в таблице маршрута
+        for position, catalog, func in self._lookups:
+            if route is not None and route[0] < position:
+                break
+            if text in catalog:
+                return func
+        if route is not None:
+            return route[1]
+        handler = self._commands.get(_command_name(text)) if text.startswith('/') else None
+        return handler or self._fallback
+
+    def dispatch(self, message):
+        """Вызов обработчика для сообщения"""
+        handler = self.resolve(message.text)
+        if handler is None:
+            return None
+        if self._latency is None:
+            return handler(message)
+        with self._latency.labels(handler.__name__).time():
+            return handler(message)
+
+
+def _command_name(text: str) -> str:
+    """Имя команды без '/', аргументов и @имени_бота"""
+    return text[1:].split(' ', 1)[0].split('@', 1)[0]
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from calculations.milling_calc import MillingCalculator
+from calculations.turning_calc import TurningCalculator
+from database.materials_lib import MATERIALS
+from database.tools_lib import TURNING_TOOLS, MILLING_TOOLS
+
+# Строка сессии для хранения: (process_type, operation, material_group, material, tool, awaiting_input)
+SessionRow = Tuple[Optional[str], ...]
+
+
+class UserState:
+    """Состояние диалога пользователя (компактная запись на __slots__)"""
+    __slots__ = ("process_type", "operation", "material_group", "material", "tool", "awaiting_input",
+                 "expires_at")
+
+    def __init__(self):
+        self.expires_at = 0.0  # срок жизни в хранилище в памяти (time.monotonic)
+        self.reset()
+
+    def reset(self):
+        self.process_type = None  # turning/milling
+        self.operation = None
+        self.material_group = None
+        self.material = None
+        self.tool = None
+        self.awaiting_input = None  # diameter/teeth/etc
+
+    @property
+    def calculator(self):
+        """Калькулятор по типу обработки"""
+        if self.process_type == "turning":
+            return TurningCalculator
+        if self.process_type == "milling":
+            return MillingCalculator
+        return None
+
+    def to_row(self) -> SessionRow:
+        """Сериализация: материал и инструмент хранятся по имени"""
+        return (
+            self.process_type,
+            self.operation,
+            self.material_group,
+            self.material.name if self.material else None,
+            self.tool.name if self.tool else None,
+            self.awaiting_input,
+        )
+
+    @classmethod
+    def from_row(cls, row: SessionRow) -> "UserState":
+        state = cls()
+        state.process_type, state.operation, state.material_group, material, tool, state.awaiting_input = row
+        tools = TURNING_TOOLS if state.process_type == "turning" else MILLING_TOOLS
+        state.material = MATERIALS.get(material) if material else None
+        if material and state.material is None:
+            # Материал, рассчитанный по твердости и прочности (calculations/regime_model.py)
+            from calculations.regime_model import REGIME_MODEL
+            state.material = REGIME_MODEL.from_name(material)
+        state.tool = tools.get(tool) if tool else None
+        return state
+
+
+class SessionStore(ABC):
+    """
+    Интерфейс хранилища сессий.
+    Обработчики получают состояние через get() и изменяют его на месте,
+    после обработки обновления вызывается commit() для сохранения.
+    """
+
+    @abstractmethod
+    def get(self, user_id: int) -> UserState:
+        """Состояние пользователя (новое, если сессии нет или она истекла)"""
+
+    def commit(self, user_id: int) -> None:
+        """Сохранение изменений, сделанных в состоянии после get()"""
+
+    @abstractmethod
+    def delete(self, user_id: int) -> None:
+        """Удаление сессии пользователя"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Число действующих (не истекших) сессий"""
+
+    def close(self) -> None:
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Сессии в памяти процесса с вытеснением по LRU и TTL.
+    TTL продлевается при каждом обращении, поэтому порядок LRU совпадает
+    с порядком истечения и устаревшие сессии снимаются с начала очереди.
+    """
+
+    def __init__(self, max_size: int = 100_000, ttl: float = 24 * 3600):
+        """
+        :param max_size: максимум сессий в памяти
+        :param ttl: время жизни сессии без активности (сек)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._sessions: "OrderedDict[int, UserState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> UserState:
+        now = time.monotonic()
+        with self._lock:
+            sessions = self._sessions
+            state = sessions.get(user_id)
+            if state is None or state.expires_at < now:
+                state = sessions[user_id] = UserState()
+            sessions.move_to_end(user_id)
+            state.expires_at = now + self.ttl
+            self._evict(now)
+            return state
+
+    def _evict(self, now: float) -> None:
+        sessions = self._sessions
+        while len(sessions) > self.max_size:
+            sessions.popitem(last=False)
+        while sessions and next(iter(sessions.values())).expires_at < now:
+            sessions.popitem(last=False)
+
+    def delete(self, user_id: int) -> None:
+        with self._lock:
+            self._sessions.pop(user_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict(time.monotonic())  # истекшие сессии не считаются
+            return len(self._sessions)
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Сессии в SQLite: переживают перезапуск и доступны нескольким
+    рабочим процессам, открывшим один и тот же файл (режим WAL).
+    """
+
+    def __init__(self, path: str, ttl: float = 24 * 3600):
+        """
+        :param path: путь к файлу базы сессий
+        :param ttl: время жизни сессии без активности (сек)
+        """
+        self.ttl = ttl
+        self._path = path
+        self._lock = threading.Lock()
+        self._pending: Dict[int, UserState] = {}
+        self._open()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "user_id INTEGER PRIMARY KEY, process_type TEXT, operation TEXT, material_group TEXT, "
+            "material TEXT, tool TEXT, awaiting_input TEXT, expires_at REAL NOT NULL)"
+        )
+
+    def _open(self) -> None:
+        import sqlite3
+
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    @property
+    def _db(self) -> "sqlite3.Connection":
+        # Соединение нельзя использовать в процессе, созданном через fork (шарды-процессы)
+        if self._pid != os.getpid():
+            self._pending = {}
+            self._open()
+        return self._conn
+
+    def get(self, user_id: int) -> UserState:
+        with self._lock:
+            state = self._pending.get(user_id)
+            if state is None:
+                row = self._db.execute(
+                    "SELECT process_type, operation, material_group, material, tool, awaiting_input "
+                    "FROM sessions WHERE user_id = ? AND expires_at >= ?",
+                    (user_id, time.time()),
+                ).fetchone()
+                state = UserState.from_row(row) if row else UserState()
+                self._pending[user_id] = state
+            return state
+
+    def commit(self, user_id: int) -> None:
+        with self._lock:
+            state = self._pending.pop(user_id, None)
+            if state is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, *state.to_row(), time.time() + self.ttl),
+                )
+
+    def delete(self, user_id: int) -> None:
+        with self._lock:
+            self._pending.pop(user_id, None)
+            self._db.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+
+    def purge_expired(self) -> int:
+        """Удаление истекших сессий, возвращает число удаленных"""
+        with self._lock:
+            return self._db.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),)).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions WHERE expires_at >= ?",
+                                    (time.time(),)).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()